@@ -0,0 +1,65 @@
+"""Compares the approximate set mining with the exact mining on synthetic event sequences: recall and precision of
+the itemsets, the largest deviation of the estimated supports and the runtime.
+
+Usage:
+    python -m benchmarks.benchmark_approximate_mining --nb-sequences 1000000 --min-support 0.01 --epsilon 0.005 0.002
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.benchmark_set_mining import synthetic_sequences
+from ml_pipeline.components.set_mining.miners import mine_frequent_itemsets, mine_frequent_itemsets_approximate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-sequences", type=int, default=500_000)
+    parser.add_argument("--nb-events", type=int, default=300)
+    parser.add_argument("--mean-length", type=float, default=4.0)
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.005, 0.002])
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--backend", default="eclat")
+    args = parser.parse_args()
+
+    sequences = synthetic_sequences(args.nb_sequences, args.nb_events, args.mean_length)
+
+    start = time.perf_counter()
+    exact = mine_frequent_itemsets(sequences, args.min_support, args.backend)
+    runtime_exact = time.perf_counter() - start
+    support_exact = dict(zip(exact["itemsets"], exact["support"]))
+
+    print(
+        "| mode | sample size | runtime [s] | nb itemsets | recall | recall incl. near threshold | precision |", end=""
+    )
+    print(" max support error |")
+    print("|---|---|---|---|---|---|---|---|")
+    print(f"| exact | {len(sequences)} | {runtime_exact:.2f} | {len(exact)} | 1.000 | 1.000 | 1.000 | 0.0000 |")
+    for epsilon in args.epsilon:
+        start = time.perf_counter()
+        approximate, kpis = mine_frequent_itemsets_approximate(
+            sequences, args.min_support, epsilon, args.confidence, args.backend
+        )
+        runtime = time.perf_counter() - start
+
+        # itemsets whose estimate is at or above min_support are the answer, near threshold ones are flagged only
+        reported = approximate[approximate["support"] >= args.min_support]
+        true_positives = sum(itemset in support_exact for itemset in reported["itemsets"])
+        itemsets_approximate = set(approximate["itemsets"])
+        recall_flagged = np.mean([itemset in itemsets_approximate for itemset in support_exact])
+        errors = [
+            abs(support - support_exact[itemset])
+            for itemset, support in zip(approximate["itemsets"], approximate["support"])
+            if itemset in support_exact
+        ]
+        print(
+            f"| approximate, epsilon {epsilon} | {kpis['sample_size']} | {runtime:.2f} | {len(reported)} "
+            f"| {true_positives / max(len(exact), 1):.3f} | {recall_flagged:.3f} "
+            f"| {true_positives / max(len(reported), 1):.3f} | {max(errors, default=0.0):.4f} |"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compares the previous gather_results (nested iterdir over the data scopes, sequential reads and one pd.concat per
+result file, the whole table is rewritten) with gather_results copying the results into partitions of the run
+within s3, for many data scopes and a growing result table. Runs against moto's in-process S3
+stand-in, so the gains of the thread pool from overlapping network latency are not part of the numbers.
+
+Usage:
+    python -m benchmarks.benchmark_gather_results --nb-data-scopes 300 --nb-rows 1000 --n-workers 8
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from cloudpathlib import S3Path
+from moto import mock_s3
+
+from ml_pipeline.components.exit_handler.steps import gather_results
+from ml_pipeline.util.s3util import S3_REGION, get_s3_client
+from ml_pipeline.util.util import set_debug_mode, upload_data_s3
+
+BUCKET = "benchmark-bucket"
+RESULT_FILES = ["association_rules.csv", "frequent_sets.csv"]
+
+
+def read_s3_csv(file: S3Path) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(file.read_text()))
+
+
+def gather_results_sequential(bucket: str, base_tmp_out: str, pipeline_out: str):
+    """Previous implementation without the output tables and the cleanup"""
+    result_files = S3Path(f"s3://{bucket}") / pipeline_out
+    tmp_results = S3Path(f"s3://{bucket}") / base_tmp_out
+
+    data_scopes = []
+    for prefix_model in tmp_results.iterdir():
+        for prefix in prefix_model.iterdir():
+            for prefix_period in prefix.iterdir():
+                data_scopes.append(prefix_period)
+
+    for file in result_files.iterdir():
+        if not file.is_file():
+            continue
+        df = read_s3_csv(file)
+        others = [read_s3_csv(data_scope / file.name) for data_scope in data_scopes]
+        upload_data_s3(pd.concat([df] + others), file.bucket, file.key)
+
+
+def setup_results(nb_data_scopes: int, nb_rows: int):
+    rng = np.random.default_rng(0)
+    for file_name in RESULT_FILES:
+        upload_data_s3(pd.DataFrame({"run_id": [], "support": [], "itemsets": []}), BUCKET, f"out/{file_name}")
+        for i in range(nb_data_scopes):
+            df = pd.DataFrame(
+                {
+                    "run_id": [str(i)] * nb_rows,
+                    "support": rng.uniform(size=nb_rows),
+                    "itemsets": rng.integers(0, 1000, nb_rows).astype(str),
+                }
+            )
+            upload_data_s3(df, BUCKET, f"tmp_out/param1/scope_{i}/2022-01-01_2022-02-01/{file_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-data-scopes", type=int, default=200)
+    parser.add_argument("--nb-rows", type=int, default=1000, help="rows per result file and data scope")
+    parser.add_argument("--n-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    os.environ.setdefault("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+    # keep the temporary results for both runs
+    set_debug_mode(True)
+
+    with mock_s3():
+        get_s3_client().create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": S3_REGION})
+        setup_results(args.nb_data_scopes, args.nb_rows)
+
+        print("| implementation | runtime [s] |")
+        print("|---|---|")
+        for name, func in [
+            ("sequential", lambda: gather_results_sequential(BUCKET, "tmp_out/", "out/")),
+            (
+                "partitioned, copy within s3",
+                lambda: gather_results(BUCKET, "tmp/", "tmp_out/", "out/", "kf", args.n_workers),
+            ),
+        ]:
+            start = time.perf_counter()
+            func()
+            print(f"| {name} | {time.perf_counter() - start:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
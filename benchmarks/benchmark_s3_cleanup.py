@@ -0,0 +1,64 @@
+"""Compares the previous cleanup of the temporary folders (one delete request per object) with delete_s3_prefixes
+(one listing per folder and delete_objects requests of up to 1000 keys from a thread pool). Runs against moto's
+in-process S3 stand-in, so the gains come from the number of requests and not from overlapping network latency.
+
+Usage:
+    python -m benchmarks.benchmark_s3_cleanup --nb-objects 10000 --n-workers 4
+"""
+import argparse
+import os
+import time
+
+from moto import mock_s3
+
+from ml_pipeline.util.s3util import S3_REGION, get_s3_client, get_s3_resource
+from ml_pipeline.util.util import delete_s3_prefixes
+
+BUCKET = "benchmark-bucket"
+
+
+def delete_per_object(bucket: str, prefixes: list) -> int:
+    """Previous implementation of the exit handler"""
+    bucket_s3 = get_s3_resource().Bucket(bucket)
+    nb_deleted = 0
+    for path in prefixes:
+        for file in bucket_s3.objects.filter(Prefix=path):
+            file.delete()
+            nb_deleted += 1
+    return nb_deleted
+
+
+def setup_objects(nb_objects: int):
+    client = get_s3_client()
+    for i in range(nb_objects):
+        client.put_object(Bucket=BUCKET, Key=f"tmp/p1/scope_{i % 100}/2022-01-01_2022-02-01/{i}.csv", Body=b"")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-objects", type=int, default=10_000)
+    parser.add_argument("--n-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    os.environ.setdefault("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+
+    with mock_s3():
+        get_s3_client().create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": S3_REGION})
+
+        print("| implementation | nb objects | runtime [s] | objects/s |")
+        print("|---|---|---|---|")
+        for name, func in [
+            ("per object", lambda: delete_per_object(BUCKET, ["tmp/"])),
+            (f"batched, {args.n_workers} workers", lambda: delete_s3_prefixes(BUCKET, ["tmp/"], args.n_workers)),
+        ]:
+            setup_objects(args.nb_objects)
+            start = time.perf_counter()
+            nb_deleted = func()
+            runtime = time.perf_counter() - start
+            print(f"| {name} | {nb_deleted} | {runtime:.2f} | {nb_deleted / runtime:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
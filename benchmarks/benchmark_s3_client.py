@@ -0,0 +1,74 @@
+"""Compares the per-request overhead of creating a new session and resource for every upload (previous behaviour of
+upload_data_s3) with the shared, pooled client of ml_pipeline.util.s3util. Runs against moto's in-process S3
+stand-in, so the numbers contain the client side overhead only and no network latency.
+
+Usage:
+    python -m benchmarks.benchmark_s3_client --nb-requests 500 --n-threads 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from moto import mock_s3
+
+from ml_pipeline.util.s3util import S3_REGION, get_s3_client, get_s3_resource
+
+BUCKET = "benchmark-bucket"
+
+
+def put_new_resource(key: str, body: bytes):
+    """Previous implementation: a new default session and resource per upload"""
+    boto3.setup_default_session(region_name=S3_REGION)
+    boto3.resource("s3").Object(BUCKET, key).put(Body=body)
+
+
+def put_shared_resource(key: str, body: bytes):
+    get_s3_resource().Object(BUCKET, key).put(Body=body)
+
+
+def put_shared_client(key: str, body: bytes):
+    get_s3_client().put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def measure(put, nb_requests: int, n_threads: int, body: bytes) -> float:
+    keys = [f"benchmark/{put.__name__}/{i}.csv" for i in range(nb_requests)]
+    start = time.perf_counter()
+    if n_threads == 1:
+        for key in keys:
+            put(key, body)
+    else:
+        with ThreadPoolExecutor(n_threads) as executor:
+            list(executor.map(put, keys, [body] * nb_requests))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-requests", type=int, default=300)
+    parser.add_argument("--n-threads", type=int, default=8)
+    parser.add_argument("--object-size", type=int, default=1024, help="bytes per object")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    body = b"x" * args.object_size
+
+    with mock_s3():
+        get_s3_client().create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": S3_REGION})
+
+        print("| implementation | threads | runtime [s] | per request [ms] |")
+        print("|---|---|---|---|")
+        for put, n_threads in [
+            (put_new_resource, 1),
+            (put_shared_resource, 1),
+            (put_shared_client, 1),
+            (put_shared_client, args.n_threads),
+        ]:
+            runtime = measure(put, args.nb_requests, n_threads, body)
+            print(f"| {put.__name__} | {n_threads} | {runtime:.2f} | {1000 * runtime / args.nb_requests:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
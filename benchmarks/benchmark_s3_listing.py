@@ -0,0 +1,70 @@
+"""Compares the previous get_files_in_s3_directory (list everything below the prefix, filter the directory in Python)
+with the delimiter listing for a directory with a few files next to many data scope directories, and the sequential
+with the parallel recursive listing. Runs against moto's in-process S3 stand-in, so the differences come from the
+number of listed objects and requests and not from network latency.
+
+Usage:
+    python -m benchmarks.benchmark_s3_listing --nb-data-scopes 2000 --nb-files 5 --n-workers 8
+"""
+import argparse
+import os
+import time
+from pathlib import PurePosixPath
+
+from moto import mock_s3
+
+from ml_pipeline.util.s3util import S3_REGION, get_s3_client, get_s3_resource
+from ml_pipeline.util.util import get_files_in_s3_directory
+
+BUCKET = "benchmark-bucket"
+
+
+def get_files_in_s3_directory_filter(s3, bucket: str, path: str) -> list:
+    """Previous implementation of the non recursive listing"""
+    files = list(filter(lambda f: not f.key.endswith("/"), s3.Bucket(bucket).objects.filter(Prefix=path)))
+    return list(filter(lambda f: str(PurePosixPath(f.key).parent) == path, files))
+
+
+def measure(func) -> tuple:
+    start = time.perf_counter()
+    nb_files = len(list(func()))
+    return nb_files, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-data-scopes", type=int, default=1000)
+    parser.add_argument("--nb-files", type=int, default=5, help="files per data scope")
+    parser.add_argument("--n-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+    with mock_s3():
+        client = get_s3_client()
+        client.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": S3_REGION})
+        for name in ["run_info.csv", "hyperparam_info.csv", "error_logs.csv"]:
+            client.put_object(Bucket=BUCKET, Key=f"extraction/{name}", Body=b"")
+        for data_scope in range(args.nb_data_scopes):
+            for i in range(args.nb_files):
+                client.put_object(Bucket=BUCKET, Key=f"extraction/scope_{data_scope}/2022_{i}/events.csv", Body=b"")
+        s3 = get_s3_resource()
+
+        print("| listing | nb files | runtime [s] |")
+        print("|---|---|---|")
+        for name, func in [
+            ("directory, list and filter", lambda: get_files_in_s3_directory_filter(s3, BUCKET, "extraction")),
+            ("directory, delimiter", lambda: get_files_in_s3_directory(s3, BUCKET, "extraction")),
+            ("recursive, sequential", lambda: get_files_in_s3_directory(s3, BUCKET, "extraction", recursive=True)),
+            (
+                f"recursive, {args.n_workers} workers",
+                lambda: get_files_in_s3_directory(s3, BUCKET, "extraction", recursive=True, n_workers=args.n_workers),
+            ),
+        ]:
+            nb_files, runtime = measure(func)
+            print(f"| {name} | {nb_files} | {runtime:.3f} |")
+
+
+if __name__ == "__main__":
+    main()
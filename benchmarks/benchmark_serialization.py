@@ -0,0 +1,103 @@
+"""Compares size and write/read time of CSV, Parquet and Arrow for the tables handed over between the pipeline steps:
+the preprocessed event history and the event sequences. The files are written to memory, so S3 transfer time scales
+with the size column.
+
+Usage:
+    python -m benchmarks.benchmark_serialization --nb-events 2000000 --columns object_a event_id
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from benchmarks.benchmark_set_mining import synthetic_sequences
+
+
+def synthetic_event_history(nb_events: int, nb_objects: int, seed: int = 0) -> pd.DataFrame:
+    """Event history with the columns of the preprocessed event history"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp("2022-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 365 * 86400, nb_events)), "s")
+    timestamps = timestamps.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return pd.DataFrame(
+        {
+            "object_a": np.char.add("object_", rng.integers(0, nb_objects, nb_events).astype(str)),
+            "readout_id": rng.integers(0, nb_events // 10 + 1, nb_events),
+            "event_id": rng.integers(0, 2000, nb_events),
+            "snapshot_timestamp_calc": timestamps,
+            "message_timestamp": timestamps,
+            "snapshot_systemtime_seconds": rng.integers(0, 10**7, nb_events),
+            "snapshot_mileage_km": rng.uniform(0, 300_000, nb_events).round(2),
+        }
+    )
+
+
+writers = {
+    "csv": lambda df, buffer: df.to_csv(buffer, index=False, sep=","),
+    "parquet": lambda df, buffer: df.to_parquet(buffer, index=False, compression="zstd"),
+    "arrow": lambda df, buffer: feather.write_feather(df, buffer, compression="zstd"),
+}
+
+readers = {
+    "csv": lambda buffer, columns: pd.read_csv(buffer, sep=",", usecols=columns),
+    "parquet": lambda buffer, columns: pq.read_table(buffer, columns=columns).to_pandas(),
+    "arrow": lambda buffer, columns: feather.read_table(buffer, columns=columns).to_pandas(),
+}
+
+
+def measure(name: str, df: pd.DataFrame, columns: list):
+    """Size in MiB and runtimes of writing, reading all columns and reading the projected columns"""
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    writers[name](df, buffer)
+    runtime_write = time.perf_counter() - start
+    data = buffer.getvalue()
+
+    runtimes_read = []
+    for read_columns in [None, columns]:
+        start = time.perf_counter()
+        readers[name](io.BytesIO(data), read_columns)
+        runtimes_read.append(time.perf_counter() - start)
+
+    return len(data) / 2**20, runtime_write, *runtimes_read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-events", type=int, default=1_000_000)
+    parser.add_argument("--nb-objects", type=int, default=5_000)
+    parser.add_argument("--nb-sequences", type=int, default=250_000)
+    parser.add_argument("--columns", nargs="+", default=["object_a", "event_id"], help="projected columns")
+    args = parser.parse_args()
+
+    df_event_history = synthetic_event_history(args.nb_events, args.nb_objects)
+    sequences = synthetic_sequences(args.nb_sequences, 300, 4.0)
+    df_sequences = pd.DataFrame(
+        {
+            "object_a": np.char.add("object_", (np.arange(len(sequences)) % args.nb_objects).astype(str)),
+            "cluster": np.arange(len(sequences)),
+            "event_sequence": sequences.to_lists(),
+            "nb_items": sequences.lengths,
+        }
+    )
+    tables = {
+        "event history": (df_event_history, args.columns),
+        "sequences": (df_sequences, ["object_a", "nb_items"]),
+    }
+
+    print("| table | format | size [MiB] | write [s] | read [s] | read projected [s] |")
+    print("|---|---|---|---|---|---|")
+    for table, (df, columns) in tables.items():
+        for name in writers:
+            size, runtime_write, runtime_read, runtime_read_projected = measure(name, df, columns)
+            print(
+                f"| {table} | {name} | {size:.1f} | {runtime_write:.2f} | {runtime_read:.2f} "
+                f"| {runtime_read_projected:.2f} |"
+            )
+
+
+if __name__ == "__main__":
+    main()
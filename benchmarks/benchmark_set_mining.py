@@ -0,0 +1,81 @@
+"""Compares runtime and peak memory of the set mining backends on synthetic event sequences.
+
+Usage:
+    python -m benchmarks.benchmark_set_mining --nb-sequences 200000 --nb-events 400 --min-support 0.01 --n-workers 2 4
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import fpgrowth
+from mlxtend.preprocessing import TransactionEncoder
+
+from ml_pipeline.components.set_mining.miners import mine_frequent_itemsets, mine_frequent_itemsets_partitioned
+from ml_pipeline.util.data_class import EventSequences
+
+
+def synthetic_sequences(nb_sequences: int, nb_events: int, mean_length: float, seed: int = 0) -> EventSequences:
+    """Sequences with a skewed event distribution, similar to the event histories"""
+    rng = np.random.default_rng(seed)
+    probabilities = rng.dirichlet(np.full(nb_events, 0.3))
+    lengths = np.maximum(rng.poisson(mean_length, nb_sequences), 1)
+    return EventSequences(
+        vocabulary=np.arange(nb_events),
+        offsets=np.concatenate([[0], np.cumsum(lengths)]).astype("int64"),
+        values=rng.choice(nb_events, size=lengths.sum(), p=probabilities).astype("int32"),
+    )
+
+
+def mine_mlxtend(sequences: EventSequences, min_support: float) -> pd.DataFrame:
+    """Previous implementation: TransactionEncoder and fpgrowth on the dense one-hot DataFrame"""
+    list_of_sequences = sequences.to_lists()
+    te = TransactionEncoder()
+    te_ary = te.fit(list_of_sequences).transform(list_of_sequences)
+    encoded_df = pd.DataFrame(te_ary, columns=te.columns_)
+    return fpgrowth(encoded_df, min_support=min_support, use_colnames=True)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    runtime = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, runtime, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-sequences", type=int, default=100_000)
+    parser.add_argument("--nb-events", type=int, default=300)
+    parser.add_argument("--mean-length", type=float, default=4.0)
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--n-workers", type=int, nargs="*", default=[], help="worker counts of the partitioned mining")
+    args = parser.parse_args()
+
+    sequences = synthetic_sequences(args.nb_sequences, args.nb_events, args.mean_length)
+    candidates = {
+        "mlxtend (TransactionEncoder + fpgrowth)": lambda: mine_mlxtend(sequences, args.min_support),
+        "backend fpgrowth": lambda: mine_frequent_itemsets(sequences, args.min_support, "fpgrowth"),
+        "backend eclat": lambda: mine_frequent_itemsets(sequences, args.min_support, "eclat"),
+    }
+    for n_workers in args.n_workers:
+        candidates[
+            f"partitioned eclat, {n_workers} workers"
+        ] = lambda n_workers=n_workers: mine_frequent_itemsets_partitioned(
+            sequences, args.min_support, n_workers, "eclat"
+        )
+
+    # peak memory is measured in the main process only, the workers of the partitioned mining are not included
+    print("| miner | runtime [s] | peak memory [MiB] | nb itemsets |")
+    print("|---|---|---|---|")
+    for name, func in candidates.items():
+        result, runtime, peak = measure(func)
+        print(f"| {name} | {runtime:.2f} | {peak:.1f} | {len(result)} |")
+
+
+if __name__ == "__main__":
+    main()
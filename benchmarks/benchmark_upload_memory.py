@@ -0,0 +1,68 @@
+"""Compares the peak memory of uploading a large table with the previous implementation of upload_data_s3 (render
+the whole file into a StringIO and put it at once) and the streaming multipart upload. Runs against moto's
+in-process S3 stand-in, which keeps a copy of every uploaded object in memory, so the size of the object is part of
+every peak.
+
+Usage:
+    python -m benchmarks.benchmark_upload_memory --nb-rows 2000000
+"""
+import argparse
+import io
+import os
+import time
+import tracemalloc
+
+from moto import mock_s3
+
+from benchmarks.benchmark_serialization import synthetic_event_history
+from ml_pipeline.util.s3util import S3_REGION, get_s3_client, get_s3_resource
+from ml_pipeline.util.util import upload_data_s3
+
+BUCKET = "benchmark-bucket"
+
+
+def upload_string_buffer(df, bucket: str, data_key: str):
+    """Previous implementation: the whole csv in a StringIO, copied by getvalue and sent in a single put"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, sep=",")
+    get_s3_resource().Object(bucket, data_key).put(Body=buffer.getvalue())
+
+
+def measure(upload, df, data_key: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    upload(df, BUCKET, data_key)
+    runtime = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = get_s3_client().head_object(Bucket=BUCKET, Key=data_key)["ContentLength"]
+    return size / 2**20, runtime, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nb-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    os.environ.setdefault("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+    df = synthetic_event_history(args.nb_rows, 5_000)
+
+    with mock_s3():
+        get_s3_client().create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": S3_REGION})
+
+        print("| implementation | file | size [MiB] | runtime [s] | peak memory [MiB] |")
+        print("|---|---|---|---|---|")
+        for upload, data_key in [
+            (upload_string_buffer, "events_string_buffer.csv"),
+            (upload_data_s3, "events.csv"),
+            (upload_data_s3, "events.csv.zst"),
+            (upload_data_s3, "events.parquet"),
+        ]:
+            size, runtime, peak = measure(upload, df, data_key)
+            print(f"| {upload.__name__} | {data_key} | {size:.1f} | {runtime:.2f} | {peak:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -115,15 +115,24 @@ class FeatureEngineeringConfig(StepConfig):
     name = "feature_engineering"
     input_data: feature_engineering_input = field(
         default_factory=lambda: {
+            "event_history": "event_history_preprocessed.parquet",
         }
     )
 
     output_data: feature_engineering_output = field(
         default_factory=lambda: {
+            "sequences": "sequences.parquet",
+            "sequences_csr": "sequences.npz",
+            "window_configurations": "window_configurations.json",
         }
     )
     params: feature_engineering_params = field(
         default_factory=lambda: {
+            "clustering_engine": "segmented_scan",
+            "n_workers": 1,
+            "chunksize": None,
+            "sequence_format": "string",
+            "window_configurations": [],
         }
     )
 
@@ -133,14 +142,48 @@ class SetMiningConfig(StepConfig):
     name = "set_mining"
     input_data: set_mining_input = field(
         default_factory=lambda: {
+            "sequences": "sequences.parquet",
+            "sequences_csr": "sequences.npz",
+            "window_configurations": "window_configurations.json",
+            "known_patterns": "known_patterns.csv",
         }
     )
 
     output_data: set_mining_output = field(
         default_factory=lambda: {
+            "hyperparam_info": "hyperparam_info.csv",
+            "frequent_sets": "frequent_sets.parquet",
+            "min_support_sweep": "min_support_sweep.json",
+            "itemset_state": "itemset_state.npz",
+            "association_rules": "association_rules.csv",
+        }
+    )
+    params: set_mining_params = field(
+        default_factory=lambda: {
+            "min_support": 0.3,
+            "min_support_mode": "fixed",
+            "min_support_sweep": [],
+            "incremental_mining": False,
+            "itemset_state_dir": "itemset_state/",
+            "adaptive_min_support": {
+                "candidates": [0.3, 0.2, 0.1, 0.05, 0.02, 0.01],
+                "memory_budget_mb": 4096,
+                "time_budget_s": 1800,
+                "sample_size": 5000,
+                "random_state": 0,
+            },
+            "miner_backend": "fpgrowth",
+            "n_workers": 1,
+            "mining_mode": "threshold",
+            "top_k": 100,
+            "output_mode": "all",
+            "association_rules": {"enabled": False, "min_confidence": 0.5, "min_lift": 1.0, "min_leverage": 0.0},
+            "known_patterns": {"enabled": False, "exclusion_columns": ["and_not_events"]},
+            "approximate": {"epsilon": 0.01, "confidence": 0.95, "random_state": 0},
+            "deduplicate_sequences": False,
+            "description_columns": {"itemsets_desc": "event_description_de"},
         }
     )
-    params: set_mining_params = field(default_factory=lambda: {"min_support": 0.3})
 
 
 PipelineConfigTuple = NamedTuple(
@@ -0,0 +1,42 @@
+import logging
+
+from kfp.components import func_to_container_op
+from ml_pipeline.components.compaction.steps import compact_shared_tables
+
+logger = logging.getLogger("set_mining")
+
+
+def compaction(bucket: str, pipeline_out: str) -> bool:
+    """This pipeline step merges the parts of the shared output tables written by the runs since the last compaction.
+        It is the only step of the compaction pipeline, which is scheduled as a recurring run of its own, so the runs
+        of the ml pipeline only append parts and never download the shared tables.
+
+    :param bucket: S3 bucket that is used for storing data
+    :param pipeline_out: S3 path where concatenated result files are stored
+    :return:
+    """
+    nb_merged = compact_shared_tables(bucket, pipeline_out)
+    logger.info(f"Compaction merged {nb_merged} parts of the output tables.")
+
+    return True
+
+
+# pass function to kubeflow container operation
+compaction_op = func_to_container_op(
+    func=compaction,
+    use_code_pickling=True,
+    modules_to_capture=[
+        "ml_pipeline.components.compaction.compaction",
+        "ml_pipeline.components.compaction.steps",
+        "ml_pipeline.util.util",
+        "ml_pipeline.util.tables",
+        "ml_pipeline.util.s3util",
+    ],
+    base_image="python:3.8",
+    packages_to_install=[
+        "pandas==1.5.3",
+        "boto3",
+        "cloudpickle",
+        "pyarrow",
+    ],
+)
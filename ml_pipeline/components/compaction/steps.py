@@ -0,0 +1,24 @@
+import logging
+
+from ml_pipeline.util.s3util import get_s3_resource
+from ml_pipeline.util.tables import compact_table, output_tables
+
+logger = logging.getLogger("set_mining")
+
+
+def compact_shared_tables(bucket: str, pipeline_out: str) -> int:
+    """Merges the parts of the output tables shared by all runs (run_info, hyperparam_info and error_logs) into a
+    new snapshot per table. The cost grows with the rows written since the last compaction, so this runs as a job of
+    its own on a schedule and not at the end of every run.
+
+    Args:
+        bucket: aws bucket
+        pipeline_out: place of the pipeline output tables
+
+    Returns: number of merged parts
+    """
+    s3 = get_s3_resource()
+    nb_merged = 0
+    for table_name, key_columns in output_tables.items():
+        nb_merged += compact_table(s3, bucket, pipeline_out + table_name, key_columns)
+    return nb_merged
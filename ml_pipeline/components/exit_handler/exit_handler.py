@@ -1,9 +1,8 @@
 import logging
-import boto3
 
 from kfp.components import func_to_container_op
-from ml_pipeline.util.util import is_debug_mode
-from ml_pipeline.components.exit_handler.steps import gather_results
+from ml_pipeline.util.util import delete_s3_prefixes
+from ml_pipeline.components.exit_handler.steps import compact_output_tables, gather_results
 
 logger = logging.getLogger("set_mining")
 
@@ -32,14 +31,13 @@ def exit_handler(
     """
 
     # Collect all results from the different parallel for streams
-    gather_results(bucket, base_tmp, base_tmp_out, pipeline_out)
+    gather_results(bucket, base_tmp, base_tmp_out, pipeline_out, kf_run_id)
 
-    # Delete tmp data of pipeline step
-    s3 = boto3.resource("s3")
-    if not is_debug_mode():
-        bucket_s3 = s3.Bucket(bucket)
-        for path in clear_folders:
-            [file.delete() for file in bucket_s3.objects.filter(Prefix=path)]
+    # Delete tmp data of pipeline step (kept in debug mode)
+    delete_s3_prefixes(bucket, clear_folders)
+
+    # Merge the results of the data scopes of this run, the shared output tables are merged by the compaction pipeline
+    compact_output_tables(bucket, pipeline_out, kf_run_id)
 
     # Log error message in case of a not successfully run
     if workflow_status not in ["Succeeded"]:
@@ -61,6 +59,7 @@ exit_handler_op = func_to_container_op(
         "ml_pipeline.components.exit_handler.exit_handler",
         "ml_pipeline.components.exit_handler.steps",
         "ml_pipeline.util.util",
+        "ml_pipeline.util.tables",
         "ml_pipeline.util.s3util",
         "ml_pipeline.util.data_class",
     ],
@@ -70,5 +69,6 @@ exit_handler_op = func_to_container_op(
         "boto3",
         "cloudpickle",
         "cloudpathlib",
+        "pyarrow",
     ],
 )
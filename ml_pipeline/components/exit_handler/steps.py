@@ -1,10 +1,33 @@
+import collections
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import List, Optional, Tuple
+
 import pandas as pd
 
-from ml_pipeline.util.s3util import copy_result_files, read_s3_csv
-from ml_pipeline.util.util import is_debug_mode, timed, pipeline_logging_config, upload_data_s3
+from ml_pipeline.util.s3util import copy_result_files, get_s3_client, get_s3_resource
+from ml_pipeline.util.tables import (
+    append_to_table,
+    compact_result_table,
+    get_result_partition_key,
+    output_tables,
+    read_table,
+    result_tables,
+)
+from ml_pipeline.util.util import (
+    delete_s3_prefixes,
+    get_files_in_s3_directory,
+    iter_files_in_s3_directory,
+    timed,
+    pipeline_logging_config,
+)
 
 from cloudpathlib import S3Path
 
+logger = logging.getLogger("set_mining")
+
 
 @timed
 @pipeline_logging_config
@@ -13,16 +36,25 @@ def gather_results(
     base_tmp: str,
     base_tmp_out: str,
     pipeline_out: str,
+    kf_run_id: str,
+    n_workers: int = 8,
+    date: Optional[str] = None,
 ) -> bool:
-    """This pipeline step checks if data is already extracted by aws glue job in previous run and thus
-    not need to be extracted again.
+    """This pipeline step adds the results of all data scopes of the run to the pipeline output tables. The data
+    scopes are found with one listing of the temporary outputs. Besides the tables in pipeline_out, the tables in
+    result_tables are gathered, which have no template. The result tables are partitioned by date, run and data
+    scope and the results are copied into their partitions within s3, the existing rows are never downloaded.
     Args:
         bucket: aws bucket
         base_tmp: folder where temporary operations were performed
         base_tmp_out: folder where the temporary outputs were created
         pipeline_out: place where the pipeline output should go (not the temporary output)
+        kf_run_id: Global ID of the Kubeflow Run, the rows of the output tables are appended as a part per run and the
+            results are stored in a partition per run
+        n_workers: Number of threads listing, reading and copying the results of the data scopes
+        date: Date partition of the results ('YYYY-MM-DD'), by default the current date
 
-    Returns: a flag indicating if the data extraction step should be done, and a dict containing the details
+    Returns: True if the results were gathered
     """
     # Check if data is already extracted and stored in S3
     result_files = S3Path(f"s3://{bucket}") / pipeline_out
@@ -32,27 +64,87 @@ def gather_results(
     if not result_files.exists():
         copy_result_files(result_files)
 
-    data_scopes = []
-    for prefix_model in tmp_results.iterdir():
-        for prefix in prefix_model.iterdir():
-            for prefix_period in prefix.iterdir():
-                data_scopes.append(prefix_period)
-
-    for file in result_files.iterdir():
-        if not file.is_file():
+    # one listing of all temporary outputs, the files of a data scope are stored under <param1>/<param2>/<period>/
+    s3 = get_s3_resource()
+    prefix_tmp_out = tmp_results.key.rstrip("/") + "/" if tmp_results.key else ""
+    data_scopes = set()
+    files_by_name = collections.defaultdict(list)
+    for file in iter_files_in_s3_directory(s3, bucket, base_tmp_out, recursive=True, n_workers=n_workers):
+        parts = file.key[len(prefix_tmp_out) :].split("/")
+        if len(parts) < 4:
             continue
+        data_scopes.add(prefix_tmp_out + "/".join(parts[:3]) + "/")
+        if len(parts) == 4:
+            files_by_name[parts[3]].append(file.key)
+    data_scopes = sorted(data_scopes)
+
+    # the tables of pipeline_out and the registered result tables, which need no template
+    table_keys = {
+        file.key.rsplit("/", 1)[-1]: file.key for file in get_files_in_s3_directory(s3, bucket, pipeline_out)
+    }
+    prefix_out = result_files.key.rstrip("/") + "/" if result_files.key else ""
+    for file_name in result_tables:
+        table_keys.setdefault(file_name, prefix_out + file_name)
 
-        df = read_s3_csv(file)
-        oldlen = len(df)
-        others = [read_s3_csv(data_scope / file.name) for data_scope in data_scopes]
-        new_df = pd.concat([df] + others)
-        print(f"adding {len(new_df) - oldlen} results to {file.name}")
+    if date is None:
+        date = datetime.now().strftime("%Y-%m-%d")
+    with ThreadPoolExecutor(n_workers) as executor:
+        for file_name, table_key in table_keys.items():
+            if file_name in output_tables:
+                # the tables of the data scopes are written in parts as well
+                read = partial(_read_scope_table, bucket, file_name, output_tables[file_name])
+                others = list(executor.map(read, data_scopes))
+                new_df = pd.concat(others, ignore_index=True) if others else pd.DataFrame()
+                print(f"adding {len(new_df)} results to {file_name}")
+                if len(new_df):
+                    append_to_table(new_df, bucket, table_key, f"kf_run_id={kf_run_id}")
+                continue
 
-        upload_data_s3(new_df, file.bucket, file.key)
+            # the results of the data scopes are copied into partitions of the result table, within s3
+            copies = [
+                (
+                    data_key_scope,
+                    get_result_partition_key(
+                        table_key,
+                        {
+                            "date": date,
+                            "kf_run_id": kf_run_id,
+                            "data_scope": data_key_scope[len(prefix_tmp_out) : -len(file_name) - 1],
+                        },
+                        file_name,
+                    ),
+                )
+                for data_key_scope in files_by_name[file_name]
+            ]
+            list(executor.map(partial(_copy_object, bucket), copies))
+            print(f"adding the results of {len(copies)} data scopes to {file_name}")
 
     # delete temporary workspaces
-    if not is_debug_mode():
-        tmp_results.rmtree()
-        tmp_folder.rmtree()
+    delete_s3_prefixes(bucket, [prefix_tmp_out, tmp_folder.key], n_workers)
 
     return True
+
+
+def compact_output_tables(bucket: str, pipeline_out: str, kf_run_id: str):
+    """Merges the results of the data scopes of this run into one file per result table. The result tables are the
+    files of pipeline_out and the tables in result_tables, whose partitions are not returned by the listing of
+    pipeline_out without a template. The parts of the shared output tables are merged by the compaction pipeline.
+
+    Args:
+        bucket: aws bucket
+        pipeline_out: place of the pipeline output tables
+        kf_run_id: Global ID of the Kubeflow Run, whose results are compacted
+    """
+    s3 = get_s3_resource()
+    table_names = {file.key.rsplit("/", 1)[-1] for file in get_files_in_s3_directory(s3, bucket, pipeline_out)}
+    for table_name in sorted(table_names.union(result_tables).difference(output_tables)):
+        compact_result_table(s3, bucket, pipeline_out + table_name, kf_run_ids=[kf_run_id])
+
+
+def _read_scope_table(bucket: str, table_name: str, key_columns: Optional[List[str]], data_scope: str) -> pd.DataFrame:
+    return read_table(get_s3_resource(), bucket, data_scope + table_name, key_columns)
+
+
+def _copy_object(bucket: str, keys: Tuple[str, str]):
+    source_key, data_key = keys
+    get_s3_client().copy_object(Bucket=bucket, Key=data_key, CopySource={"Bucket": bucket, "Key": source_key})
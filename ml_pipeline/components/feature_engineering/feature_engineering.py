@@ -1,12 +1,20 @@
+import itertools
 import logging
 from typing import List
 
 from kfp.components import func_to_container_op
 from ml_pipeline.components.feature_engineering.steps import (
+    check_params_feature_engineering,
     clustering,
     create_list_of_sequences,
+    load_input_chunks_feature_engineering,
     load_input_data_feature_engineering,
+    sharded_clustering_and_sequences,
+    streaming_clustering_and_sequences,
+    sweep_clustering_and_sequences,
     upload_output_data_feature_engineering,
+    upload_sequence_stream_feature_engineering,
+    upload_sweep_output_data_feature_engineering,
 )
 from ml_pipeline.util.util import timed, pipeline_logging_config
 from ml_pipeline.util.exceptions import NoDataToProcess
@@ -29,6 +37,26 @@ def feature_engineering(run_id: str, config: dict) -> bool:
     """
     # Start Pipeline
     logger.info("Start pipeline step: Feature Engineering")
+    check_params_feature_engineering(config)
+
+    if config["params"]["chunksize"]:
+        # Stream the event history chunk by chunk and upload the sequences incrementally
+        chunks = load_input_chunks_feature_engineering(config)
+        sequences = streaming_clustering_and_sequences(chunks, config)
+
+        # peek at the first sequences, so that a data scope without data leaves no partial output in S3
+        first_sequences = next(sequences, None)
+        if first_sequences is None:
+            raise NoDataToProcess(
+                config["common"]["kf_run_id"],
+                run_id,
+                "feature_engineering",
+                config["bucket"],
+                config["error_logs"],
+                "No sequences of events are available for feature_engineering step",
+            )
+        upload_sequence_stream_feature_engineering(run_id, itertools.chain([first_sequences], sequences), config)
+        return True
 
     # Load Input Data Pipeline Step
     dc_events_hist = load_input_data_feature_engineering(config)
@@ -43,11 +71,21 @@ def feature_engineering(run_id: str, config: dict) -> bool:
             "No sequences of events are available for feature_engineering step",
         )
 
-    # Assign each event to a sequence
-    dc_events_hist = clustering(dc_events_hist, config)
+    if config["params"]["window_configurations"]:
+        # Create the sequences of all window configurations based on one sorted event history
+        dc_by_configuration = sweep_clustering_and_sequences(dc_events_hist, config)
+        upload_sweep_output_data_feature_engineering(run_id, dc_by_configuration, config)
+        return True
+
+    if config["params"]["n_workers"] > 1:
+        # Assign each event to a sequence and create lists of events for each shard of object_a in parallel
+        dc_events_hist = sharded_clustering_and_sequences(dc_events_hist, config)
+    else:
+        # Assign each event to a sequence
+        dc_events_hist = clustering(dc_events_hist, config)
 
-    # Create lists of events for each sequence (=time window)
-    dc_events_hist = create_list_of_sequences(dc_events_hist, config)
+        # Create lists of events for each sequence (=time window)
+        dc_events_hist = create_list_of_sequences(dc_events_hist, config)
 
     # Store Output Pipeline Step
     upload_output_data_feature_engineering(run_id, dc_events_hist, config)
@@ -63,6 +101,7 @@ feature_engineering_op = func_to_container_op(
         "ml_pipeline.components.feature_engineering.feature_engineering",
         "ml_pipeline.components.feature_engineering.steps",
         "ml_pipeline.util.util",
+        "ml_pipeline.util.tables",
         "ml_pipeline.util.s3util",
         "ml_pipeline.util.data_class",
         "ml_pipeline.util.exceptions",
@@ -72,5 +111,6 @@ feature_engineering_op = func_to_container_op(
         "pandas==1.5.3",
         "boto3",
         "cloudpickle",
+        "pyarrow",
     ],
 )
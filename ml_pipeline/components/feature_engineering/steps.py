@@ -1,11 +1,22 @@
-from typing import Dict
+from typing import Dict, Iterator, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import logging
+import numpy as np
 import pandas as pd
 import collections
-import boto3
-
-from ml_pipeline.util.data_class import EventHistory
-from ml_pipeline.util.util import check_columns, load_data_s3, upload_data_s3, timed
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ml_pipeline.util.data_class import EventHistory, EventSequences
+from ml_pipeline.util.s3util import S3MultipartWriter, get_s3_resource
+from ml_pipeline.util.util import (
+    check_columns,
+    load_data_s3,
+    load_data_s3_chunked,
+    upload_data_s3,
+    timed,
+)
 
 logger = logging.getLogger("set_mining")
 
@@ -26,6 +37,118 @@ def load_input_data_feature_engineering(config: Dict) -> EventHistory:
     return dc_data
 
 
+def check_params_feature_engineering(config: Dict):
+    """Rejects combinations of the modes of the feature engineering that exclude each other: the streaming mode
+    (config["params"]["chunksize"]) works on one window configuration in a single process, and the window
+    configuration sweep runs in a single process as well."""
+    params = config["params"]
+    if params["chunksize"] and params["window_configurations"]:
+        raise ValueError("The streaming mode (chunksize) does not support window_configurations")
+    if (params["chunksize"] or params["window_configurations"]) and params["n_workers"] > 1:
+        raise ValueError("n_workers > 1 is only supported without chunksize and window_configurations")
+
+
+def load_input_chunks_feature_engineering(config: Dict) -> Iterator[pd.DataFrame]:
+    """This function streams the preprocessed event history from S3 in chunks of config["params"]["chunksize"]
+    rows instead of loading it at once.
+
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: Iterator over chunks of the event history
+    """
+    s3 = get_s3_resource()
+    return load_data_s3_chunked(
+        s3,
+        config["bucket"],
+        config["dir_pipeline_tmp"] + config["input_data"]["event_history"],
+        int(config["params"]["chunksize"]),
+    )
+
+
+@timed
+def upload_sequence_stream_feature_engineering(
+    run_id: str, sequences: Iterator[Tuple[pd.DataFrame, EventSequences]], config: Dict
+) -> EventHistory:
+    """This function writes the incrementally created sequences straight into a multipart upload to S3, so that
+        the sequences table of the whole data scope is never held in memory at once. The same artifacts as in the
+        in-memory mode are written: the sequences table and, with config["params"]["sequence_format"] = "csr", the
+        integer coded sequences (whose parts are collected in memory, they take 4 bytes per event).
+
+    :param run_id: ID that is unique within a kubeflow run and identifies a run for a specific data scope
+                (=iteration of a for loop)
+    :param sequences: Iterator over Dataframes where each row represents a cluster and their integer coded sequences
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: DataClass containing the kpis of the sequences
+    """
+    dc_event_history = EventHistory(
+        data=None, occurrence_each_event=None, sequences=None, kpis=collections.defaultdict(list)
+    )
+    nr_sequences = 0
+    nr_elements = 0
+    parts_csr = []
+
+    data_key = config["dir_pipeline_tmp"] + config["output_data"]["sequences"]
+    with S3MultipartWriter(config["bucket"], data_key) as file:
+        parquet_writer = None
+        for df_sequences, sequences_csr in sequences:
+            if data_key.endswith(".parquet"):
+                # each chunk becomes a row group of the parquet file
+                table = pa.Table.from_pandas(
+                    df_sequences, schema=parquet_writer.schema if parquet_writer else None, preserve_index=False
+                )
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(file, table.schema, compression="zstd")
+                parquet_writer.write_table(table)
+            else:
+                file.write(df_sequences.to_csv(index=False, header=nr_sequences == 0, sep=",").encode("UTF-8"))
+            if config["params"]["sequence_format"] == "csr":
+                parts_csr.append(sequences_csr)
+            nr_sequences += len(df_sequences)
+            nr_elements += int(df_sequences.nb_items.sum())
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    if parts_csr:
+        upload_data_s3(
+            EventSequences.concat(parts_csr).to_npz(),
+            config["bucket"],
+            config["dir_pipeline_tmp"] + config["output_data"]["sequences_csr"],
+        )
+
+    dc_event_history.kpis["nr_sequences"].append(nr_sequences)
+    dc_event_history.kpis["mean_nr_elements_in_sequences"].append(
+        round(nr_elements / nr_sequences, 2) if nr_sequences else float("nan")
+    )
+
+    return dc_event_history
+
+
+@timed
+def upload_sweep_output_data_feature_engineering(
+    run_id: str, dc_by_configuration: Dict[str, EventHistory], config: Dict
+) -> bool:
+    """This function uploads the sequences of each window configuration under its own prefix and a list of all
+        window configurations, which the set mining loads with load_window_configurations_set_mining to mine each
+        configuration separately.
+
+    :param run_id: ID that is unique within a kubeflow run and identifies a run for a specific data scope
+                (=iteration of a for loop)
+    :param dc_by_configuration: DataClass containing the sequences for each window configuration
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: True, if upload was successfully
+    """
+    # Upload Data for next pipeline step
+    for key, dc_sequences in dc_by_configuration.items():
+        _upload_sequences(dc_sequences, config, config["dir_pipeline_tmp"] + key + "/")
+
+    upload_data_s3(
+        {"window_configurations": config["params"]["window_configurations"], "keys": list(dc_by_configuration)},
+        config["bucket"],
+        config["dir_pipeline_tmp"] + config["output_data"]["window_configurations"],
+    )
+
+    return True
+
+
 @timed
 def upload_output_data_feature_engineering(run_id: str, dc_event_history: EventHistory, config: Dict) -> bool:
     """This function collects kpis of all dataclasses and uploads all processed data to S3 that is needed in
@@ -38,6 +161,7 @@ def upload_output_data_feature_engineering(run_id: str, dc_event_history: EventH
     :return: True, if upload was successfully
     """
     # Upload Data for next pipeline step
+    _upload_sequences(dc_event_history, config, config["dir_pipeline_tmp"])
 
     # Load current tables
 
@@ -48,40 +172,53 @@ def upload_output_data_feature_engineering(run_id: str, dc_event_history: EventH
     return True
 
 
-@timed
-def clustering(dc_events: EventHistory, config: Dict) -> EventHistory:
-    """In this function a 'Rolling Window' procedure is conducted. All events are grouped into a cluster,
-        which appear within a time span (e.g. 60 sec) or KM-span (e.g. 0.05).
-
-    Args:
-        :param dc_events: DataClass containing preprocessed events
-        :param config: Dict with all configurations
+def _upload_sequences(dc_sequences: EventHistory, config: Dict, dir_sequences: str):
+    """Uploads the artifacts of the sequences, which are the same for all modes of the feature engineering: the
+    sequences table (with the comma separated sequences for config["params"]["sequence_format"] = "string") and,
+    for the format "csr", the integer coded sequences."""
+    upload_data_s3(dc_sequences.sequences, config["bucket"], dir_sequences + config["output_data"]["sequences"])
+    if config["params"]["sequence_format"] == "csr":
+        upload_data_s3(
+            dc_sequences.sequences_csr.to_npz(),
+            config["bucket"],
+            dir_sequences + config["output_data"]["sequences_csr"],
+        )
 
-    Returns: DataClass that contains the events with additional information to which cluster each event belongs
 
-    """
-    # Get data from DataClass
-    df = dc_events.data
-    df["snapshot_timestamp_calc"] = pd.to_datetime(df["snapshot_timestamp_calc"])
-    df["message_timestamp"] = pd.to_datetime(df["message_timestamp"])
+def _calculate_diff_previous_event(df_events: pd.DataFrame, clustering_approach: str) -> pd.Series:
+    """Calculates the distance of each event to its predecessor of the same object_a. The first event of each
+        object_a gets a distance of 0.
 
-    # Bring the events in the correct time order and calculate the difference to previous row
-    df_events = df.sort_values(by=["object_a", "snapshot_systemtime_seconds"], ascending=True).reset_index(drop=True)
+    Args:
+        :param df_events: Events sorted by object_a and snapshot_systemtime_seconds
+        :param clustering_approach: 'time' for a distance in seconds, otherwise the distance in km is calculated
 
-    # Check if clustering will done based on time or km
-    if config["params"]["clustering_approach"] == "time":
-        col_for_clustering = "snapshot_timestamp_calc"
-        df_events["diff_previous_event"] = df_events[col_for_clustering].diff().dt.seconds
+    Returns: Series with the distance to the previous event
+    """
+    if clustering_approach == "time":
+        # use the total nanoseconds, since .dt.seconds drops whole days of the time delta
+        diff_previous_event = df_events["snapshot_timestamp_calc"].diff() / pd.Timedelta(seconds=1)
     else:
-        col_for_clustering = "snapshot_mileage_km"
-        df_events["diff_previous_event"] = df_events[col_for_clustering].diff()
+        diff_previous_event = df_events["snapshot_mileage_km"].diff()
 
     # Intercept the case where the previous row is another object_a
-    df_events["prev_object_a"] = df_events["object_a"].shift(1)
-    df_events.loc[df_events["object_a"] != df_events["prev_object_a"], "flag_prev_object_a"] = 1
-    df_events["diff_previous_event"] = df_events["diff_previous_event"].fillna(0)
-    df_events.loc[df_events["flag_prev_object_a"] == 1, "diff_previous_event"] = 0.0
+    flag_prev_object_a = df_events["object_a"].ne(df_events["object_a"].shift(1))
+    diff_previous_event = diff_previous_event.fillna(0)
+    diff_previous_event[flag_prev_object_a] = 0.0
+
+    return diff_previous_event
+
 
+def _assign_clusters_iterrows(df_events: pd.DataFrame, window_length: int) -> Tuple[List[float], List[int]]:
+    """Original rolling window implementation, which iterates over the events of each object_a separately.
+
+    Args:
+        :param df_events: Events sorted by object_a and snapshot_systemtime_seconds incl. the column
+                          'diff_previous_event'
+        :param window_length: Maximal time span (in sec) or KM-span of a cluster
+
+    Returns: Tuple of the cumulative sum of each event within its cluster and the cluster number of each event
+    """
     ls_cumsum = []
     ls_cluster_no = []
     for object_a in df_events["object_a"].unique():
@@ -94,7 +231,7 @@ def clustering(dc_events: EventHistory, config: Dict) -> EventHistory:
 
         # iterate over events
         for _, row in df_event_history.iterrows():
-            if 0 <= cumsum + row["diff_previous_event"] <= int(config["params"]["window_length"]):
+            if 0 <= cumsum + row["diff_previous_event"] <= window_length:
                 cumsum += row["diff_previous_event"]
                 ls_cluster_no.append(lfd_cluster)
             else:
@@ -103,9 +240,101 @@ def clustering(dc_events: EventHistory, config: Dict) -> EventHistory:
                 ls_cluster_no.append(lfd_cluster)
             ls_cumsum.append(cumsum)
 
-    # attach the lists to the data frame
-    df_events["cumsum"] = ls_cumsum
-    df_events["cluster"] = ls_cluster_no
+    return ls_cumsum, ls_cluster_no
+
+
+def _segmented_window_scan(
+    diffs: np.ndarray, segment_start: np.ndarray, window_length: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Single sequential pass over all events, where each object_a is a segment of the scan. The cumulative sum is
+        reset at the beginning of each segment and whenever it leaves the window [0, window_length]. Where the sum
+        is reset depends on the previous resets (and km differences can be negative), so the scan is a plain Python
+        loop over lists instead of a vectorized cumulative sum. It is faster than iterrows, since there is no
+        per-row Series and no per-object DataFrame.
+
+    Args:
+        :param diffs: Distance of each event to its predecessor
+        :param segment_start: Boolean flag that marks the first event of each object_a
+        :param window_length: Maximal time span (in sec) or KM-span of a cluster
+
+    Returns: Tuple of the cumulative sum of each event within its cluster and a flag that marks events that open a
+             new cluster
+    """
+    cumsums = np.empty(len(diffs), dtype="float64")
+    new_cluster = np.zeros(len(diffs), dtype="int64")
+
+    cumsum = 0
+    for i, (diff, is_start) in enumerate(zip(diffs.tolist(), segment_start.tolist())):
+        if is_start:
+            cumsum = 0
+        if 0 <= cumsum + diff <= window_length:
+            cumsum += diff
+        else:
+            cumsum = 0
+            new_cluster[i] = 1
+        cumsums[i] = cumsum
+
+    return cumsums, new_cluster
+
+
+def _assign_clusters_segmented_scan(df_events: pd.DataFrame, window_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling window implementation with a single sequential scan over plain arrays for all objects, the cluster
+        numbers are derived from the resulting flags with a vectorized grouped cumulative sum.
+
+    Args:
+        :param df_events: Events sorted by object_a and snapshot_systemtime_seconds incl. the column
+                          'diff_previous_event'
+        :param window_length: Maximal time span (in sec) or KM-span of a cluster
+
+    Returns: Tuple of the cumulative sum of each event within its cluster and the cluster number of each event
+    """
+    segment_start = df_events["object_a"].ne(df_events["object_a"].shift(1)).to_numpy()
+    cumsums, new_cluster = _segmented_window_scan(
+        df_events["diff_previous_event"].to_numpy(dtype="float64"), segment_start, window_length
+    )
+    cluster_no = pd.Series(new_cluster, index=df_events.index).groupby(df_events["object_a"].to_numpy()).cumsum()
+
+    return cumsums, cluster_no.to_numpy()
+
+
+def _sort_events(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the timestamps and brings the events in the correct time order for the rolling window."""
+    df["snapshot_timestamp_calc"] = pd.to_datetime(df["snapshot_timestamp_calc"])
+    df["message_timestamp"] = pd.to_datetime(df["message_timestamp"])
+
+    return df.sort_values(by=["object_a", "snapshot_systemtime_seconds"], ascending=True).reset_index(drop=True)
+
+
+clustering_engines = {
+    "iterrows": _assign_clusters_iterrows,
+    "segmented_scan": _assign_clusters_segmented_scan,
+}
+
+
+@timed
+def clustering(dc_events: EventHistory, config: Dict) -> EventHistory:
+    """In this function a 'Rolling Window' procedure is conducted. All events are grouped into a cluster,
+        which appear within a time span (e.g. 60 sec) or KM-span (e.g. 0.05). The implementation of the rolling
+        window is selected by config["params"]["clustering_engine"].
+
+    Args:
+        :param dc_events: DataClass containing preprocessed events
+        :param config: Dict with all configurations
+
+    Returns: DataClass that contains the events with additional information to which cluster each event belongs
+
+    """
+    # Get data from DataClass
+    df_events = _sort_events(dc_events.data)
+
+    # Check if clustering will done based on time or km
+    df_events["diff_previous_event"] = _calculate_diff_previous_event(
+        df_events, config["params"]["clustering_approach"]
+    )
+
+    # attach the results of the rolling window to the data frame
+    assign_clusters = clustering_engines[config["params"]["clustering_engine"]]
+    df_events["cumsum"], df_events["cluster"] = assign_clusters(df_events, int(config["params"]["window_length"]))
 
     # Select subset of columns
     df_events = df_events[
@@ -118,6 +347,46 @@ def clustering(dc_events: EventHistory, config: Dict) -> EventHistory:
     return dc_events
 
 
+def _build_sequences(df: pd.DataFrame, config: Dict) -> Tuple[pd.DataFrame, EventSequences]:
+    """Groups the events of each cluster into an integer coded sequence of event ids.
+
+    Args:
+        :param df: Events with cluster information
+        :param config: Dictionary containing the configuration
+
+    Returns: Tuple of a Dataframe where each row represents a cluster and the event sequences of these clusters
+    """
+    # bring the events of each cluster together, the time order within a cluster is kept
+    df = df.sort_values(by=["object_a", "cluster"], kind="stable")
+    codes, vocabulary = pd.factorize(df["event_id"], sort=True, use_na_sentinel=False)
+
+    df_clusters_info = (
+        df.groupby(["object_a", "cluster"], group_keys=False)["event_id"].size().reset_index(name="nb_items")
+    )
+    sequences_csr = EventSequences(
+        vocabulary=np.asarray(vocabulary),
+        offsets=np.concatenate([[0], np.cumsum(df_clusters_info["nb_items"].to_numpy())]).astype("int64"),
+        values=codes.astype("int32"),
+    )
+
+    # Filter out sequences/clusters with only one element
+    if not config["params"]["process_seq_containing_only_one_event"]:
+        flag_keep = (df_clusters_info.nb_items > 1).to_numpy()
+        sequences = df_clusters_info.loc[flag_keep].copy()
+        sequences_csr = sequences_csr.take(np.flatnonzero(flag_keep))
+    else:
+        sequences = df_clusters_info
+
+    return sequences, sequences_csr
+
+
+def _format_sequences(sequences: pd.DataFrame, sequences_csr: EventSequences, config: Dict) -> pd.DataFrame:
+    """Adds the comma separated sequences to the sequences table for config["params"]["sequence_format"] = "string"."""
+    if config["params"]["sequence_format"] == "string":
+        sequences.insert(2, "sequence", sequences_csr.to_strings())
+    return sequences
+
+
 @timed
 def create_list_of_sequences(dc_data: EventHistory, config: Dict) -> EventHistory:
     """This functions transforms the DataFrame into a list of lists of events based on the cluster information.
@@ -131,27 +400,181 @@ def create_list_of_sequences(dc_data: EventHistory, config: Dict) -> EventHistor
     # Get data from DataClass
     df = dc_data.data
 
-    # group events of the same cluster into a list
-    df_clusters = df.groupby(["object_a", "cluster"], group_keys=False)["id"].apply(list).reset_index(name="sequence")
-
-    df_clusters_info = df.groupby(["object_a", "cluster"], group_keys=False)["id"].size().reset_index(name="nb_items")
-
-    # Merge data
-    df_clusters_merged = df_clusters.merge(df_clusters_info, how="left", on=["object_a", "cluster"])
-
-    # Filter out sequences/clusters with only one element
-    if not config["params"]["process_seq_containing_only_one_event"]:
-        sequences = df_clusters_merged.copy()
-        sequences = sequences.loc[df_clusters_merged.nb_items > 1]
-    else:
-        sequences = df_clusters_merged
+    sequences, sequences_csr = _build_sequences(df, config)
 
-    # Type Conversion
-    sequences["sequence"] = [",".join(map(str, l)) for l in sequences["sequence"]]
+    # Type Conversion, the comma separated sequence is derived from the integer coded sequences
+    sequences = _format_sequences(sequences, sequences_csr, config)
 
     # Update data from DataClass
     dc_data.sequences = sequences
+    dc_data.sequences_csr = sequences_csr
     dc_data.kpis["nr_sequences"].append(len(sequences))
     dc_data.kpis["mean_nr_elements_in_sequences"].append(round(sequences.nb_items.mean(), 2))
 
     return dc_data
+
+
+def get_window_configuration_key(window_configuration: Dict) -> str:
+    """Name of a window configuration, which is used as S3 prefix for its sequences, e.g. 'time_60'."""
+    return f"{window_configuration['clustering_approach']}_{window_configuration['window_length']}"
+
+
+@timed
+def sweep_clustering_and_sequences(dc_events: EventHistory, config: Dict) -> Dict[str, EventHistory]:
+    """Creates the sequences for every window configuration in config["params"]["window_configurations"] (list of
+        dicts with the keys 'clustering_approach' and 'window_length') in one pass. The events are sorted and the
+        distances in time and km are calculated only once for all configurations.
+
+    Args:
+        :param dc_events: DataClass containing preprocessed events
+        :param config: Dict with all configurations
+
+    Returns: Dictionary with a DataClass containing the sequences for each window configuration
+    """
+    # Get data from DataClass
+    df_events = _sort_events(dc_events.data)
+    window_configurations = config["params"]["window_configurations"]
+
+    # Calculate the difference to the previous row once for each clustering approach
+    diffs = {
+        clustering_approach: _calculate_diff_previous_event(df_events, clustering_approach)
+        for clustering_approach in {wc["clustering_approach"] for wc in window_configurations}
+    }
+
+    assign_clusters = clustering_engines[config["params"]["clustering_engine"]]
+    dc_by_configuration = {}
+    for window_configuration in window_configurations:
+        df_events["diff_previous_event"] = diffs[window_configuration["clustering_approach"]]
+        _, cluster_no = assign_clusters(df_events, int(window_configuration["window_length"]))
+
+        df_clusters = pd.DataFrame(
+            {"object_a": df_events["object_a"], "event_id": df_events["event_id"], "cluster": cluster_no}
+        )
+        sequences, sequences_csr = _build_sequences(df_clusters, config)
+        sequences = _format_sequences(sequences, sequences_csr, config)
+
+        dc_sequences = EventHistory(
+            data=None,
+            occurrence_each_event=None,
+            sequences=sequences,
+            kpis=collections.defaultdict(list),
+            sequences_csr=sequences_csr,
+        )
+        dc_sequences.kpis["nr_sequences"].append(len(sequences))
+        dc_sequences.kpis["mean_nr_elements_in_sequences"].append(round(sequences.nb_items.mean(), 2))
+        dc_by_configuration[get_window_configuration_key(window_configuration)] = dc_sequences
+
+    return dc_by_configuration
+
+
+def _clustering_and_sequences(dc_events: EventHistory, config: Dict) -> EventHistory:
+    """Runs clustering and create_list_of_sequences for one shard of the event history. The function is defined
+    on module level, so that it can be sent to the worker processes."""
+    dc_events = clustering(dc_events, config)
+    return create_list_of_sequences(dc_events, config)
+
+
+@timed
+def sharded_clustering_and_sequences(dc_events: EventHistory, config: Dict) -> EventHistory:
+    """The events of each object_a are independent of all other object_a. This function hash-partitions the event
+        history by object_a into one shard per worker, runs clustering and create_list_of_sequences for all shards
+        in a process pool and merges the results in a deterministic order.
+
+    Args:
+        :param dc_events: DataClass containing preprocessed events
+        :param config: Dict with all configurations, config["params"]["n_workers"] defines the size of the pool
+
+    Returns: DataClass containing the clustered events and a Dataframe where each row represents a cluster
+    """
+    # Get data from DataClass
+    df = dc_events.data
+    n_workers = int(config["params"]["n_workers"])
+
+    # Assign each object_a to a shard
+    shard_no = pd.util.hash_pandas_object(df["object_a"], index=False).to_numpy() % n_workers
+    shards = [
+        EventHistory(
+            data=df.loc[shard_no == i].reset_index(drop=True),
+            occurrence_each_event=None,
+            sequences=None,
+            kpis=collections.defaultdict(list),
+        )
+        for i in range(n_workers)
+        if (shard_no == i).any()
+    ]
+
+    # Process shards in parallel
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        results = list(executor.map(_clustering_and_sequences, shards, repeat(config)))
+
+    # Merge shards in the order of object_a, the time order within each object_a is kept by the stable sort
+    df_events = pd.concat([result.data for result in results], ignore_index=True)
+    df_events = df_events.sort_values(by=["object_a"], kind="stable").reset_index(drop=True)
+    sequences = pd.concat([result.sequences for result in results], ignore_index=True)
+    sequences = sequences.sort_values(by=["object_a", "cluster"])
+    sequences_csr = EventSequences.concat([result.sequences_csr for result in results]).take(sequences.index)
+    sequences = sequences.reset_index(drop=True)
+
+    # Update data from DataClass
+    dc_events.data = df_events
+    dc_events.sequences = sequences
+    dc_events.sequences_csr = sequences_csr
+    dc_events.kpis["nr_sequences"].append(len(sequences))
+    dc_events.kpis["mean_nr_elements_in_sequences"].append(round(sequences.nb_items.mean(), 2))
+
+    return dc_events
+
+
+def streaming_clustering_and_sequences(
+    chunks: Iterator[pd.DataFrame], config: Dict
+) -> Iterator[Tuple[pd.DataFrame, EventSequences]]:
+    """Out-of-core version of clustering and create_list_of_sequences. The event history has to be sorted by
+        object_a and snapshot_systemtime_seconds, which is the case for the output of the preprocessing step.
+        The events of the last (still open) cluster of each chunk are carried over to the next chunk together with
+        their cluster number, so the rolling window continues exactly where it stopped. Sequences of all closed
+        clusters are emitted right away, so the peak memory is bounded by the chunk size.
+
+    Args:
+        :param chunks: Event history in chunks of rows, e.g. from load_input_chunks_feature_engineering
+        :param config: Dict with all configurations
+
+    Returns: Iterator over Dataframes where each row represents a cluster, together with their integer coded
+             sequences
+    """
+    carry = None
+    carry_cluster_no = 0
+
+    for chunk in chunks:
+        chunk["snapshot_timestamp_calc"] = pd.to_datetime(chunk["snapshot_timestamp_calc"])
+        df_events = pd.concat([carry, chunk], ignore_index=True) if carry is not None else chunk
+        df_events = df_events.sort_values(by=["object_a", "snapshot_systemtime_seconds"], kind="stable")
+        df_events = df_events.reset_index(drop=True)
+        if carry is not None and df_events["object_a"].iat[0] != carry["object_a"].iat[0]:
+            raise ValueError("The event history has to be sorted by object_a for the streaming mode")
+
+        # Apply the rolling window, the carried over cluster keeps its cluster number
+        df_events["diff_previous_event"] = _calculate_diff_previous_event(
+            df_events, config["params"]["clustering_approach"]
+        )
+        _, cluster_no = _assign_clusters_segmented_scan(df_events, int(config["params"]["window_length"]))
+        if carry is not None:
+            cluster_no[df_events["object_a"].to_numpy() == carry["object_a"].iat[0]] += carry_cluster_no
+        df_events["cluster"] = cluster_no
+
+        # The last cluster could be continued by the next chunk
+        flag_open = (df_events["object_a"] == df_events["object_a"].iat[-1]) & (
+            df_events["cluster"] == df_events["cluster"].iat[-1]
+        )
+        carry = df_events.loc[flag_open].drop(columns=["diff_previous_event", "cluster"])
+        carry_cluster_no = int(df_events["cluster"].iat[-1])
+
+        sequences, sequences_csr = _build_sequences(df_events.loc[~flag_open], config)
+        if len(sequences):
+            yield _format_sequences(sequences, sequences_csr, config), sequences_csr
+
+    # Close the last cluster
+    if carry is not None:
+        carry["cluster"] = carry_cluster_no
+        sequences, sequences_csr = _build_sequences(carry, config)
+        if len(sequences):
+            yield _format_sequences(sequences, sequences_csr, config), sequences_csr
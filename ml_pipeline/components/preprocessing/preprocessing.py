@@ -72,6 +72,8 @@ preprocessing_op = func_to_container_op(
         "ml_pipeline.components.preprocessing.preprocessing",
         "ml_pipeline.components.preprocessing.steps",
         "ml_pipeline.util.util",
+        "ml_pipeline.util.s3util",
+        "ml_pipeline.util.tables",
         "ml_pipeline.util.data_class",
         "ml_pipeline.util.exceptions",
     ],
@@ -80,5 +82,6 @@ preprocessing_op = func_to_container_op(
         "pandas",
         "boto3",
         "cloudpickle",
+        "pyarrow",
     ],
 )
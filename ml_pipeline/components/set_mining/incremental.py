@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.components.set_mining.miners import (
+    _mine_eclat,
+    _to_frame,
+    _from_codes,
+    deduplicate_sequences,
+    is_frequent,
+    itemset_support_counts,
+)
+from ml_pipeline.util.data_class import EventSequences, ItemsetState
+
+
+def build_itemset_state(sequences: EventSequences, min_support: float) -> ItemsetState:
+    """Mines the frequent itemsets of the sequences and counts their negative border, i.e. the infrequent itemsets
+    whose subsets are all frequent.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+        min_support: Minimal support of the frequent itemsets
+
+    Returns: State holding the counts of the frequent itemsets and the negative border
+    """
+    sequences, weights = deduplicate_sequences(sequences)
+    itemsets, supports = _mine_eclat(sequences, min_support, weights)
+    frequent = [tuple(sorted(itemset)) for itemset in itemsets]
+    counts_frequent = np.rint(supports * weights.sum()).astype("int64")
+
+    border = _candidates(frequent, len(sequences.vocabulary))
+    border_itemsets = _from_codes(border, sequences.vocabulary)
+    counts_border = itemset_support_counts(border_itemsets, sequences, weights)
+
+    return ItemsetState(
+        sequences=sequences,
+        weights=weights,
+        itemsets=_from_codes(frequent + border, sequences.vocabulary),
+        counts=np.concatenate([counts_frequent, counts_border]),
+        min_support=min_support,
+    )
+
+
+def update_itemset_state(
+    itemset_state: Optional[ItemsetState], sequences: EventSequences, min_support: float
+) -> Tuple[ItemsetState, Dict[str, int]]:
+    """Updates the state of the previous run with the sequences of the current run (FUP with negative border).
+
+    Only the difference between the previous and the current multiset of sequences, i.e. the added and the expired
+    sequences, is counted against the frequent itemsets and the negative border. Every itemset that is frequent now
+    but was not counted before has a subset in the negative border, which is frequent now as well. So as long as no
+    itemset of the negative border becomes frequent, the frequent itemsets are the counted itemsets above the
+    threshold, otherwise the sequences are mined again.
+
+    Args:
+        itemset_state: State of the previous run, None on the first run
+        sequences: Integer coded sequences (=transactions) of the current run
+        min_support: Minimal support of the frequent itemsets, the state is rebuilt if it differs from the state's
+
+    Returns: Tuple of the state for the current run and kpis of the update ('nb_added_sequences',
+             'nb_expired_sequences' and 'full_remining')
+    """
+    if itemset_state is None or itemset_state.min_support != min_support:
+        itemset_state_new = build_itemset_state(sequences, min_support)
+        kpis = {"nb_added_sequences": itemset_state_new.nb_transactions, "nb_expired_sequences": 0}
+        return itemset_state_new, {**kpis, "full_remining": True}
+
+    # previous and current sequences in one vocabulary
+    sequences_unique, weights = deduplicate_sequences(sequences)
+    vocabulary = np.union1d(itemset_state.sequences.vocabulary, sequences_unique.vocabulary)
+    sequences_previous = _recode(itemset_state.sequences, vocabulary)
+    itemsets = _recode(itemset_state.itemsets, vocabulary)
+    sequences_unique = _recode(sequences_unique, vocabulary)
+
+    # added (positive weight) and expired (negative weight) sequences
+    weights_delta = (
+        pd.Series(weights, index=_keys(sequences_unique))
+        .sub(pd.Series(itemset_state.weights, index=_keys(sequences_previous)), fill_value=0)
+        .astype("int64")
+    )
+    weights_delta = weights_delta[weights_delta != 0]
+    sequences_delta = _from_keys(weights_delta.index.tolist(), vocabulary)
+    weights_delta = weights_delta.to_numpy()
+    kpis = {
+        "nb_added_sequences": int(weights_delta[weights_delta > 0].sum()),
+        "nb_expired_sequences": int(-weights_delta[weights_delta < 0].sum()),
+    }
+
+    # events that are new in this run are part of the negative border
+    new_events = np.flatnonzero(~np.isin(vocabulary, itemset_state.sequences.vocabulary))
+    itemsets = EventSequences.concat([itemsets, _from_codes([(event,) for event in new_events], vocabulary)])
+    counts_previous = np.concatenate([itemset_state.counts, np.zeros(len(new_events), dtype="int64")])
+    counts = counts_previous + itemset_support_counts(itemsets, sequences_delta, weights_delta)
+
+    lengths = itemsets.lengths
+    frequent_previous = is_frequent(counts_previous, lengths, min_support, itemset_state.nb_transactions)
+    frequent = is_frequent(counts, lengths, min_support, int(weights.sum()))
+    if (frequent & ~frequent_previous).any():
+        # the negative border is crossed, itemsets that were not counted could be frequent now
+        return build_itemset_state(sequences, min_support), {**kpis, "full_remining": True}
+
+    # the new negative border are the infrequent itemsets whose immediate subsets are all still frequent
+    itemset_codes = [tuple(itemset) for itemset in _to_codes(itemsets)]
+    frequent_codes = {itemset for itemset, flag in zip(itemset_codes, frequent) if flag}
+    keep = frequent.copy()
+    for i, itemset in enumerate(itemset_codes):
+        if not frequent[i]:
+            keep[i] = len(itemset) == 1 or all(
+                itemset[:j] + itemset[j + 1 :] in frequent_codes for j in range(len(itemset))
+            )
+    itemsets_kept = [itemset for itemset, flag in zip(itemset_codes, keep) if flag]
+
+    itemset_state_new = ItemsetState(
+        sequences=sequences_unique,
+        weights=weights,
+        itemsets=_from_codes(itemsets_kept, vocabulary),
+        counts=counts[keep],
+        min_support=min_support,
+    )
+    return itemset_state_new, {**kpis, "full_remining": False}
+
+
+def frequent_itemsets_from_state(itemset_state: ItemsetState) -> pd.DataFrame:
+    """Frequent itemsets of the state in the same format and order as mine_frequent_itemsets."""
+    n = itemset_state.nb_transactions
+    frequent = is_frequent(itemset_state.counts, itemset_state.itemsets.lengths, itemset_state.min_support, n)
+    itemsets = [frozenset(itemset) for itemset, flag in zip(_to_codes(itemset_state.itemsets), frequent) if flag]
+
+    return _to_frame(itemset_state.sequences, itemsets, itemset_state.counts[frequent] / n)
+
+
+def _candidates(frequent: List[tuple], n_items: int) -> List[tuple]:
+    """Negative border of the frequent itemsets (sorted tuples of event codes): all infrequent single events and the
+    infrequent joins of two frequent itemsets with the same prefix whose subsets are all frequent (apriori-gen)."""
+    frequent_set = set(frequent)
+    border = [(item,) for item in range(n_items) if (item,) not in frequent_set]
+
+    by_prefix = {}
+    for itemset in sorted(frequent):
+        by_prefix.setdefault(itemset[:-1], []).append(itemset[-1])
+    for prefix, lasts in by_prefix.items():
+        for i, first in enumerate(lasts):
+            for second in lasts[i + 1 :]:
+                candidate = prefix + (first, second)
+                if candidate in frequent_set:
+                    continue
+                if all(candidate[:j] + candidate[j + 1 :] in frequent_set for j in range(len(candidate) - 2)):
+                    border.append(candidate)
+
+    return border
+
+
+def _recode(sequences: EventSequences, vocabulary: np.ndarray) -> EventSequences:
+    """Sequences with the codes of a sorted vocabulary that contains the vocabulary of the sequences"""
+    codes = np.searchsorted(vocabulary, sequences.vocabulary).astype("int32")
+    return EventSequences(vocabulary=vocabulary, offsets=sequences.offsets, values=codes[sequences.values])
+
+
+def _keys(sequences: EventSequences) -> List[bytes]:
+    raw = sequences.values.astype("int32").tobytes()
+    return [
+        raw[start * 4 : end * 4] for start, end in zip(sequences.offsets[:-1].tolist(), sequences.offsets[1:].tolist())
+    ]
+
+
+def _from_keys(keys: List[bytes], vocabulary: np.ndarray) -> EventSequences:
+    lengths = [len(key) // 4 for key in keys]
+    return EventSequences(
+        vocabulary=vocabulary,
+        offsets=np.concatenate([[0], np.cumsum(lengths, dtype="int64")]).astype("int64"),
+        values=np.frombuffer(b"".join(keys), dtype="int32").copy(),
+    )
+
+
+def _to_codes(itemsets: EventSequences) -> List[list]:
+    values = itemsets.values.tolist()
+    return [values[start:end] for start, end in zip(itemsets.offsets[:-1].tolist(), itemsets.offsets[1:].tolist())]
@@ -0,0 +1,97 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+KNOWN = "known"
+SUPERSET_OF_KNOWN = "superset_of_known"
+NOVEL = "novel"
+
+
+def _split_events(values: pd.Series) -> pd.Series:
+    """comma separated event ids -> one row per event id (as string), the index refers to the row of values"""
+    events = values.astype(str).str.split(",").explode().str.strip()
+    return events[events.notna() & (events != "") & (events != "nan")]
+
+
+def _bitmasks(rows: np.ndarray, codes: np.ndarray, nb_rows: int, nb_words: int) -> np.ndarray:
+    """One bitmask of uint64 words per row, where bit code is set for each (row, code) pair"""
+    masks = np.zeros((nb_rows, nb_words), dtype="uint64")
+    np.bitwise_or.at(masks, (rows, codes >> 6), np.left_shift(np.uint64(1), (codes & 63).astype("uint64")))
+    return masks
+
+
+def match_known_patterns(
+    itemsets: List[list], df_known_patterns: pd.DataFrame, exclusion_columns: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Classifies itemsets against known patterns. The events of a known pattern are the events of 'event_pattern'
+    and its 'trigger', the events in the exclusion columns must not occur together with the pattern. An itemset is
+
+    - known: if it consists of exactly the events of a known pattern
+    - superset_of_known: if it contains all events of a known pattern and more, but none of its excluded events
+    - novel: otherwise
+
+    An inverted index from event to known patterns yields the pairs of itemsets and known patterns that share an
+    event, and the containment of each pair is checked at once on bitmasks of the events.
+
+    Args:
+        itemsets: Event ids of each itemset
+        df_known_patterns: Known patterns with the columns 'event_pattern', 'trigger' and exclusion_columns, each
+                           holding comma separated event ids
+        exclusion_columns: Columns of df_known_patterns with events that exclude the pattern
+
+    Returns: Tuple of the class of each itemset and the position in df_known_patterns of the matched pattern (-1 for
+             novel itemsets)
+    """
+    df_known_patterns = df_known_patterns.reset_index(drop=True)
+    pattern_events = pd.concat([_split_events(df_known_patterns[column]) for column in ["event_pattern", "trigger"]])
+    excluded_events = pd.concat(
+        [pd.Series([], dtype=object)] + [_split_events(df_known_patterns[column]) for column in exclusion_columns]
+    )
+    itemset_events = pd.Series(itemsets, dtype=object).explode().dropna().astype(str)
+
+    # codes of all events that are part of a known pattern
+    vocabulary = np.unique(np.concatenate([pattern_events.to_numpy(str), excluded_events.to_numpy(str)]))
+    nb_words = max(1, (len(vocabulary) + 63) // 64)
+    nb_patterns = len(df_known_patterns)
+
+    def encode(events: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        positions = np.searchsorted(vocabulary, events.to_numpy(str))
+        known_event = positions < len(vocabulary)
+        known_event[known_event] = vocabulary[positions[known_event]] == events.to_numpy(str)[known_event]
+        return events.index.to_numpy()[known_event], positions[known_event]
+
+    pattern_rows, pattern_codes = encode(pattern_events)
+    excluded_rows, excluded_codes = encode(excluded_events)
+    itemset_rows, itemset_codes = encode(itemset_events)
+    masks_pattern = _bitmasks(pattern_rows, pattern_codes, nb_patterns, nb_words)
+    masks_excluded = _bitmasks(excluded_rows, excluded_codes, nb_patterns, nb_words)
+    masks_itemset = _bitmasks(itemset_rows, itemset_codes, len(itemsets), nb_words)
+    # itemsets with events that are not part of any pattern can only be supersets
+    nb_other_events = np.bincount(itemset_events.index.to_numpy(), minlength=len(itemsets)) - np.bincount(
+        itemset_rows, minlength=len(itemsets)
+    )
+
+    # inverted index: pairs of itemsets and known patterns sharing at least one event
+    pairs = (
+        pd.DataFrame({"itemset": itemset_rows, "code": itemset_codes})
+        .merge(pd.DataFrame({"pattern": pattern_rows, "code": pattern_codes}), on="code")
+        .drop_duplicates(subset=["itemset", "pattern"])
+    )
+    pair_itemsets, pair_patterns = pairs["itemset"].to_numpy(), pairs["pattern"].to_numpy()
+
+    masks_pair_itemset = masks_itemset[pair_itemsets]
+    masks_pair_pattern = masks_pattern[pair_patterns]
+    contains = ~(masks_pair_pattern & ~masks_pair_itemset).any(axis=1)
+    not_excluded = ~(masks_excluded[pair_patterns] & masks_pair_itemset).any(axis=1)
+    equal = (masks_pair_pattern == masks_pair_itemset).all(axis=1) & (nb_other_events[pair_itemsets] == 0)
+
+    # known before superset_of_known, the first matching pattern is reported
+    classes = np.full(len(itemsets), NOVEL, dtype=object)
+    matched_patterns = np.full(len(itemsets), -1, dtype="int64")
+    for flag, label in [(contains & not_excluded & ~equal, SUPERSET_OF_KNOWN), (contains & equal, KNOWN)]:
+        matched = pd.Series(pair_patterns[flag]).groupby(pair_itemsets[flag]).min()
+        classes[matched.index.to_numpy()] = label
+        matched_patterns[matched.index.to_numpy()] = matched.to_numpy()
+
+    return classes, matched_patterns
@@ -0,0 +1,626 @@
+import heapq
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import fpgrowth
+
+from ml_pipeline.util.data_class import EventSequences
+
+# number of set bits for each possible byte
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype="uint8")
+
+# number of bits that are unpacked at once for weighted support counts (one byte each, 8 bytes in the product)
+_UNPACK_BLOCK_BITS = 2**23
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits along the last axis of a packed bitset array."""
+    return _POPCOUNT_TABLE[bits].sum(axis=-1, dtype="int64")
+
+
+def support_counts(bits: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Support count of bitsets, where each sequence is counted with its weight (=multiplicity) if given. The
+    weighted count unpacks the bitsets into one byte per bit, so it is done in blocks of bytes along the last axis:
+    the working set is bounded by _UNPACK_BLOCK_BITS bytes of unpacked bits and 8 times that for their product with
+    the int64 weights, independent of the number of sequences."""
+    if weights is None:
+        return popcount(bits)
+    counts = np.zeros(bits.shape[:-1], dtype="int64")
+    nb_bitsets = max(1, int(np.prod(bits.shape[:-1])))
+    block = max(1, _UNPACK_BLOCK_BITS // (8 * nb_bitsets))
+    for start in range(0, bits.shape[-1], block):
+        weights_block = weights[8 * start : 8 * (start + block)]
+        counts += np.unpackbits(bits[..., start : start + block], axis=-1, count=len(weights_block)) @ weights_block
+    return counts
+
+
+def deduplicate_sequences(sequences: EventSequences) -> Tuple[EventSequences, np.ndarray]:
+    """Collapses sequences with the same set of events into one sequence, the order and repetitions of events
+    within a sequence are irrelevant for set mining.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+
+    Returns: Tuple of the unique sequences (events in ascending order) and the number of occurrences of each
+    """
+    rows = np.repeat(np.arange(len(sequences)), sequences.lengths)
+
+    # sort the events within each sequence and drop repeated events
+    order = np.lexsort((sequences.values, rows))
+    rows, values = rows[order], sequences.values[order]
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (values[1:] != values[:-1])
+    rows, values = rows[first], values[first]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(sequences)))]).astype("int64")
+
+    # identify equal sets by their bytes
+    raw = values.astype("int32").tobytes()
+    keys = [raw[start * 4 : end * 4] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    codes, uniques = pd.factorize(pd.Series(keys, dtype=object), sort=False)
+    weights = np.bincount(codes, minlength=len(uniques)).astype("int64")
+    representatives = np.unique(codes, return_index=True)[1]
+
+    sequences_unique = EventSequences(vocabulary=sequences.vocabulary, offsets=offsets, values=values)
+    return sequences_unique.take(representatives), weights
+
+
+def item_bitsets(sequences: EventSequences) -> np.ndarray:
+    """Vertical layout of the sequences: one packed bitset per event of the vocabulary, where bit i is set if the
+    event is part of sequence i. Events occurring several times within a sequence are counted once."""
+    n_bytes = (len(sequences) + 7) // 8
+    rows = np.repeat(np.arange(len(sequences)), sequences.lengths)
+    bits = np.zeros((len(sequences.vocabulary), n_bytes), dtype="uint8")
+    np.bitwise_or.at(bits, (sequences.values, rows >> 3), (128 >> (rows & 7)).astype("uint8"))
+    return bits
+
+
+def itemset_support_counts(
+    itemsets: EventSequences, sequences: EventSequences, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Weighted support counts of the itemsets in the sequences, both in the same vocabulary. The bitsets of the
+    events are intersected for batches of itemsets of the same length at once."""
+    bits = item_bitsets(sequences)
+    counts = np.zeros(len(itemsets), dtype="int64")
+    lengths = itemsets.lengths
+    for length in np.unique(lengths).tolist():
+        rows = np.flatnonzero(lengths == length)
+        # about 64 MiB of gathered bitsets per batch
+        batch_size = max(1, 2**26 // max(1, length * bits.shape[1]))
+        for start in range(0, len(rows), batch_size):
+            rows_batch = rows[start : start + batch_size]
+            codes = itemsets.values[itemsets.offsets[rows_batch][:, None] + np.arange(length)]
+            counts[rows_batch] = support_counts(np.bitwise_and.reduce(bits[codes], axis=1), weights)
+    return counts
+
+
+def _mine_fpgrowth(
+    sequences: EventSequences, min_support: float, weights: Optional[np.ndarray] = None
+) -> Tuple[List[frozenset], np.ndarray]:
+    """mlxtend fpgrowth on the one-hot encoded sequences, the columns of the one-hot matrix are the event codes.
+    fpgrowth has no notion of weights, weighted sequences are mined by the eclat backend (see get_miner_backend)."""
+    if weights is not None:
+        raise ValueError("The fpgrowth backend does not support weighted sequences, use the eclat backend.")
+    frequent_itemsets = fpgrowth(sequences.to_onehot(codes=True), min_support=min_support, use_colnames=True)
+    return frequent_itemsets["itemsets"].tolist(), frequent_itemsets["support"].to_numpy()
+
+
+def _mine_eclat(
+    sequences: EventSequences, min_support: float, weights: Optional[np.ndarray] = None
+) -> Tuple[List[frozenset], np.ndarray]:
+    """Depth first search over the vertical bitset layout of the sequences. The support of an extended itemset is
+    the (weighted) popcount of the intersection of the bitsets, all extensions of a prefix are intersected at once."""
+    n = len(sequences) if weights is None else int(weights.sum())
+    bits = item_bitsets(sequences)
+    counts = support_counts(bits, weights)
+
+    # same thresholds as mlxtend: support of single events as fraction, support of longer itemsets as count
+    items = np.flatnonzero(counts / float(n) >= min_support)
+    items = items[np.argsort(counts[items], kind="stable")]
+    min_count = math.ceil(min_support * n)
+
+    itemsets = []
+    itemset_counts = []
+
+    def extend(prefix: tuple, items: np.ndarray, bits: np.ndarray, counts: np.ndarray):
+        for i, item in enumerate(items.tolist()):
+            itemset = prefix + (item,)
+            itemsets.append(frozenset(itemset))
+            itemset_counts.append(counts[i])
+            if i + 1 == len(items):
+                break
+            bits_extended = bits[i + 1 :] & bits[i]
+            counts_extended = support_counts(bits_extended, weights)
+            frequent = counts_extended >= min_count
+            if frequent.any():
+                extend(itemset, items[i + 1 :][frequent], bits_extended[frequent], counts_extended[frequent])
+
+    extend((), items, bits[items], counts[items])
+    return itemsets, np.asarray(itemset_counts, dtype="int64") / n
+
+
+miner_backends: Dict[str, Callable[..., Tuple[List[frozenset], np.ndarray]]] = {
+    "fpgrowth": _mine_fpgrowth,
+    "eclat": _mine_eclat,
+}
+
+# backends that count the support of weighted sequences, e.g. deduplicated sequences
+weighted_miner_backends = {"eclat"}
+
+
+def get_miner_backend(backend: str, weights: Optional[np.ndarray] = None) -> str:
+    """Backend that mines the sequences. Weighted sequences are mined by the bitset miner if the backend does not
+    support weights, since repeating every sequence by its weight would undo the deduplication."""
+    if weights is not None and backend not in weighted_miner_backends:
+        return "eclat"
+    return backend
+
+
+def mine_frequent_itemsets(
+    sequences: EventSequences,
+    min_support: float,
+    backend: str = "fpgrowth",
+    weights: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """Mines all itemsets with a support of at least min_support with the given backend.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+        min_support: Minimal support of the returned itemsets
+        backend: Name of the miner in miner_backends, weighted sequences are mined by a backend supporting weights
+        weights: Number of occurrences of each sequence, e.g. from deduplicate_sequences
+
+    Returns: DataFrame with the columns 'support' and 'itemsets' (frozenset of event ids) in the same format as
+             mlxtend's fpgrowth. The itemsets are ordered by descending support, length and event codes, so all
+             backends return the same frame.
+    """
+    _check_min_support(min_support)
+    itemsets, supports = miner_backends[get_miner_backend(backend, weights)](sequences, min_support, weights)
+
+    return _to_frame(sequences, itemsets, supports)
+
+
+def filter_frequent_itemsets(frequent_itemsets: pd.DataFrame, min_support: float, n: int) -> pd.DataFrame:
+    """Itemsets of a mining result that are frequent for a higher min_support, with the same thresholds as mlxtend.
+    The result equals mining with min_support directly, as all subsets of a frequent itemset are frequent.
+
+    Args:
+        frequent_itemsets: Result of mine_frequent_itemsets with a min_support lower than or equal to min_support
+        min_support: Minimal support of the returned itemsets
+        n: Number of (weighted) sequences the itemsets were mined from
+
+    Returns: DataFrame with the columns 'support' and 'itemsets' in the same order as frequent_itemsets
+    """
+    _check_min_support(min_support)
+    counts = np.rint(frequent_itemsets["support"].to_numpy() * n)
+    lengths = frequent_itemsets["itemsets"].map(len).to_numpy()
+    frequent = is_frequent(counts, lengths, min_support, n)
+
+    return frequent_itemsets[frequent].reset_index(drop=True)
+
+
+def filter_closed_itemsets(frequent_itemsets: pd.DataFrame) -> pd.DataFrame:
+    """Keeps the closed itemsets, i.e. the itemsets without a superset of the same support. As the frequent itemsets
+    contain all subsets of a frequent itemset, it is enough to compare each itemset with the itemsets that are one
+    event shorter: they are looked up in a hash index keyed on itemset and support.
+
+    Args:
+        frequent_itemsets: DataFrame with the columns 'support' and 'itemsets' (frozensets), e.g. from
+                           mine_frequent_itemsets
+
+    Returns: The closed itemsets in the order of frequent_itemsets
+    """
+    itemsets = frequent_itemsets["itemsets"].tolist()
+    supports = frequent_itemsets["support"].tolist()
+    index = {(itemset, support): i for i, (itemset, support) in enumerate(zip(itemsets, supports))}
+
+    closed = np.ones(len(itemsets), dtype=bool)
+    for itemset, support in zip(itemsets, supports):
+        if len(itemset) > 1:
+            for item in itemset:
+                i = index.get((itemset - {item}, support))
+                if i is not None:
+                    closed[i] = False
+
+    return frequent_itemsets[closed].reset_index(drop=True)
+
+
+def filter_maximal_itemsets(frequent_itemsets: pd.DataFrame) -> pd.DataFrame:
+    """Keeps the maximal itemsets, i.e. the itemsets without a frequent superset. Like in filter_closed_itemsets,
+    only the itemsets that are one event shorter than a frequent itemset need to be marked.
+
+    Args:
+        frequent_itemsets: DataFrame with the columns 'support' and 'itemsets' (frozensets), e.g. from
+                           mine_frequent_itemsets
+
+    Returns: The maximal itemsets in the order of frequent_itemsets
+    """
+    itemsets = frequent_itemsets["itemsets"].tolist()
+    index = {itemset: i for i, itemset in enumerate(itemsets)}
+
+    maximal = np.ones(len(itemsets), dtype=bool)
+    for itemset in itemsets:
+        if len(itemset) > 1:
+            for item in itemset:
+                i = index.get(itemset - {item})
+                if i is not None:
+                    maximal[i] = False
+
+    return frequent_itemsets[maximal].reset_index(drop=True)
+
+
+itemset_filters: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    "closed": filter_closed_itemsets,
+    "maximal": filter_maximal_itemsets,
+}
+
+
+def is_frequent(counts: np.ndarray, lengths: np.ndarray, min_support: float, n: int) -> np.ndarray:
+    """Whether itemsets with the given support counts and lengths are frequent, with the same thresholds as mlxtend:
+    the support of single events as fraction, the support of longer itemsets as count."""
+    if n == 0:
+        return np.zeros(len(counts), dtype=bool)
+    return np.where(lengths == 1, counts / float(n) >= min_support, counts >= math.ceil(min_support * n))
+
+
+def mine_frequent_itemsets_partitioned(
+    sequences: EventSequences,
+    min_support: float,
+    n_workers: int,
+    backend: str = "fpgrowth",
+    weights: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """Mines all itemsets with a support of at least min_support in two phases on a process pool (SON algorithm).
+    First the sequences are split into one partition per worker and each partition is mined with the same relative
+    min_support. An itemset that is frequent in all sequences is frequent in at least one partition, so the union
+    of the local results contains all frequent itemsets. Second the support of these candidates is counted on each
+    partition and summed up. The result equals mine_frequent_itemsets.
+
+    The local threshold of a partition is the count floor(min_support * n_p), passed as a support half a sequence
+    below it. Rounding min_support * n_p up, like the backends do, can lift the threshold above the share of the
+    partition when the product carries a float error (0.28 * 25 = 7.000000000000001), which would drop itemsets
+    that are exactly frequent in all sequences.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+        min_support: Minimal support of the returned itemsets
+        n_workers: Number of partitions and processes
+        backend: Name of the miner in miner_backends that mines the partitions
+        weights: Number of occurrences of each sequence, e.g. from deduplicate_sequences
+
+    Returns: DataFrame with the columns 'support' and 'itemsets' in the same format as mine_frequent_itemsets
+    """
+    _check_min_support(min_support)
+    n = len(sequences) if weights is None else int(weights.sum())
+    bounds = np.linspace(0, len(sequences), n_workers + 1).astype("int64")
+    partitions = [(start, end) for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()) if end > start]
+    sequences_partitions = [sequences.take(np.arange(start, end)) for start, end in partitions]
+    weights_partitions = [None if weights is None else weights[start:end] for start, end in partitions]
+    min_supports_partitions = [
+        _local_min_support(min_support, end - start if weights is None else int(weights[start:end].sum()))
+        for start, end in partitions
+    ]
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # Phase 1: local frequent itemsets of each partition are the candidates
+        local_itemsets = executor.map(
+            _mine_partition,
+            sequences_partitions,
+            min_supports_partitions,
+            repeat(backend),
+            weights_partitions,
+        )
+        candidates = sorted(set().union(*local_itemsets), key=lambda itemset: (len(itemset), itemset))
+        candidate_itemsets = _from_codes(candidates, sequences.vocabulary)
+
+        # Phase 2: global support counts of the candidates
+        counts = sum(
+            executor.map(itemset_support_counts, repeat(candidate_itemsets), sequences_partitions, weights_partitions),
+            np.zeros(len(candidates), dtype="int64"),
+        )
+
+    frequent = is_frequent(counts, candidate_itemsets.lengths, min_support, n)
+    itemsets = [frozenset(itemset) for itemset, flag in zip(candidates, frequent) if flag]
+    return _to_frame(sequences, itemsets, counts[frequent] / n)
+
+
+def _local_min_support(min_support: float, n: int) -> float:
+    """relative support of a partition with n (weighted) sequences, whose rounded up count and fraction threshold
+    both accept exactly floor(min_support * n) sequences, at least one"""
+    min_count = max(math.floor(min_support * n), 1)
+    return (min_count - 0.5) / max(n, 1)
+
+
+def _mine_partition(
+    sequences: EventSequences, min_support: float, backend: str, weights: Optional[np.ndarray]
+) -> Set[tuple]:
+    itemsets, _ = miner_backends[get_miner_backend(backend, weights)](sequences, min_support, weights)
+    return {tuple(sorted(itemset)) for itemset in itemsets}
+
+
+def mine_top_k_itemsets(
+    sequences: EventSequences, k: int, min_support: float, weights: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """Mines only the k itemsets with the highest support (ties are broken by length and event codes like in
+    mine_frequent_itemsets). The depth first search over the bitsets keeps the best k itemsets in a heap. Once the
+    heap is full, its worst itemset acts as support threshold, so that only prefixes which could still enter the
+    top k are extended.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+        k: Number of itemsets to return
+        min_support: Minimal support of the returned itemsets, the threshold is raised dynamically from here
+        weights: Number of occurrences of each sequence, e.g. from deduplicate_sequences
+
+    Returns: DataFrame with the columns 'support' and 'itemsets' in the same format as mine_frequent_itemsets
+    """
+    _check_min_support(min_support)
+    n = len(sequences) if weights is None else int(weights.sum())
+    bits = item_bitsets(sequences)
+    counts = support_counts(bits, weights)
+
+    # start with the events with the highest support, so the threshold rises early
+    items = np.flatnonzero(counts / float(n) >= min_support)
+    items = items[np.argsort(-counts[items], kind="stable")]
+    min_count = math.ceil(min_support * n)
+
+    # min heap, the worst itemset (lowest support, longest, highest codes) is at the top
+    heap = []
+    if k > 0:
+        for item, count in zip(items.tolist(), counts[items].tolist()):
+            _offer_top_k(heap, k, count, (item,))
+        _extend_top_k(heap, k, min_count, weights, (), items, bits[items], counts[items])
+
+    itemsets = [frozenset(-code for code in entry[2]) for entry in heap]
+    supports = np.asarray([entry[0] for entry in heap], dtype="int64") / n
+
+    return _to_frame(sequences, itemsets, supports)
+
+
+def _top_k_entry(count: int, itemset: tuple) -> tuple:
+    """heap entry of an itemset, larger entries are better (higher support, shorter, lower codes)"""
+    codes = sorted(itemset)
+    return count, -len(codes), tuple(-code for code in codes)
+
+
+def _offer_top_k(heap: list, k: int, count: int, itemset: tuple):
+    entry = _top_k_entry(count, itemset)
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _could_enter_top_k(heap: list, k: int, count: int, itemset: tuple) -> bool:
+    return len(heap) < k or _top_k_entry(count, itemset) > heap[0]
+
+
+def _extend_top_k(
+    heap: list,
+    k: int,
+    min_count: int,
+    weights: Optional[np.ndarray],
+    prefix: tuple,
+    items: np.ndarray,
+    bits: np.ndarray,
+    counts: np.ndarray,
+):
+    """depth first search step of mine_top_k_itemsets, which offers all frequent extensions of prefix + (item,)"""
+    for i, item in enumerate(items.tolist()):
+        itemset = prefix + (item,)
+        # supersets have a lower or equal support and are longer, so they cannot enter either
+        if i + 1 == len(items) or not _could_enter_top_k(heap, k, counts[i], itemset):
+            continue
+        bits_extended = bits[i + 1 :] & bits[i]
+        counts_extended = support_counts(bits_extended, weights)
+        threshold = min_count if len(heap) < k else max(min_count, heap[0][0])
+        frequent = counts_extended >= threshold
+        for item_extended, count in zip(items[i + 1 :][frequent].tolist(), counts_extended[frequent].tolist()):
+            _offer_top_k(heap, k, count, itemset + (item_extended,))
+        if frequent.any():
+            _extend_top_k(
+                heap,
+                k,
+                min_count,
+                weights,
+                itemset,
+                items[i + 1 :][frequent],
+                bits_extended[frequent],
+                counts_extended[frequent],
+            )
+
+
+def _from_codes(itemsets: List[tuple], vocabulary: np.ndarray) -> EventSequences:
+    """One itemset (tuple of event codes) per row"""
+    lengths = [len(itemset) for itemset in itemsets]
+    return EventSequences(
+        vocabulary=vocabulary,
+        offsets=np.concatenate([[0], np.cumsum(lengths, dtype="int64")]).astype("int64"),
+        values=np.asarray([code for itemset in itemsets for code in itemset], dtype="int32"),
+    )
+
+
+def _sample_sequences(
+    sequences: EventSequences, sample_size: int, weights: Optional[np.ndarray] = None, random_state: int = 0
+) -> EventSequences:
+    """Random sample of at most sample_size sequences, weighted sequences are drawn according to their multiplicity"""
+    rng = np.random.default_rng(random_state)
+    if weights is None:
+        rows = rng.choice(len(sequences), size=min(sample_size, len(sequences)), replace=False)
+    else:
+        rows = rng.choice(len(sequences), size=min(sample_size, int(weights.sum())), p=weights / weights.sum())
+    return sequences.take(np.sort(rows))
+
+
+def _check_min_support(min_support: float):
+    if min_support <= 0.0:
+        raise ValueError(f"`min_support` must be a positive number within the interval `(0, 1]`. Got {min_support}.")
+
+
+def _to_frame(sequences: EventSequences, itemsets: List[frozenset], supports: np.ndarray) -> pd.DataFrame:
+    """Translates the event codes of the itemsets into event ids and brings the itemsets in canonical order."""
+    keys = [tuple(sorted(itemset)) for itemset in itemsets]
+    order = sorted(range(len(keys)), key=lambda i: (-supports[i], len(keys[i]), keys[i]))
+    vocabulary = sequences.vocabulary.tolist()
+
+    return pd.DataFrame(
+        {
+            "support": np.asarray(supports, dtype="float64")[order],
+            "itemsets": pd.Series([frozenset(vocabulary[code] for code in keys[i]) for i in order], dtype=object),
+        }
+    )
+
+
+def hoeffding_sample_size(epsilon: float, confidence: float) -> int:
+    """Number of sequences for which the support of an itemset in a random sample deviates by at most epsilon from
+    its support in all sequences with the given confidence (Hoeffding's inequality)."""
+    if not 0.0 < epsilon < 1.0 or not 0.0 < confidence < 1.0:
+        raise ValueError(
+            f"`epsilon` and `confidence` must be within the interval `(0, 1)`. Got {epsilon}, {confidence}."
+        )
+    return math.ceil(math.log(2 / (1 - confidence)) / (2 * epsilon**2))
+
+
+def mine_frequent_itemsets_approximate(
+    sequences: EventSequences,
+    min_support: float,
+    epsilon: float,
+    confidence: float,
+    backend: str = "fpgrowth",
+    weights: Optional[np.ndarray] = None,
+    random_state: int = 0,
+) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Mines the frequent itemsets of a random sample, which is sized by hoeffding_sample_size so that the support
+    of each itemset is estimated within epsilon with the given confidence. The bound holds for each itemset on its
+    own, not for all itemsets at once: the sample is mined at min_support minus the error bound, so a given itemset
+    that is frequent in all sequences is missed with a probability of at most 1 - confidence. Itemsets whose
+    estimate is below min_support stay in the output and are only marked by near_threshold. If the sample would
+    contain all sequences, they are mined exactly.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+        min_support: Minimal support of the itemsets in all sequences
+        epsilon: Maximal deviation of the estimated support
+        confidence: Probability that the support of an itemset is estimated within epsilon
+        backend: Name of the miner in miner_backends
+        weights: Number of occurrences of each sequence, e.g. from deduplicate_sequences
+        random_state: Seed of the sample
+
+    Returns: Tuple of the DataFrame with the columns 'support' (estimate), 'itemsets', 'support_lower',
+             'support_upper' and 'near_threshold' (min_support is within the confidence interval) in the order of
+             mine_frequent_itemsets and the 'sample_size' and 'support_error' of the estimate
+    """
+    _check_min_support(min_support)
+    n = len(sequences) if weights is None else int(weights.sum())
+    sample_size = hoeffding_sample_size(epsilon, confidence)
+
+    if sample_size >= n:
+        frequent_itemsets = mine_frequent_itemsets(sequences, min_support, backend, weights)
+        support_error = 0.0
+    else:
+        sample = _sample_sequences(sequences, sample_size, weights, random_state)
+        frequent_itemsets = mine_frequent_itemsets(sample, max(min_support - epsilon, 1.0 / sample_size), backend)
+        support_error = epsilon
+
+    frequent_itemsets["support_lower"] = (frequent_itemsets["support"] - support_error).clip(lower=0.0)
+    frequent_itemsets["support_upper"] = (frequent_itemsets["support"] + support_error).clip(upper=1.0)
+    frequent_itemsets["near_threshold"] = (frequent_itemsets["support_lower"] < min_support) & (
+        frequent_itemsets["support_upper"] >= min_support
+    )
+
+    return frequent_itemsets, {"sample_size": min(sample_size, n), "support_error": support_error}
+
+
+def _estimate_peak_memory_mb(
+    backend: str, n_sequences: int, n_events: int, nb_itemsets: float, mean_pattern_length: float
+) -> float:
+    """Rough peak memory of mining the full data: the input layout of the backend plus the mined itemsets, which
+    are held as frozensets (~216 bytes plus 8 bytes per event) next to their support in the result frame."""
+    if backend == "fpgrowth":
+        # dense boolean one-hot matrix, which is copied once into the data frame handed to mlxtend
+        input_bytes = 2 * n_sequences * n_events
+    else:
+        # one packed bitset per event and one per extension on the current path of the search
+        input_bytes = 2 * n_events * (n_sequences + 7) // 8
+    itemset_bytes = nb_itemsets * (216 + 8 * mean_pattern_length + 8)
+    return (input_bytes + itemset_bytes) / 2**20
+
+
+def estimate_min_support(
+    sequences: EventSequences,
+    candidates: List[float],
+    memory_budget_mb: float,
+    time_budget_s: float,
+    backend: str = "fpgrowth",
+    weights: Optional[np.ndarray] = None,
+    sample_size: int = 5000,
+    random_state: int = 0,
+) -> Tuple[float, Dict[str, float]]:
+    """Picks the lowest support threshold whose mining is expected to fit into the memory and time budget.
+
+    The candidates are mined from highest to lowest on a random sample of the sequences with the backend that
+    mines the full data. The support of an itemset in the sample estimates its support in the full data, so the
+    number of itemsets found in the sample estimates the number of itemsets of the full data. The runtime is
+    extrapolated linearly in the number of sequences the backend mines, i.e. the unique sequences for weighted
+    sequences. As lower thresholds only yield more itemsets, the search stops at the first candidate exceeding a
+    budget.
+
+    Args:
+        sequences: Integer coded sequences (=transactions)
+        candidates: Support thresholds to choose from
+        memory_budget_mb: Budget for the peak memory of mining the full data in MiB
+        time_budget_s: Budget for the runtime of mining the full data in seconds
+        backend: Name of the miner in miner_backends, which is used for the full data. Weighted sequences are
+            estimated for the backend returned by get_miner_backend
+        weights: Number of occurrences of each sequence, e.g. from deduplicate_sequences
+        sample_size: Number of sequences that are drawn for the estimate
+        random_state: Seed of the sample
+
+    Returns: Tuple of the chosen min_support and the estimate for it ('estimated_nb_itemsets',
+             'estimated_peak_memory_mb' and 'estimated_runtime_s'). If not even the highest candidate fits, the
+             highest candidate is returned.
+    """
+    if not candidates:
+        raise ValueError("At least one candidate for `min_support` is required.")
+    for min_support in candidates:
+        _check_min_support(min_support)
+
+    n = len(sequences) if weights is None else int(weights.sum())
+    # the weight-aware backends mine the unique sequences, any other backend would see every occurrence
+    backend = get_miner_backend(backend, weights)
+    n_rows = len(sequences) if backend in weighted_miner_backends else n
+    sample = _sample_sequences(sequences, sample_size, weights, random_state)
+    sample_weights = None
+    if weights is not None:
+        # like the full data, the sample is mined as weighted unique sequences
+        sample, sample_weights = deduplicate_sequences(sample)
+    scale = n_rows / max(len(sample), 1)
+
+    chosen = None
+    for min_support in sorted(candidates, reverse=True):
+        start = time.perf_counter()
+        itemsets, _ = miner_backends[backend](sample, min_support, sample_weights)
+        runtime_sample = time.perf_counter() - start
+
+        mean_pattern_length = float(np.mean([len(itemset) for itemset in itemsets])) if itemsets else 0.0
+        estimate = {
+            "estimated_nb_itemsets": float(len(itemsets)),
+            "estimated_peak_memory_mb": _estimate_peak_memory_mb(
+                backend, n_rows, len(sequences.vocabulary), len(itemsets), mean_pattern_length
+            ),
+            "estimated_runtime_s": runtime_sample * scale,
+        }
+        fits = (
+            estimate["estimated_peak_memory_mb"] <= memory_budget_mb
+            and estimate["estimated_runtime_s"] <= time_budget_s
+        )
+        if chosen is None or fits:
+            chosen = min_support, estimate
+        if not fits:
+            break
+
+    return chosen
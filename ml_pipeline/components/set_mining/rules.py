@@ -0,0 +1,68 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+def generate_association_rules(
+    frequent_itemsets: pd.DataFrame, min_confidence: float = 0.0, min_lift: float = 0.0, min_leverage: float = -1.0
+) -> pd.DataFrame:
+    """Generates all rules antecedents -> consequents from the frequent itemsets, where antecedents and consequents
+    are a split of a frequent itemset into two non-empty parts. The supports of the parts are looked up in a hash
+    index of the itemsets and the metrics of all rules are calculated at once. frequent_itemsets has to contain all
+    frequent itemsets, splits whose parts are missing (e.g. after the top k cut or for closed/maximal output) are
+    skipped.
+
+    Args:
+        frequent_itemsets: DataFrame with the columns 'support' and 'itemsets' (lists or frozensets of event ids)
+        min_confidence: Minimal confidence of the returned rules
+        min_lift: Minimal lift of the returned rules
+        min_leverage: Minimal leverage of the returned rules
+
+    Returns: DataFrame with the columns 'antecedents', 'consequents' (lists of event ids), 'antecedent_support',
+             'consequent_support', 'support', 'confidence', 'lift' and 'leverage', ordered by descending confidence
+             and lift
+    """
+    itemsets = [frozenset(itemset) for itemset in frequent_itemsets["itemsets"]]
+    supports = frequent_itemsets["support"].to_numpy(dtype="float64")
+    index = {itemset: i for i, itemset in enumerate(itemsets)}
+
+    # positions of the itemset, the antecedents and the consequents of every rule
+    positions_itemset, positions_antecedents, positions_consequents = [], [], []
+    for i, itemset in enumerate(itemsets):
+        items = sorted(itemset)
+        for length in range(1, len(items)):
+            for antecedents in combinations(items, length):
+                position_antecedents = index.get(frozenset(antecedents))
+                position_consequents = index.get(itemset.difference(antecedents))
+                if position_antecedents is not None and position_consequents is not None:
+                    positions_itemset.append(i)
+                    positions_antecedents.append(position_antecedents)
+                    positions_consequents.append(position_consequents)
+
+    positions_itemset = np.asarray(positions_itemset, dtype="int64")
+    positions_antecedents = np.asarray(positions_antecedents, dtype="int64")
+    positions_consequents = np.asarray(positions_consequents, dtype="int64")
+
+    # rule metrics
+    support = supports[positions_itemset]
+    antecedent_support = supports[positions_antecedents]
+    consequent_support = supports[positions_consequents]
+    confidence = support / antecedent_support
+    lift = confidence / consequent_support
+    leverage = support - antecedent_support * consequent_support
+
+    selected = (confidence >= min_confidence) & (lift >= min_lift) & (leverage >= min_leverage)
+    rules = pd.DataFrame(
+        {
+            "antecedents": pd.Series([sorted(itemsets[i]) for i in positions_antecedents[selected]], dtype=object),
+            "consequents": pd.Series([sorted(itemsets[i]) for i in positions_consequents[selected]], dtype=object),
+            "antecedent_support": antecedent_support[selected],
+            "consequent_support": consequent_support[selected],
+            "support": support[selected],
+            "confidence": confidence[selected],
+            "lift": lift[selected],
+            "leverage": leverage[selected],
+        }
+    )
+    return rules.sort_values(by=["confidence", "lift"], ascending=False, kind="stable").reset_index(drop=True)
@@ -1,13 +1,25 @@
 import logging
-from typing import List
+from typing import Optional
 
 from kfp.components import func_to_container_op
 from ml_pipeline.components.set_mining.steps import (
     load_input_data_set_mining,
     upload_output_data_set_mining,
     apply_fpgrowth_set_mining,
+    check_params_set_mining,
+    classify_known_patterns,
     get_names_for_set,
+    incremental_set_mining,
+    load_itemset_state,
+    load_known_patterns_set_mining,
+    load_window_configurations_set_mining,
+    sweep_min_support_set_mining,
+    upload_itemset_state,
+    upload_min_support_to_hyperparam_table,
+    upload_sweep_output_data_set_mining,
+    upload_window_configurations_output_data_set_mining,
 )
+from ml_pipeline.util.data_class import KnownPattern, MetaData, SetMiningResults
 from ml_pipeline.util.util import timed, pipeline_logging_config
 from ml_pipeline.util.exceptions import NoDataToProcess
 
@@ -30,7 +42,36 @@ def set_mining(run_id: str, unique_event_count: int, config: dict) -> bool:
     logger.info("Start pipeline step: Set Mining")
 
     # Load Input Data Pipeline Step
+    dc_by_window_configuration = load_window_configurations_set_mining(config)
+    window_configurations = bool(dc_by_window_configuration)
+    check_params_set_mining(config, window_configurations)
     dc_event_history, dc_event_id_meta = load_input_data_set_mining(config)
+    dc_known_patterns = (
+        load_known_patterns_set_mining(config) if config["params"]["known_patterns"]["enabled"] else None
+    )
+
+    if window_configurations:
+        # the feature engineering created the sequences of several window configurations, each is mined separately
+        for key, dc_sequences in list(dc_by_window_configuration.items()):
+            if dc_sequences.sequences.shape[0] == 0:
+                logger.warning(f"No sequences are available for set mining in the window configuration {key}")
+                del dc_by_window_configuration[key]
+                continue
+            dc_most_frequent_sets = apply_fpgrowth_set_mining(dc_sequences, unique_event_count, config)
+            dc_by_window_configuration[key] = describe_frequent_sets(
+                dc_most_frequent_sets, dc_known_patterns, dc_event_id_meta, config
+            )
+        if not dc_by_window_configuration:
+            raise NoDataToProcess(
+                config["common"]["kf_run_id"],
+                run_id,
+                "set_mining",
+                config["bucket"],
+                config["error_logs"],
+                "No sequences are available for set mining in any window configuration",
+            )
+        upload_window_configurations_output_data_set_mining(run_id, dc_by_window_configuration, config)
+        return True
 
     if dc_event_history.sequences.shape[0] == 0:
         raise NoDataToProcess(
@@ -42,11 +83,29 @@ def set_mining(run_id: str, unique_event_count: int, config: dict) -> bool:
             "No sequences are available for set mining",
         )
 
-    # get most frequent sets out of all sequences by applying the fbgrowth set mining algorithm
-    dc_most_frequent_sets = apply_fpgrowth_set_mining(dc_event_history, unique_event_count, config)
+    if config["params"]["min_support_sweep"]:
+        # get most frequent sets for all min_support values of the sweep from one mining pass
+        dc_by_min_support = sweep_min_support_set_mining(dc_event_history, config)
+        for key, dc_most_frequent_sets in dc_by_min_support.items():
+            dc_by_min_support[key] = describe_frequent_sets(
+                dc_most_frequent_sets, dc_known_patterns, dc_event_id_meta, config
+            )
+        upload_sweep_output_data_set_mining(run_id, dc_by_min_support, config)
+        return True
 
-    # get event names for all events that are part of the 'most frequent itemsets'
-    dc_most_frequent_sets = get_names_for_set(dc_most_frequent_sets, dc_event_id_meta)
+    if config["params"]["incremental_mining"]:
+        # update the most frequent sets of the previous run with the added and expired sequences
+        itemset_state = load_itemset_state(config)
+        dc_most_frequent_sets, itemset_state = incremental_set_mining(dc_event_history, itemset_state, config)
+        upload_itemset_state(itemset_state, config)
+    else:
+        # get most frequent sets out of all sequences by applying the fbgrowth set mining algorithm
+        dc_most_frequent_sets = apply_fpgrowth_set_mining(dc_event_history, unique_event_count, config)
+        if config["params"]["min_support_mode"] == "adaptive" and config["params"]["mining_mode"] == "threshold":
+            upload_min_support_to_hyperparam_table(run_id, dc_most_frequent_sets, config)
+
+    # known patterns and event names of the most frequent sets
+    dc_most_frequent_sets = describe_frequent_sets(dc_most_frequent_sets, dc_known_patterns, dc_event_id_meta, config)
 
     # Store Output Pipeline Step
     upload_output_data_set_mining(run_id, dc_most_frequent_sets, config)
@@ -54,6 +113,30 @@ def set_mining(run_id: str, unique_event_count: int, config: dict) -> bool:
     return True
 
 
+def describe_frequent_sets(
+    dc_most_frequent_sets: SetMiningResults,
+    dc_known_patterns: Optional[KnownPattern],
+    dc_event_id_meta: MetaData,
+    config: dict,
+) -> SetMiningResults:
+    """Runs the stages after the set mining: the comparison with the known patterns and the event names of the
+    most frequent sets. The association rules are derived by the set mining, which has all frequent itemsets.
+
+    Args:
+        dc_most_frequent_sets: DataClass containing the set mining results
+        dc_known_patterns: DataClass containing the known patterns, None if they are disabled
+        dc_event_id_meta: DataClass containing the meta data of the events
+        config: Dictionary containing all configurations
+    Returns: DataClass containing the described set mining results
+    """
+    # compare the most frequent sets with the known patterns
+    if config["params"]["known_patterns"]["enabled"]:
+        dc_most_frequent_sets = classify_known_patterns(dc_most_frequent_sets, dc_known_patterns, config)
+
+    # get event names for all events that are part of the 'most frequent itemsets'
+    return get_names_for_set(dc_most_frequent_sets, dc_event_id_meta, config["params"]["description_columns"])
+
+
 # pass set mining function to kubeflow container operation
 set_mining_op = func_to_container_op(
     func=set_mining,
@@ -61,10 +144,16 @@ set_mining_op = func_to_container_op(
     modules_to_capture=[
         "ml_pipeline.components.set_mining.set_mining",
         "ml_pipeline.components.set_mining.steps",
+        "ml_pipeline.components.set_mining.miners",
+        "ml_pipeline.components.set_mining.incremental",
+        "ml_pipeline.components.set_mining.rules",
+        "ml_pipeline.components.set_mining.known_patterns",
         "ml_pipeline.util.util",
+        "ml_pipeline.util.s3util",
+        "ml_pipeline.util.tables",
         "ml_pipeline.util.data_class",
         "ml_pipeline.util.exceptions",
     ],
     base_image="python:3.8",
-    packages_to_install=["pandas", "boto3", "cloudpickle", "mlxtend"],
+    packages_to_install=["pandas", "boto3", "cloudpickle", "mlxtend", "pyarrow"],
 )
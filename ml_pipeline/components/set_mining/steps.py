@@ -1,14 +1,35 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from typing import Tuple
-from mlxtend.preprocessing import TransactionEncoder
-from mlxtend.frequent_patterns import fpgrowth
-from typing import Dict
+from typing import Dict, Optional
 import collections
-import boto3
 import logging
 
-from ml_pipeline.util.data_class import EventHistory, MetaData, SetMiningResults
+from ml_pipeline.components.set_mining.known_patterns import KNOWN, NOVEL, SUPERSET_OF_KNOWN, match_known_patterns
+from ml_pipeline.components.set_mining.incremental import frequent_itemsets_from_state, update_itemset_state
+from ml_pipeline.components.set_mining.miners import (
+    deduplicate_sequences,
+    estimate_min_support,
+    filter_frequent_itemsets,
+    get_miner_backend,
+    itemset_filters,
+    mine_frequent_itemsets,
+    mine_frequent_itemsets_approximate,
+    mine_frequent_itemsets_partitioned,
+    mine_top_k_itemsets,
+)
+from ml_pipeline.components.set_mining.rules import generate_association_rules
+from ml_pipeline.util.data_class import (
+    EventHistory,
+    EventSequences,
+    ItemsetState,
+    KnownPattern,
+    MetaData,
+    SetMiningResults,
+)
+from ml_pipeline.util.s3util import get_s3_resource
+from ml_pipeline.util.tables import append_to_table, load_table_part, output_tables, read_table
 from ml_pipeline.util.util import check_columns, load_data_s3, upload_data_s3
 from ml_pipeline.util.util import timed
 
@@ -16,6 +37,34 @@ from ml_pipeline.util.util import timed
 logger = logging.getLogger("set_mining")
 
 
+def check_params_set_mining(config: Dict, window_configurations: bool = False):
+    """Rejects combinations of the modes of the set mining that exclude each other: the adaptive min_support is
+    only estimated for the threshold mining of the full sequences, which is the only mode writing it to the
+    hyperparam_info table, and the association rules as well as the closed and maximal output modes need all
+    frequent itemsets, of which top_k keeps the k most frequent only. The sequences of several window
+    configurations (window_configurations=True) are mined with a fixed min_support each."""
+    params = config["params"]
+    if window_configurations and (
+        params["min_support_sweep"] or params["incremental_mining"] or params["min_support_mode"] == "adaptive"
+    ):
+        raise ValueError(
+            "window_configurations do not support min_support_sweep, incremental_mining and the adaptive "
+            "min_support_mode"
+        )
+    if params["association_rules"]["enabled"] and params["mining_mode"] == "top_k":
+        raise ValueError("The association rules need all frequent itemsets, which the mining_mode top_k does not mine")
+    if params["output_mode"] != "all" and params["mining_mode"] == "top_k":
+        raise ValueError(
+            f"The output_mode {params['output_mode']} needs all frequent itemsets, which the mining_mode top_k does "
+            "not mine"
+        )
+    if params["min_support_mode"] == "adaptive":
+        if params["mining_mode"] != "threshold":
+            raise ValueError(f"The adaptive min_support_mode does not support the mining_mode {params['mining_mode']}")
+        if params["min_support_sweep"] or params["incremental_mining"]:
+            raise ValueError("The adaptive min_support_mode does not support min_support_sweep and incremental_mining")
+
+
 @timed
 def load_input_data_set_mining(approach: str, config: Dict) -> Tuple[EventHistory, MetaData]:
     """This function loads data from S3 that is necessary for this pipeline step.
@@ -33,6 +82,28 @@ def load_input_data_set_mining(approach: str, config: Dict) -> Tuple[EventHistor
     return dc_event_history, dc_event_id_meta
 
 
+@timed
+def load_known_patterns_set_mining(config: Dict) -> KnownPattern:
+    """This function loads the known patterns, which the most frequent sets are compared with.
+
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: DataClass containing the known patterns
+    """
+    # Load Data From S3
+    s3 = get_s3_resource()
+    df_known_patterns = load_data_s3(
+        s3, config["bucket"], config["dir_pipeline_input"] + config["input_data"]["known_patterns"]
+    )
+
+    # Type conversion
+    df_known_patterns["event_pattern"] = df_known_patterns.event_pattern.astype(str)
+    df_known_patterns["trigger"] = df_known_patterns.trigger.astype(str)
+    df_known_patterns = df_known_patterns.fillna("")
+
+    # Create Data Classes
+    return KnownPattern(data=df_known_patterns, kpis=collections.defaultdict(list))
+
+
 @timed
 def upload_output_data_set_mining(run_id: str, dc_most_frequent_sets: SetMiningResults, config: Dict) -> bool:
     """This function collects kpis of all dataclasses and uploads all processed to S3 that is needed in
@@ -47,6 +118,12 @@ def upload_output_data_set_mining(run_id: str, dc_most_frequent_sets: SetMiningR
     df_kpis["run_id"] = run_id
 
     # Upload Data for next pipeline step
+    if dc_most_frequent_sets.rules is not None:
+        upload_data_s3(
+            dc_most_frequent_sets.rules,
+            config["bucket"],
+            config["dir_pipeline_output"] + config["output_data"]["association_rules"],
+        )
 
     # Load current tables
 
@@ -61,8 +138,12 @@ def upload_output_data_set_mining(run_id: str, dc_most_frequent_sets: SetMiningR
 def apply_fpgrowth_set_mining(
     dc_event_history: EventHistory, unique_event_count: int, config: Dict
 ) -> SetMiningResults:
-    """This function first transforms the data into a OneHotEncoding format, then executes the set mining algorithm
-        and calculates for each 'most frequent sets' the amount of events (=length of pattern)
+    """This function first transforms the data into integer coded sequences, then executes the set mining algorithm
+        selected by config["params"]["miner_backend"] (on config["params"]["n_workers"] processes) and calculates
+        for each 'most frequent sets' the amount of events (=length of pattern). With
+        config["params"]["min_support_mode"] = "adaptive" the min_support is chosen by estimate_min_support and
+        written back to config["params"]["min_support"]. The mining_mode "approximate" mines a sample and adds
+        confidence intervals of the supports.
 
     Args:
         dc_event_history: DataClass containing the sets (=event sequences) that are mined by the algorithm
@@ -72,25 +153,388 @@ def apply_fpgrowth_set_mining(
     Returns: DataClass containing the set mining results
     """
     # Get Data from DataClass and transform data type
-    df_sequences = dc_event_history.sequences
-    list_of_sequences = df_sequences["event_sequence"].tolist()
-
-    # OneHotEncoding
-    te = TransactionEncoder()
-    te_ary = te.fit(list_of_sequences).transform(list_of_sequences)
-    encoded_df = pd.DataFrame(te_ary, columns=te.columns_)
-
-    # Set the min_support at .3 if we have more than 300 unique Events
-    if unique_event_count > 300:
-        config["params"]["min_support"] = 0.3
-        print(
-            f"Due to the fact that number of Events are {unique_event_count}, the min support value is changed to .3 to avoid high computational complexity"
+    sequences_csr, weights, nb_sequences = _get_sequences_set_mining(dc_event_history, config)
+    min_support_estimate = None
+    approximation_kpis = None
+
+    if config["params"]["mining_mode"] == "top_k":
+        # Mine only the top k itemsets, the support threshold is raised while mining
+        frequent_itemsets = mine_top_k_itemsets(
+            sequences_csr, config["params"]["top_k"], config["params"]["min_support"], weights
+        )
+    elif config["params"]["mining_mode"] == "approximate":
+        # Mine a sample sized by the requested error bound and report the supports with confidence intervals
+        approximate_params = config["params"]["approximate"]
+        frequent_itemsets, approximation_kpis = mine_frequent_itemsets_approximate(
+            sequences_csr,
+            config["params"]["min_support"],
+            approximate_params["epsilon"],
+            approximate_params["confidence"],
+            config["params"]["miner_backend"],
+            weights,
+            approximate_params["random_state"],
+        )
+    else:
+        if config["params"]["min_support_mode"] == "adaptive":
+            # Lowest min_support that is expected to fit into the memory and time budget
+            adaptive_params = config["params"]["adaptive_min_support"]
+            config["params"]["min_support"], min_support_estimate = estimate_min_support(
+                sequences_csr,
+                adaptive_params["candidates"],
+                adaptive_params["memory_budget_mb"],
+                adaptive_params["time_budget_s"],
+                config["params"]["miner_backend"],
+                weights,
+                adaptive_params["sample_size"],
+                adaptive_params["random_state"],
+            )
+            logger.info(f"Adaptive min support {config['params']['min_support']}, estimate: {min_support_estimate}")
+        # Set the min_support at .3 if we have more than 300 unique Events
+        elif unique_event_count > 300:
+            config["params"]["min_support"] = 0.3
+            print(
+                f"Due to the fact that number of Events are {unique_event_count}, the min support value is changed to .3 to avoid high computational complexity"
+            )
+
+        # Apply Set Mining Algorithm
+        if config["params"]["n_workers"] > 1:
+            # Mine partitions of the sequences in parallel and verify the candidates on all sequences
+            frequent_itemsets = mine_frequent_itemsets_partitioned(
+                sequences_csr,
+                config["params"]["min_support"],
+                config["params"]["n_workers"],
+                config["params"]["miner_backend"],
+                weights,
+            )
+        else:
+            frequent_itemsets = mine_frequent_itemsets(
+                sequences_csr, config["params"]["min_support"], config["params"]["miner_backend"], weights
+            )
+
+    # Update data from DataClass
+    dc_most_frequent_sets = _create_set_mining_results(frequent_itemsets, config)
+    _add_deduplication_kpis(dc_most_frequent_sets, sequences_csr, weights, nb_sequences)
+    if min_support_estimate is not None:
+        dc_most_frequent_sets.kpis["min_support"].append(config["params"]["min_support"])
+        for estimate_name, estimate_value in min_support_estimate.items():
+            dc_most_frequent_sets.kpis[estimate_name].append(round(estimate_value, 3))
+    if approximation_kpis is not None:
+        for kpi_name, kpi_value in approximation_kpis.items():
+            dc_most_frequent_sets.kpis[kpi_name].append(kpi_value)
+        dc_most_frequent_sets.kpis["nb_near_threshold"].append(
+            int(dc_most_frequent_sets.fpgrowth.near_threshold.sum())
+        )
+
+    return dc_most_frequent_sets
+
+
+@timed
+def classify_known_patterns(
+    dc_most_frequent_sets: SetMiningResults, dc_known_patterns: KnownPattern, config: Dict
+) -> SetMiningResults:
+    """This function classifies each frequent set as 'known' (equal to a known pattern), 'superset_of_known' (a
+        known pattern plus further events, none of them excluded by the pattern) or 'novel' in the column
+        'known_pattern_match' and counts the frequent sets of each class in the kpis.
+
+    Args:
+        dc_most_frequent_sets: DataClass containing the set mining results
+        dc_known_patterns: DataClass containing the known patterns
+        config: Dict of configurations
+
+    Returns: DataClass containing the classified set mining results
+    """
+    # Get Data from DataClass
+    df_freq_itemsets = dc_most_frequent_sets.fpgrowth
+
+    classes, _ = match_known_patterns(
+        df_freq_itemsets["itemsets"].tolist(),
+        dc_known_patterns.data,
+        config["params"]["known_patterns"]["exclusion_columns"],
+    )
+    df_freq_itemsets["known_pattern_match"] = classes
+
+    # Update data from DataClass
+    dc_most_frequent_sets.fpgrowth = df_freq_itemsets
+    for label in [KNOWN, SUPERSET_OF_KNOWN, NOVEL]:
+        dc_most_frequent_sets.kpis[f"nb_{label}"].append(int((classes == label).sum()))
+
+    return dc_most_frequent_sets
+
+
+@timed
+def apply_association_rules(
+    dc_most_frequent_sets: SetMiningResults, frequent_itemsets: pd.DataFrame, config: Dict
+) -> SetMiningResults:
+    """This function derives association rules (antecedents -> consequents) with their confidence, lift and
+        leverage from all frequent itemsets, filtered by the thresholds in config["params"]["association_rules"].
+        The rules need the supports of all subsets of an itemset, so they are derived from the mining result
+        before the closed/maximal filter and the top k cut.
+
+    Args:
+        dc_most_frequent_sets: DataClass containing the set mining results
+        frequent_itemsets: All frequent itemsets the set mining results were created from
+        config: Dict of configurations
+
+    Returns: DataClass containing the set mining results and the rules
+    """
+    rule_params = config["params"]["association_rules"]
+    dc_most_frequent_sets.rules = generate_association_rules(
+        frequent_itemsets,
+        rule_params["min_confidence"],
+        rule_params["min_lift"],
+        rule_params["min_leverage"],
+    )
+    dc_most_frequent_sets.kpis["nb_rules"].append(dc_most_frequent_sets.rules.shape[0])
+
+    return dc_most_frequent_sets
+
+
+@timed
+def incremental_set_mining(
+    dc_event_history: EventHistory, itemset_state: Optional[ItemsetState], config: Dict
+) -> Tuple[SetMiningResults, ItemsetState]:
+    """Recurring runs mostly mine the same sequences as the previous run. Instead of mining all sequences again, the
+        support counts of the frequent itemsets and their negative border kept from the previous run are updated
+        with the added and expired sequences only. All sequences are mined again only if an itemset of the negative
+        border becomes frequent, if there is no state yet or if the min_support changed.
+
+    Args:
+        dc_event_history: DataClass containing the sets (=event sequences) that are mined by the algorithm
+        itemset_state: State of the previous run of the data scope, None on the first run
+        config: Dict of configurations
+
+    Returns: Tuple of the DataClass containing the set mining results and the state for the next run
+    """
+    # Get Data from DataClass and transform data type
+    if dc_event_history.sequences_csr is not None:
+        sequences_csr = dc_event_history.sequences_csr
+    else:
+        sequences_csr = EventSequences.from_lists(dc_event_history.sequences["event_sequence"].tolist())
+
+    # Update the support counts with the difference to the previous run
+    itemset_state, update_kpis = update_itemset_state(itemset_state, sequences_csr, config["params"]["min_support"])
+    frequent_itemsets = frequent_itemsets_from_state(itemset_state)
+
+    # Update data from DataClass
+    dc_most_frequent_sets = _create_set_mining_results(frequent_itemsets, config)
+    for kpi_name, kpi_value in update_kpis.items():
+        dc_most_frequent_sets.kpis[kpi_name].append(kpi_value)
+
+    return dc_most_frequent_sets, itemset_state
+
+
+def _get_itemset_state_key(config: Dict) -> str:
+    """The state is shared by all runs of a data scope, independent of their date range"""
+    return (
+        config["params"]["itemset_state_dir"]
+        + config["common"]["data_scope"]
+        + "/"
+        + config["output_data"]["itemset_state"]
+    )
+
+
+@timed
+def load_itemset_state(config: Dict) -> Optional[ItemsetState]:
+    """This function loads the state of the incremental set mining of the previous run of the data scope.
+
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: State of the previous run, None if there was no previous run
+    """
+    s3 = get_s3_resource()
+    data_key = _get_itemset_state_key(config)
+    if not any(file.key == data_key for file in s3.Bucket(config["bucket"]).objects.filter(Prefix=data_key)):
+        return None
+
+    return ItemsetState.from_npz(load_data_s3(s3, config["bucket"], data_key))
+
+
+@timed
+def load_window_configurations_set_mining(config: Dict) -> Dict[str, EventHistory]:
+    """This function loads the sequences of each window configuration, if the feature engineering created the
+        sequences of several window configurations (config["params"]["window_configurations"] of the feature
+        engineering). They are listed in config["input_data"]["window_configurations"] and stored under the key of
+        their configuration, e.g. 'time_60/'.
+
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: DataClass containing the sequences for each window configuration, empty without a sweep
+    """
+    s3 = get_s3_resource()
+    listing_key = config["dir_pipeline_tmp"] + config["input_data"]["window_configurations"]
+    if not any(file.key == listing_key for file in s3.Bucket(config["bucket"]).objects.filter(Prefix=listing_key)):
+        return {}
+
+    dc_by_configuration = {}
+    for key in load_data_s3(s3, config["bucket"], listing_key)["keys"]:
+        dir_configuration = config["dir_pipeline_tmp"] + key + "/"
+        sequences = load_data_s3(s3, config["bucket"], dir_configuration + config["input_data"]["sequences"])
+        if "sequence" in sequences.columns:
+            # sequence_format "string"
+            sequences_csr = _parse_sequences(sequences["sequence"])
+        else:
+            csr_key = dir_configuration + config["input_data"]["sequences_csr"]
+            sequences_csr = EventSequences.from_npz(load_data_s3(s3, config["bucket"], csr_key))
+        dc_by_configuration[key] = EventHistory(
+            data=None,
+            occurrence_each_event=None,
+            sequences=sequences,
+            kpis=collections.defaultdict(list),
+            sequences_csr=sequences_csr,
         )
 
-    # Apply Set Mining Algorithm
-    frequent_itemsets = fpgrowth(
-        encoded_df, min_support=config["params"]["min_support"], use_colnames=True
-    ).sort_values(by=["support"], ascending=False)
+    return dc_by_configuration
+
+
+@timed
+def upload_window_configurations_output_data_set_mining(
+    run_id: str, dc_by_configuration: Dict[str, SetMiningResults], config: Dict
+) -> bool:
+    """This function uploads the frequent sets of each window configuration next to its sequences.
+
+    :param run_id: ID that is unique within a kubeflow run and identifies a run for a specific data scope
+                (=iteration of a for loop)
+    :param dc_by_configuration: DataClass containing the most frequent sets for each window configuration
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: True, if upload was successfully
+    """
+    _upload_frequent_sets_by_key(dc_by_configuration, config)
+    return True
+
+
+@timed
+def upload_itemset_state(itemset_state: ItemsetState, config: Dict) -> bool:
+    """This function uploads the state of the incremental set mining for the next run of the data scope.
+
+    :param itemset_state: State of the current run
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: True, if upload was successfully
+    """
+    upload_data_s3(itemset_state.to_npz(), config["bucket"], _get_itemset_state_key(config))
+
+    return True
+
+
+def get_min_support_key(min_support: float) -> str:
+    """Key of the results of one min_support of the sweep, e.g. 'min_support_0.05'"""
+    return f"min_support_{min_support}"
+
+
+@timed
+def sweep_min_support_set_mining(dc_event_history: EventHistory, config: Dict) -> Dict[str, SetMiningResults]:
+    """Creates the set mining results for every min_support in config["params"]["min_support_sweep"] from a single
+        mining pass: the itemsets are mined once at the lowest min_support and the results of the higher ones are
+        derived by filtering on the support. The top k cut and the pattern length are applied to each result like in
+        apply_fpgrowth_set_mining.
+
+    Args:
+        dc_event_history: DataClass containing the sets (=event sequences) that are mined by the algorithm
+        config: Dict of configurations
+
+    Returns: Dictionary with a DataClass containing the set mining results for each min_support
+    """
+    # Get Data from DataClass and transform data type
+    sequences_csr, weights, nb_sequences = _get_sequences_set_mining(dc_event_history, config)
+    nb_transactions = len(sequences_csr) if weights is None else int(weights.sum())
+    min_supports = sorted(set(config["params"]["min_support_sweep"]))
+
+    # Apply Set Mining Algorithm once at the lowest min_support
+    frequent_itemsets_lowest = mine_frequent_itemsets(
+        sequences_csr, min_supports[0], config["params"]["miner_backend"], weights
+    )
+
+    dc_by_min_support = {}
+    for min_support in min_supports:
+        frequent_itemsets = filter_frequent_itemsets(frequent_itemsets_lowest, min_support, nb_transactions)
+        dc_most_frequent_sets = _create_set_mining_results(frequent_itemsets, config)
+        dc_most_frequent_sets.kpis["min_support"].append(min_support)
+        _add_deduplication_kpis(dc_most_frequent_sets, sequences_csr, weights, nb_sequences)
+        dc_by_min_support[get_min_support_key(min_support)] = dc_most_frequent_sets
+
+    return dc_by_min_support
+
+
+@timed
+def upload_sweep_output_data_set_mining(
+    run_id: str, dc_by_min_support: Dict[str, SetMiningResults], config: Dict
+) -> bool:
+    """This function uploads the frequent sets of each min_support of the sweep under its own prefix and a list of
+        all min_support values with their keys.
+
+    :param run_id: ID that is unique within a kubeflow run and identifies a run for a specific data scope
+                (=iteration of a for loop)
+    :param dc_by_min_support: DataClass containing the most frequent sets for each min_support
+    :param config: Dictionary containing all configuration regarding e.g. data paths
+    :return: True, if upload was successfully
+    """
+    # Upload Data for next pipeline step
+    _upload_frequent_sets_by_key(dc_by_min_support, config)
+
+    upload_data_s3(
+        {"min_support_sweep": sorted(set(config["params"]["min_support_sweep"])), "keys": list(dc_by_min_support)},
+        config["bucket"],
+        config["dir_pipeline_tmp"] + config["output_data"]["min_support_sweep"],
+    )
+
+    return True
+
+
+def _parse_sequences(sequences: pd.Series) -> EventSequences:
+    """integer coded sequences of the comma separated event ids, numeric event ids are parsed as numbers"""
+    events = sequences.astype(str).str.split(",")
+    tokens = pd.to_numeric(pd.Series([event for sequence in events for event in sequence]), errors="ignore")
+    codes, vocabulary = pd.factorize(tokens, sort=True)
+    return EventSequences(
+        vocabulary=np.asarray(vocabulary),
+        offsets=np.concatenate([[0], np.cumsum(events.str.len().to_numpy())]).astype("int64"),
+        values=codes.astype("int32"),
+    )
+
+
+def _upload_frequent_sets_by_key(dc_by_key: Dict[str, SetMiningResults], config: Dict):
+    """uploads the frequent sets and association rules of each key under the prefix of the key"""
+    for key, dc_most_frequent_sets in dc_by_key.items():
+        upload_data_s3(
+            dc_most_frequent_sets.fpgrowth,
+            config["bucket"],
+            config["dir_pipeline_tmp"] + key + "/" + config["output_data"]["frequent_sets"],
+        )
+        if dc_most_frequent_sets.rules is not None:
+            upload_data_s3(
+                dc_most_frequent_sets.rules,
+                config["bucket"],
+                config["dir_pipeline_tmp"] + key + "/" + config["output_data"]["association_rules"],
+            )
+
+
+def _get_sequences_set_mining(
+    dc_event_history: EventHistory, config: Dict
+) -> Tuple[EventSequences, Optional[np.ndarray], int]:
+    """Integer coded sequences of the DataClass, collapsed into unique sequences weighted by their multiplicity if
+    configured. Returns the sequences, their weights (None without deduplication) and the number of sequences."""
+    if dc_event_history.sequences_csr is not None:
+        sequences_csr = dc_event_history.sequences_csr
+    else:
+        sequences_csr = EventSequences.from_lists(dc_event_history.sequences["event_sequence"].tolist())
+
+    nb_sequences = len(sequences_csr)
+    weights = None
+    if config["params"]["deduplicate_sequences"]:
+        sequences_csr, weights = deduplicate_sequences(sequences_csr)
+        backend = get_miner_backend(config["params"]["miner_backend"], weights)
+        if backend != config["params"]["miner_backend"]:
+            logger.info(f"the deduplicated sequences are mined with the {backend} backend, which supports weights")
+
+    return sequences_csr, weights, nb_sequences
+
+
+def _create_set_mining_results(frequent_itemsets: pd.DataFrame, config: Dict) -> SetMiningResults:
+    """Derives the association rules if configured, reduces the frequent itemsets to the closed or maximal ones if
+    configured, sorts them by support, adds the length of each pattern, keeps the top k itemsets and calculates the
+    kpis of the result."""
+    frequent_itemsets_all = frequent_itemsets
+    nb_itemsets = len(frequent_itemsets)
+    if config["params"]["output_mode"] != "all":
+        frequent_itemsets = itemset_filters[config["params"]["output_mode"]](frequent_itemsets)
+    frequent_itemsets = frequent_itemsets.sort_values(by=["support"], ascending=False, kind="stable")
 
     # Get the length of the most frequent sets
     frequent_itemsets["pattern_length"] = [len(itemset) for itemset in frequent_itemsets["itemsets"]]
@@ -99,42 +543,97 @@ def apply_fpgrowth_set_mining(
     # Convert frozen sets into list and add info of current approach
     frequent_itemsets["itemsets"] = frequent_itemsets["itemsets"].apply(lambda x: list(x))
 
-    # Update data from DataClass
-    dc_most_frequent_sets = SetMiningResults(fpgrowth=frequent_itemsets.iloc[:100], kpis=collections.defaultdict(list))
+    dc_most_frequent_sets = SetMiningResults(
+        fpgrowth=frequent_itemsets.iloc[: config["params"]["top_k"]], kpis=collections.defaultdict(list)
+    )
     dc_most_frequent_sets.kpis["nb_freq_sets"].append(dc_most_frequent_sets.fpgrowth.shape[0])
     dc_most_frequent_sets.kpis["max_support_value"].append(round(dc_most_frequent_sets.fpgrowth.support.max(), 3))
+    if config["params"]["output_mode"] != "all":
+        # itemsets that are subsumed by a superset of the same support (closed) or by any superset (maximal)
+        dc_most_frequent_sets.kpis["nb_pruned_itemsets"].append(nb_itemsets - len(frequent_itemsets))
+    if config["params"]["association_rules"]["enabled"]:
+        dc_most_frequent_sets = apply_association_rules(dc_most_frequent_sets, frequent_itemsets_all, config)
 
     return dc_most_frequent_sets
 
 
+def _add_deduplication_kpis(
+    dc_most_frequent_sets: SetMiningResults,
+    sequences_csr: EventSequences,
+    weights: Optional[np.ndarray],
+    nb_sequences: int,
+):
+    if weights is not None:
+        # share of sequences that did not need to be mined, because they are duplicates of another sequence
+        dc_most_frequent_sets.kpis["nb_unique_sequences"].append(len(sequences_csr))
+        dc_most_frequent_sets.kpis["dedup_ratio"].append(round(1 - len(sequences_csr) / nb_sequences, 3))
+
+
 @timed
-def get_names_for_set(dc_most_frequent_sets: SetMiningResults, dc_meta_data: MetaData) -> SetMiningResults:
+def upload_min_support_to_hyperparam_table(run_id: str, dc_most_frequent_sets: SetMiningResults, config: Dict) -> bool:
+    """This function writes the min_support chosen by the adaptive mode and its estimate to the row of the run in
+        the hyperparam_info table.
+
+    Args:
+        run_id: ID that is unique within a kubeflow run and identifies a run for a specific data scope
+        dc_most_frequent_sets: DataClass containing the kpis of the set mining
+        config: Dict of configurations
+
+    Returns: True if upload was successful
+    """
+    # load the row of the run, which was merged into the table if a compaction ran in between
+    s3 = get_s3_resource()
+    table_key = config["dir_pipeline_output"] + config["output_data"]["hyperparam_info"]
+    df_hyperparameter = load_table_part(s3, config["bucket"], table_key, f"run_id={run_id}")
+    if df_hyperparameter is None:
+        df_hyperparameter = read_table(s3, config["bucket"], table_key, output_tables["hyperparam_info.csv"])
+        df_hyperparameter = df_hyperparameter[df_hyperparameter["run_id"] == run_id].copy()
+
+    # overwrite the min_support written by the setup step
+    for column in ["min_support", "estimated_nb_itemsets", "estimated_peak_memory_mb", "estimated_runtime_s"]:
+        df_hyperparameter[column] = dc_most_frequent_sets.kpis[column][0]
+
+    # replace the part of the run
+    append_to_table(df_hyperparameter, config["bucket"], table_key, f"run_id={run_id}")
+
+    return True
+
+
+@timed
+def get_names_for_set(
+    dc_most_frequent_sets: SetMiningResults,
+    dc_meta_data: MetaData,
+    description_columns: Optional[Dict[str, str]] = None,
+) -> SetMiningResults:
     """Each frequent set could be composed out of one to many events. To have a more user-friendly model output,
-        this function extracts the event name for each event that is part of a frequent item-set.
+        this function extracts the event name for each event that is part of a frequent item-set. The names are
+        looked up in an index of the meta data for all events of all item-sets at once.
 
     Args:
         dc_most_frequent_sets: DataClass containing most frequent item-sets discovered by the algorithm
         dc_meta_data: The german and english name for all events
+        description_columns: Mapping of the output column to the column of the meta data containing the names,
+                             by default the german name is written to 'itemsets_desc'
 
-    Returns: Frequent item sets enriched with the event names
+    Returns: Frequent item sets enriched with the event names, None for events without meta data
 
     """
+    if description_columns is None:
+        description_columns = {"itemsets_desc": "event_description_de"}
+
     # Get Data from DataClass
     df_freq_itemsets = dc_most_frequent_sets.fpgrowth
-    df_event_names = dc_meta_data.data
-
-    def get_event_name(set_events):
-        ls_names = []
-        for event in set_events:
-            try:
-                name = df_event_names.loc[df_event_names.event_id == event]["event_description_de"].values[0]
-            except IndexError:
-                name = None
-            ls_names.append(name)
-        return ls_names
+    df_event_names = dc_meta_data.data.drop_duplicates(subset=["event_id"], keep="first").set_index("event_id")
+
+    # one row per event of each item-set, the index refers to the item-set
+    events = df_freq_itemsets["itemsets"].explode()
+    flag_known_event = events.isin(df_event_names.index)
 
     # get name of each event
-    df_freq_itemsets["itemsets_desc"] = df_freq_itemsets["itemsets"].apply(get_event_name)
+    for column_desc, column_meta_data in description_columns.items():
+        names = events.map(df_event_names[column_meta_data]).astype(object)
+        names[~flag_known_event] = None
+        df_freq_itemsets[column_desc] = names.groupby(level=0).agg(list).reindex(df_freq_itemsets.index)
 
     # Update data from DataClass
     dc_most_frequent_sets.fpgrowth = df_freq_itemsets
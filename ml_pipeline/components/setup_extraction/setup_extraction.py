@@ -87,6 +87,7 @@ setup_extraction_op = func_to_container_op(
     modules_to_capture=[
         "ml_pipeline.components.setup_extraction.setup_extraction",
         "ml_pipeline.util.util",
+        "ml_pipeline.util.s3util",
     ],
     base_image="python:3.8",
     packages_to_install=[
@@ -94,5 +95,6 @@ setup_extraction_op = func_to_container_op(
         "boto3",
         "cloudpickle",
         "cloudpathlib",
+        "pyarrow",
     ],
 )
@@ -67,6 +67,8 @@ def setup_pipeline(
     update_config(config, input_data=input_data, output_data=output_data, params=params)
     timestamp = datetime.now().strftime("%Y_%m_%d-%H_%M")
     data_scope_param1, data_scope_param2, date_range = data_scope_dir.split("/")
+    # recurring runs of the same data scope share e.g. the state of the incremental set mining
+    common["data_scope"] = f"{data_scope_param1}/{data_scope_param2}"
     start_date, end_date = date_range.split("_")
 
     # blank output files for each execution
@@ -113,6 +115,7 @@ setup_pipeline_op = func_to_container_op(
         "ml_pipeline.components.setup_pipeline.setup_pipeline",
         "ml_pipeline.components.setup_pipeline.steps",
         "ml_pipeline.util.util",
+        "ml_pipeline.util.tables",
         "ml_pipeline.util.s3util",
         "data.result_files",
         "config.config",
@@ -124,5 +127,6 @@ setup_pipeline_op = func_to_container_op(
         "boto3",
         "cloudpickle",
         "cloudpathlib",
+        "pyarrow",
     ],
 )
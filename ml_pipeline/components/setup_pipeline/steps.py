@@ -1,7 +1,7 @@
-import boto3
 import pandas as pd
 
-from ml_pipeline.util.util import load_data_s3, upload_data_s3, check_columns
+from ml_pipeline.util.s3util import get_s3_resource
+from ml_pipeline.util.tables import append_to_table
 from config.config import SetupPipelineConfig, PipelineConfigTuple
 
 pipeline_names = {
@@ -33,14 +33,6 @@ def upload_runinfo_to_output_tables(
 
     Returns: True if upload was successful
     """
-    # load current table
-    s3 = boto3.resource("s3")
-    df_run_info = load_data_s3(
-        s3,
-        config["bucket"],
-        config["dir_pipeline_output"] + config["output_data"]["run_info"],
-    )
-
     # append new run info
     run_info = {
         "run_id": run_id,
@@ -51,13 +43,14 @@ def upload_runinfo_to_output_tables(
         "flag_successful_run": False,
         "kf_run_id": kf_run_id,
     }
-    # Concate df_run_info with new run_info
+    # upload the run info as a part of its own instead of rewriting the whole table
     new_df = pd.DataFrame(run_info, index=[0])
-    check_columns(df_run_info, new_df)
-    df_run_info = pd.concat([df_run_info, new_df], ignore_index=True)
-
-    # upload updated table
-    upload_data_s3(df_run_info, config["bucket"], config["dir_pipeline_output"] + config["output_data"]["run_info"])
+    append_to_table(
+        new_df,
+        config["bucket"],
+        config["dir_pipeline_output"] + config["output_data"]["run_info"],
+        f"kf_run_id={kf_run_id}/run_id={run_id}",
+    )
 
     return True
 
@@ -83,14 +76,6 @@ def upload_hyperparam_to_output_tables(
     Returns: True if upload was successful
 
     """
-    # load current table
-    s3 = boto3.resource("s3")
-    df_hyperparameter = load_data_s3(
-        s3,
-        config.setup_pipeline["bucket"],
-        config.setup_pipeline["dir_pipeline_output"] + config.setup_pipeline["output_data"]["hyperparam_info"],
-    )
-
     # append new run hyperparameter
     used_hyperparameter = {
         "run_id": run_id,
@@ -105,17 +90,20 @@ def upload_hyperparam_to_output_tables(
         "clustering_approach": config.feature_engineering["params"]["clustering_approach"],
         "window_length": config.feature_engineering["params"]["window_length"],
         "min_support": config.set_mining["params"]["min_support"],
+        "min_support_mode": config.set_mining["params"]["min_support_mode"],
+        "min_support_sweep": ";".join(str(ms) for ms in sorted(set(config.set_mining["params"]["min_support_sweep"]))),
+        # filled by the set mining step if the min support is chosen adaptively
+        "estimated_nb_itemsets": None,
+        "estimated_peak_memory_mb": None,
+        "estimated_runtime_s": None,
     }
-    # concate df_run_info with new run_info
+    # upload the hyperparameter as a part of its own instead of rewriting the whole table
     new_df = pd.DataFrame(used_hyperparameter, index=[0])
-    check_columns(df_hyperparameter, new_df)
-    df_hyperparameter = pd.concat([df_hyperparameter, new_df], ignore_index=True)
-
-    # upload updated table
-    upload_data_s3(
-        df_hyperparameter,
+    append_to_table(
+        new_df,
         config.setup_pipeline["bucket"],
         config.setup_pipeline["dir_pipeline_output"] + config.setup_pipeline["output_data"]["hyperparam_info"],
+        f"run_id={run_id}",
     )
 
     return True
@@ -134,7 +122,7 @@ def check_data_scope(
     :return:
     """
     # Check if Glue job already extracted data with the given data scope
-    s3 = boto3.resource("s3")
+    s3 = get_s3_resource()
     bucket_s3 = s3.Bucket(bucket)
     s3_dir_extraction = location_s3 + data_scope_dir
     files_in_s3 = [file.key for file in bucket_s3.objects.filter(Prefix=s3_dir_extraction)]
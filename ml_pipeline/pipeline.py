@@ -11,6 +11,7 @@ from ml_pipeline.components.preprocessing.preprocessing import preprocessing_op
 from ml_pipeline.components.feature_engineering.feature_engineering import feature_engineering_op
 from ml_pipeline.components.set_mining.set_mining import set_mining_op
 from ml_pipeline.components.exit_handler.exit_handler import exit_handler_op
+from ml_pipeline.components.compaction.compaction import compaction_op
 from config.config import GLUE_OP_VERSION, ExtractionConfig, GlueDefaultConfig, account
 from config.util import load_config, config_to_dict
 from config.config_data_extraction import EventHistoryExtraction
@@ -178,6 +179,22 @@ def ml_pipeline(
         return True
 
 
+@pipeline(name=f"{pipeline_title} Compaction")
+def compaction_pipeline() -> bool:
+    """
+    Merges the parts of the shared output tables (run_info, hyperparam_info, error_logs). Scheduled as a recurring
+    run of its own with at most one concurrent run, so the runs of ml_pipeline only append parts.
+    """
+    bucket = account.data_bucket_name
+    pipeline_out = ""
+
+    compaction_step = compaction_op(bucket=bucket, pipeline_out=pipeline_out)
+    compaction_step.set_display_name("Compaction")
+    logging.info("Compaction Step added to the pipeline")
+
+    return True
+
+
 if __name__ == "__main__":
     client = Client(account)
     submit_to_kubeflow(
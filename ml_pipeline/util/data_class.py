@@ -1,6 +1,122 @@
 from dataclasses import dataclass
+import io
+import numpy as np
 import pandas as pd
-from typing import List, Union
+from typing import List, Sequence, Union
+
+
+@dataclass
+class EventSequences:
+    """Integer coded event sequences in CSR layout. The events of sequence i are
+    vocabulary[values[offsets[i]:offsets[i + 1]]]."""
+
+    vocabulary: np.ndarray
+    offsets: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def to_strings(self) -> List[str]:
+        """comma separated event ids of each sequence, as used by the output tables"""
+        tokens = self.vocabulary.astype(str)[self.values]
+        return [",".join(tokens[start:end]) for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def to_lists(self) -> List[list]:
+        events = self.vocabulary[self.values].tolist()
+        return [events[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def to_onehot(self, codes: bool = False) -> pd.DataFrame:
+        """boolean matrix with one row per sequence and one column per event that appears in any sequence, the
+        columns are named by the event ids or, with codes=True, by the event codes"""
+        onehot = np.zeros((len(self), len(self.vocabulary)), dtype=bool)
+        onehot[np.repeat(np.arange(len(self)), self.lengths), self.values] = True
+        used = np.flatnonzero(onehot.any(axis=0))
+        return pd.DataFrame(onehot[:, used], columns=(used if codes else self.vocabulary[used]).tolist())
+
+    def take(self, rows: Sequence[int]) -> "EventSequences":
+        rows = np.asarray(rows, dtype="int64")
+        lengths = self.lengths[rows]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype("int64")
+        positions = np.repeat(self.offsets[rows] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return EventSequences(vocabulary=self.vocabulary, offsets=offsets, values=self.values[positions])
+
+    @staticmethod
+    def from_lists(sequences: List[list]) -> "EventSequences":
+        lengths = [len(sequence) for sequence in sequences]
+        codes, vocabulary = pd.factorize(pd.Series([event for sequence in sequences for event in sequence]), sort=True)
+        return EventSequences(
+            vocabulary=np.asarray(vocabulary),
+            offsets=np.concatenate([[0], np.cumsum(lengths, dtype="int64")]).astype("int64"),
+            values=codes.astype("int32"),
+        )
+
+    @staticmethod
+    def concat(parts: List["EventSequences"]) -> "EventSequences":
+        vocabulary = np.unique(np.concatenate([part.vocabulary for part in parts]))
+        values = [np.searchsorted(vocabulary, part.vocabulary).astype("int32")[part.values] for part in parts]
+        lengths = [part.lengths for part in parts]
+        offsets = np.concatenate([[0], np.cumsum(np.concatenate(lengths))]).astype("int64")
+        return EventSequences(vocabulary=vocabulary, offsets=offsets, values=np.concatenate(values))
+
+    def to_npz(self) -> bytes:
+        buffer = io.BytesIO()
+        vocabulary = self.vocabulary.astype(str) if self.vocabulary.dtype == object else self.vocabulary
+        np.savez_compressed(buffer, vocabulary=vocabulary, offsets=self.offsets, values=self.values)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_npz(npz: dict) -> "EventSequences":
+        return EventSequences(vocabulary=npz["vocabulary"], offsets=npz["offsets"], values=npz["values"])
+
+
+@dataclass
+class ItemsetState:
+    """Support counts of the frequent itemsets and their negative border (one itemset per row of itemsets), together
+    with the unique sequences and their multiplicity they were counted on. Both share the vocabulary of sequences."""
+
+    sequences: EventSequences
+    weights: np.ndarray
+    itemsets: EventSequences
+    counts: np.ndarray
+    min_support: float
+
+    @property
+    def nb_transactions(self) -> int:
+        return int(self.weights.sum())
+
+    def to_npz(self) -> bytes:
+        buffer = io.BytesIO()
+        vocabulary = self.sequences.vocabulary
+        np.savez_compressed(
+            buffer,
+            vocabulary=vocabulary.astype(str) if vocabulary.dtype == object else vocabulary,
+            offsets=self.sequences.offsets,
+            values=self.sequences.values,
+            weights=self.weights,
+            itemset_offsets=self.itemsets.offsets,
+            itemset_values=self.itemsets.values,
+            counts=self.counts,
+            min_support=self.min_support,
+        )
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_npz(npz: dict) -> "ItemsetState":
+        vocabulary = npz["vocabulary"]
+        return ItemsetState(
+            sequences=EventSequences(vocabulary=vocabulary, offsets=npz["offsets"], values=npz["values"]),
+            weights=npz["weights"],
+            itemsets=EventSequences(
+                vocabulary=vocabulary, offsets=npz["itemset_offsets"], values=npz["itemset_values"]
+            ),
+            counts=npz["counts"],
+            min_support=float(npz["min_support"]),
+        )
 
 
 @dataclass
@@ -9,6 +125,7 @@ class EventHistory:
     occurrence_each_event: Union[pd.DataFrame, None]
     sequences: Union[pd.DataFrame, None]
     kpis: dict
+    sequences_csr: Union[EventSequences, None] = None
 
 
 @dataclass
@@ -21,6 +138,7 @@ class KnownPattern:
 class SetMiningResults:
     fpgrowth: Union[pd.DataFrame, None]
     kpis: dict
+    rules: Union[pd.DataFrame, None] = None
 
 
 @dataclass
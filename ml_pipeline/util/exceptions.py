@@ -1,10 +1,10 @@
 import sys
 import logging
 import pandas as pd
-import boto3
 from os import environ
 
-from ml_pipeline.util.util import is_debug_mode, upload_data_s3, load_data_s3, check_columns
+from ml_pipeline.util.tables import append_to_table
+from ml_pipeline.util.util import is_debug_mode
 
 logger = logging.getLogger("set_mining")
 
@@ -31,9 +31,6 @@ class NoDataToProcess(Exception):
             self.message = message
             return
 
-        # load current table
-        df_error_logs = load_data_s3(boto3.resource("s3"), bucket, path)
-
         # Store the error message with the run id to temp S3 file
         data = {
             "kf_run_id": [kf_run_id],
@@ -42,13 +39,9 @@ class NoDataToProcess(Exception):
             "error_msg": [message],
         }
 
-        # Concat df_run_info with new run_info
+        # upload the error message as a part of its own instead of rewriting the whole table
         new_df = pd.DataFrame(data=data)
-        check_columns(df_error_logs, new_df)
-        df_error_logs = pd.concat([df_error_logs, new_df], ignore_index=True)
-
-        # upload updated table
-        upload_data_s3(df_error_logs, bucket, path)
+        append_to_table(new_df, bucket, path, f"kf_run_id={kf_run_id}/run_id={run_id}/{pipeline_step}")
 
         # Log the error to kubeflow console and exit the python programm
         logger.error(message)
@@ -0,0 +1,204 @@
+import io
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import boto3
+import pandas as pd
+from botocore.config import Config
+from cloudpathlib import CloudPath
+
+S3_REGION = "eu-west-1"
+S3_MAX_POOL_CONNECTIONS = 32
+
+# one connection pool per process, throttled requests are retried with client side rate limiting
+s3_config = Config(
+    region_name=S3_REGION,
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    tcp_keepalive=True,
+)
+
+# parts of multipart uploads, s3 requires at least 5 MiB for all but the last part
+MULTIPART_PART_SIZE = 8 * 2**20
+MULTIPART_MIN_PART_SIZE = 5 * 2**20
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _get_session() -> boto3.session.Session:
+    return boto3.session.Session(region_name=S3_REGION)
+
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """
+    s3 client shared by the whole process. Clients are thread safe, so it can be used from thread pools as well
+    """
+    return _get_session().client("s3", config=s3_config)
+
+
+def get_s3_resource():
+    """
+    s3 resource shared by all calls of the current thread (resources are not thread safe)
+    """
+    if getattr(_local, "resource", None) is None:
+        _local.resource = _get_session().resource("s3", config=s3_config)
+    return _local.resource
+
+
+def reset_s3_clients():
+    """
+    drops the cached session, client and resources, e.g. after a fork or when the credentials changed
+    """
+    _get_session.cache_clear()
+    get_s3_client.cache_clear()
+    _local.resource = None
+
+
+# sessions and connection pools must not be shared with forked worker processes
+os.register_at_fork(after_in_child=reset_s3_clients)
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    binary file-like object that uploads everything written to it as a multipart upload, so that at most one part
+    is held in memory. Objects smaller than one part are uploaded with a single put. Used as context manager, the
+    upload is completed on exit and aborted if an exception was raised.
+    """
+
+    def __init__(self, bucket: str, key: str, part_size: int = MULTIPART_PART_SIZE, client=None):
+        super().__init__()
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MULTIPART_MIN_PART_SIZE)
+        self.client = get_s3_client() if client is None else client
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={"Parts": self._parts}
+                )
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self):
+        """discards everything written so far, no object is created"""
+        if self._upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _upload_part(self, body: bytes):
+        if self._upload_id is None:
+            self._upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+        part_number = len(self._parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=part_number, Body=body
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+
+class S3RangeReader(io.RawIOBase):
+    """
+    seekable binary file-like object on an s3 object that only downloads the byte ranges that are read, e.g. the
+    footer and the selected column chunks of a parquet file
+    """
+
+    def __init__(self, bucket: str, key: str, client=None):
+        super().__init__()
+        self.bucket = bucket
+        self.key = key
+        self.client = get_s3_client() if client is None else client
+        self.size = self.client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence {whence}")
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self.size)
+        if end <= self._position:
+            return 0
+        data = self.client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={self._position}-{end - 1}")[
+            "Body"
+        ].read()
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def upload_result_files(location: CloudPath):
+    """utility function to upload data/result_files to a specified s3 location. Can only be called locally"""
+    result_files_folder = Path(__file__).parent.parent.parent / "data/result_files"
+    assert result_files_folder.exists(), "can't upload output files: data/result_files/ not found"
+
+    for file in result_files_folder.iterdir():
+        (location / file.name).upload_from(file, force_overwrite_to_cloud=True)
+
+
+def copy_result_files(location: CloudPath, origin: CloudPath = None):
+    """utility function to copy template data/result_files to another s3 location, by default the local templates
+    are uploaded"""
+    if origin is None:
+        upload_result_files(location)
+        return
+    for file in origin.iterdir():
+        file.copy(location / file.name, force_overwrite_to_cloud=True)
+
+
+def read_s3_csv(file: CloudPath):
+    assert file.exists(), f"{file} not found!"
+    return pd.read_csv(io.StringIO(file.read_text()))
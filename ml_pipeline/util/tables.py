@@ -0,0 +1,300 @@
+import os
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from ml_pipeline.util.s3util import S3RangeReader, get_s3_resource
+from ml_pipeline.util.util import load_data_s3, upload_data_s3
+
+logger = logging.getLogger("set_mining")
+
+# shared output tables that are written in parts and the columns identifying a row (None: every row is kept)
+output_tables = {
+    "run_info.csv": ["run_id"],
+    "hyperparam_info.csv": ["run_id"],
+    "error_logs.csv": None,
+}
+
+# directory next to the parts that holds the snapshots written by the compaction, and the columns of a snapshot
+# naming the part and the version of the part each row was written in
+snapshot_directory = "_snapshots"
+source_columns = ["_part", "_part_modified"]
+
+# partitions of the result tables, in the order of the directories
+result_partitions = ["date", "kf_run_id", "data_scope"]
+
+# result tables written by the data scopes, which are gathered even if pipeline_out has no template for them
+result_tables = ["association_rules.csv"]
+
+
+def get_part_key(table_key: str, part_id: str) -> str:
+    """Key of one part of a table, e.g. 'out/run_info.csv', 'run_id=1' -> 'out/run_info/run_id=1.csv'"""
+    stem, extension = os.path.splitext(table_key)
+    return f"{stem}/{part_id}{extension}"
+
+
+def append_to_table(df: pd.DataFrame, bucket: str, table_key: str, part_id: str) -> str:
+    """
+    appends the rows to a table by writing them as a part of their own, so that the table is never downloaded and
+    concurrent writers with different part ids can not overwrite each other. Writing the same part id again replaces
+    the rows of that part.
+    """
+    part_key = get_part_key(table_key, part_id)
+    upload_data_s3(df, bucket, part_key)
+    return part_key
+
+
+def load_table_part(s3: Any, bucket: str, table_key: str, part_id: str) -> Optional[pd.DataFrame]:
+    """
+    loads the rows of one part of a table, None if the part does not exist (e.g. it was merged by the compaction)
+    """
+    part_key = get_part_key(table_key, part_id)
+    if not _exists(s3, bucket, part_key):
+        return None
+    return load_data_s3(s3, bucket, part_key)
+
+
+def read_table(s3: Any, bucket: str, table_key: str, key_columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    assembles the logical table out of the table before the partitioning, the snapshots of the compactions and all
+    parts written since. The rows of a part are taken once, from the latest version of the part, even if concurrent
+    compactions merged it into several snapshots. If key_columns are given, rows of newer parts replace the rows with
+    the same key of the table or of older parts.
+    """
+    frames = [load_data_s3(s3, bucket, table_key)] if _exists(s3, bucket, table_key) else []
+    sources = _load_sources(s3, bucket, _list_snapshots(s3, bucket, table_key), _list_parts(s3, bucket, table_key))
+    if sources is not None:
+        frames.append(sources.drop(columns=source_columns))
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    if key_columns is not None:
+        df = df.drop_duplicates(subset=key_columns, keep="last", ignore_index=True)
+    return df
+
+
+def compact_table(s3: Any, bucket: str, table_key: str, key_columns: Optional[List[str]] = None) -> int:
+    """
+    merges the snapshots and parts of a table into a new, immutable snapshot and deletes the merged objects
+    afterwards. The table before the partitioning is never rewritten. Every row keeps the part it was written in, so
+    compactions running at the same time can not lose rows: each writes a snapshot of its own, and parts merged by
+    both are read once by read_table until the next compaction merges the snapshots. Parts written or replaced while
+    the compaction runs are kept and merged by the next compaction.
+
+    :return: number of merged parts
+    """
+    snapshots = _list_snapshots(s3, bucket, table_key)
+    parts = _list_parts(s3, bucket, table_key)
+    if not parts and len(snapshots) <= 1:
+        return 0
+
+    df = _load_sources(s3, bucket, snapshots, parts)
+    if key_columns is not None:
+        df = df.drop_duplicates(subset=key_columns, keep="last", ignore_index=True)
+    stem, extension = os.path.splitext(table_key)
+    snapshot_key = f"{stem}/{snapshot_directory}/{datetime.utcnow():%Y%m%dT%H%M%S%f}_{uuid.uuid4().hex}{extension}"
+    upload_data_s3(df, bucket, snapshot_key)
+
+    # snapshots are immutable, of the parts only the version that was read is deleted
+    etags = {part.key: part.e_tag for part in parts}
+    merged = [part for part in _list_parts(s3, bucket, table_key) if etags.get(part.key) == part.e_tag]
+    keys = [snapshot.key for snapshot in snapshots] + [part.key for part in merged]
+    for i in range(0, len(keys), 1000):
+        s3.Bucket(bucket).delete_objects(
+            Delete={"Objects": [{"Key": key} for key in keys[i : i + 1000]], "Quiet": True}
+        )
+    logger.info(f"compacted {len(merged)} parts and {len(snapshots)} snapshots into {snapshot_key}")
+
+    return len(merged)
+
+
+def get_result_partition_key(table_key: str, partitions: Dict[str, str], file_name: str) -> str:
+    """Key of a file of a partitioned result table, e.g. 'out/rules.csv', {'date': '2023-01-02', 'kf_run_id': 'a'},
+    'part.parquet' -> 'out/rules/date=2023-01-02/kf_run_id=a/part.parquet'. The values are url encoded, so data scopes
+    like 'p1/p2/period' stay one directory."""
+    stem, _ = os.path.splitext(table_key)
+    directories = "".join(f"{name}={quote(str(value), safe='')}/" for name, value in partitions.items())
+    return f"{stem}/{directories}{file_name}"
+
+
+def read_result_table(
+    s3: Any,
+    bucket: str,
+    table_key: str,
+    kf_run_ids: Optional[List[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    data_scopes: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+    n_workers: int = 8,
+) -> pd.DataFrame:
+    """
+    reads a result table that is partitioned by date, kf_run_id and data_scope. Only the files of the selected runs,
+    dates (inclusive, 'YYYY-MM-DD') and data scopes are downloaded, compacted files are filtered by their data_scope
+    column. The partition values are added as columns. The rows of the table before the partitioning are part of
+    the result if no partition is selected.
+    """
+    selected = {
+        "kf_run_id": None if kf_run_ids is None else set(kf_run_ids),
+        "data_scope": None if data_scopes is None else set(data_scopes),
+    }
+
+    def is_selected(partitions: Dict[str, str]) -> bool:
+        for name, values in selected.items():
+            if values is not None and name in partitions and partitions[name] not in values:
+                return False
+        date = partitions.get("date")
+        return (start_date is None or date >= start_date) and (end_date is None or date <= end_date)
+
+    parts = [(part.key, partitions) for part, partitions in _list_result_parts(s3, bucket, table_key)]
+    parts = [(key, partitions) for key, partitions in parts if is_selected(partitions)]
+    if all(values is None for values in [kf_run_ids, start_date, end_date, data_scopes]):
+        if _exists(s3, bucket, table_key):
+            parts.insert(0, (table_key, {}))
+
+    def load(part: Tuple[str, Dict[str, str]]) -> pd.DataFrame:
+        return _load_result_part(bucket, part[0], part[1], columns, data_scopes)
+
+    with ThreadPoolExecutor(n_workers) as executor:
+        frames = list(executor.map(load, parts))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def compact_result_table(s3: Any, bucket: str, table_key: str, kf_run_ids: Optional[List[str]] = None) -> int:
+    """
+    merges the files of each run of a partitioned result table into one parquet file with a data_scope column,
+    sorted by data scope. Runs that consist of a single compacted file already are skipped.
+
+    :param kf_run_ids: runs to compact, by default all runs
+    :return: number of merged files
+    """
+    runs = {}
+    for part, partitions in _list_result_parts(s3, bucket, table_key):
+        if "kf_run_id" in partitions and (kf_run_ids is None or partitions["kf_run_id"] in kf_run_ids):
+            runs.setdefault((partitions["date"], partitions["kf_run_id"]), []).append((part, partitions))
+
+    nb_merged = 0
+    for (date, kf_run_id), parts in runs.items():
+        if len(parts) == 1 and parts[0][0].key.endswith(".parquet"):
+            continue
+        # csv files of the data scopes get their data scope as column, compacted files have it already
+        frames = [
+            _load_result_part(bucket, part.key, {"data_scope": partitions.get("data_scope")}, None, None)
+            for part, partitions in parts
+        ]
+        df = pd.concat(frames, ignore_index=True).sort_values("data_scope", kind="stable", ignore_index=True)
+        compacted_key = get_result_partition_key(table_key, {"date": date, "kf_run_id": kf_run_id}, "part.parquet")
+        upload_data_s3(df, bucket, compacted_key)
+
+        # only delete the files that were merged in the version that was read
+        etags = {part.key: part.e_tag for part, _ in parts if part.key != compacted_key}
+        prefix = os.path.dirname(compacted_key) + "/"
+        merged = [
+            part for part in s3.Bucket(bucket).objects.filter(Prefix=prefix) if etags.get(part.key) == part.e_tag
+        ]
+        for i in range(0, len(merged), 1000):
+            s3.Bucket(bucket).delete_objects(
+                Delete={"Objects": [{"Key": part.key} for part in merged[i : i + 1000]], "Quiet": True}
+            )
+        nb_merged += len(merged)
+        logger.info(f"compacted {len(merged)} files of run {kf_run_id} into {compacted_key}")
+
+    return nb_merged
+
+
+def _list_result_parts(s3: Any, bucket: str, table_key: str) -> List[Tuple[Any, Dict[str, str]]]:
+    """files of a partitioned result table with their partition values"""
+    stem, _ = os.path.splitext(table_key)
+    parts = []
+    for part in s3.Bucket(bucket).objects.filter(Prefix=stem + "/"):
+        directories = part.key[len(stem) + 1 :].split("/")[:-1]
+        partitions = dict(directory.split("=", 1) for directory in directories if "=" in directory)
+        if set(partitions) <= set(result_partitions) and "date" in partitions:
+            parts.append((part, {name: unquote(value) for name, value in partitions.items()}))
+    return parts
+
+
+def _load_result_part(
+    bucket: str,
+    data_key: str,
+    partitions: Dict[str, str],
+    columns: Optional[List[str]],
+    data_scopes: Optional[List[str]],
+) -> pd.DataFrame:
+    """loads a file of a result table and adds its partition values as columns"""
+    file_columns = None if columns is None else [column for column in columns if column not in result_partitions]
+    if data_key.endswith(".parquet"):
+        # compacted files hold the data scope as column, sorted so that row groups of other scopes are skipped
+        s3 = get_s3_resource()
+        schema_columns = pq.ParquetFile(S3RangeReader(bucket, data_key, s3.meta.client)).schema_arrow.names
+        read_columns = None if columns is None else [column for column in columns if column in schema_columns]
+        filters = None if data_scopes is None else [("data_scope", "in", list(data_scopes))]
+        df = pq.read_table(
+            S3RangeReader(bucket, data_key, s3.meta.client), columns=read_columns, filters=filters
+        ).to_pandas()
+    else:
+        # resources are not thread safe, every thread of the pool uses its own
+        df = load_data_s3(get_s3_resource(), bucket, data_key, columns=file_columns)
+    for name, value in partitions.items():
+        if name not in df.columns and (columns is None or name in columns):
+            df[name] = value
+    return df
+
+
+def _load_sources(s3: Any, bucket: str, snapshots: list, parts: list) -> Optional[pd.DataFrame]:
+    """
+    rows of the snapshots and parts with the key and version of the part they were written in, in the order the
+    parts were written. Rows of a part that was merged into several snapshots are taken from one of them, the one
+    with the latest version of the part.
+    """
+    frames = [load_data_s3(s3, bucket, snapshot.key) for snapshot in snapshots]
+    frames += [
+        load_data_s3(s3, bucket, part.key).assign(_part=part.key, _part_modified=part.last_modified.isoformat())
+        for part in parts
+    ]
+    if not frames:
+        return None
+
+    df = pd.concat([frame.assign(_holder=i) for i, frame in enumerate(frames)], ignore_index=True)
+    latest = (
+        df[["_part", "_part_modified", "_holder"]]
+        .drop_duplicates()
+        .sort_values(["_part_modified", "_holder"])
+        .drop_duplicates("_part", keep="last")
+    )
+    is_latest = pd.MultiIndex.from_frame(df[["_part", "_holder"]]).isin(
+        pd.MultiIndex.from_frame(latest[["_part", "_holder"]])
+    )
+    df = df[is_latest].sort_values("_part_modified", kind="stable", ignore_index=True)
+    return df.drop(columns="_holder")
+
+
+def _list_snapshots(s3: Any, bucket: str, table_key: str) -> list:
+    """snapshots of a table in the order they were written"""
+    stem, _ = os.path.splitext(table_key)
+    snapshots = s3.Bucket(bucket).objects.filter(Prefix=f"{stem}/{snapshot_directory}/")
+    return sorted(snapshots, key=lambda snapshot: snapshot.key)
+
+
+def _list_parts(s3: Any, bucket: str, table_key: str) -> list:
+    """parts of a table in the order they were written"""
+    stem, extension = os.path.splitext(table_key)
+    parts = [
+        part
+        for part in s3.Bucket(bucket).objects.filter(Prefix=stem + "/")
+        if part.key.endswith(extension) and not part.key.startswith(f"{stem}/{snapshot_directory}/")
+    ]
+    return sorted(parts, key=lambda part: (part.last_modified, part.key))
+
+
+def _exists(s3: Any, bucket: str, data_key: str) -> bool:
+    return any(file.key == data_key for file in s3.Bucket(bucket).objects.filter(Prefix=data_key))
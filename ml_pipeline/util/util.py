@@ -3,17 +3,29 @@ import os
 import json
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from datetime import datetime, timedelta
 from pathlib import PurePosixPath, Path
-from typing import Any, Dict, Union
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
-import boto3
-from cloudpathlib import S3Path, CloudPath
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from ml_pipeline.util.s3util import S3MultipartWriter, S3RangeReader, get_s3_client, get_s3_resource
 
 logger = logging.getLogger("set_mining")
 
+# rows per chunk when encoding tables for the upload
+UPLOAD_CHUNKSIZE = 100_000
+# compression of a file by its last extension, e.g. 'sequences.csv.gz'
+compressions = {".gz": "gzip", ".zst": "zstd"}
+# keys per delete request, the maximum of s3
+DELETE_BATCH_SIZE = 1000
+
 
 def load_data_local(path) -> Union[pd.DataFrame, None]:
     path = (Path(__file__).parent.parent.parent / path).resolve()
@@ -30,30 +42,119 @@ def load_data_local(path) -> Union[pd.DataFrame, None]:
     return data
 
 
-def load_data_s3(s3: Any, bucket: str, data_key) -> pd.DataFrame:
+def load_data_s3(
+    s3: Any,
+    bucket: str,
+    data_key,
+    columns: Optional[List[str]] = None,
+    row_groups: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """
+    loads a file from s3 depending on its extension. For tables only the given columns are parsed and for parquet
+    files only the given row groups are read. CSV files are parsed while they are downloaded and only the footer and
+    the selected column chunks of parquet files are downloaded.
+    """
     obj = s3.Object(bucket, data_key)
-    _, extension = os.path.splitext(data_key)
+    extension, compression = _split_extension(data_key)
     if extension == ".csv":
-        df = pd.read_csv(io.BytesIO(obj.get()["Body"].read()), sep=",")
+        df = pd.read_csv(_open_input_stream(obj, compression), sep=",", usecols=columns)
+    elif extension == ".parquet":
+        parquet_file = pq.ParquetFile(S3RangeReader(bucket, data_key, s3.meta.client), pre_buffer=True)
+        if row_groups is None:
+            df = parquet_file.read(columns=columns).to_pandas()
+        else:
+            df = parquet_file.read_row_groups(row_groups, columns=columns).to_pandas()
+    elif extension in (".arrow", ".feather"):
+        df = feather.read_table(S3RangeReader(bucket, data_key, s3.meta.client), columns=columns).to_pandas()
     elif extension == ".xlsx":
         df = pd.read_excel(io.BytesIO(obj.get()["Body"].read()))
+    elif extension == ".npz":
+        with np.load(io.BytesIO(obj.get()["Body"].read())) as npz:
+            df = dict(npz)
+    elif extension == ".json":
+        df = json.loads(obj.get()["Body"].read())
     else:
         df = None
     return df
 
 
-def upload_data_s3(data: Union[dict, pd.DataFrame, str, bytes], bucket: str, data_key: str):
-    buffer = io.StringIO()
-    boto3.setup_default_session(region_name="eu-west-1")
-    s3 = boto3.resource("s3")
-    _, extension = os.path.splitext(data_key)
+def load_data_s3_chunked(s3: Any, bucket: str, data_key: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    streams a csv or parquet file from s3 and yields it in DataFrames of at most chunksize rows
+    """
+    obj = s3.Object(bucket, data_key)
+    extension, compression = _split_extension(data_key)
     if extension == ".csv":
-        data.to_csv(buffer, index=False, sep=",")
-        s3.Object(bucket, data_key).put(Body=buffer.getvalue())
+        with pd.read_csv(_open_input_stream(obj, compression), sep=",", chunksize=chunksize) as reader:
+            yield from reader
+    elif extension == ".parquet":
+        parquet_file = pq.ParquetFile(S3RangeReader(bucket, data_key, s3.meta.client))
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"chunked loading is not supported for {extension} files")
+
+
+def _split_extension(data_key: str) -> Tuple[str, Optional[str]]:
+    """extension and compression of a file, e.g. 'sequences.csv.gz' -> ('.csv', 'gzip')"""
+    root, extension = os.path.splitext(data_key)
+    if extension in compressions:
+        return os.path.splitext(root)[1], compressions[extension]
+    return extension, None
+
+
+def _open_input_stream(obj: Any, compression: Optional[str]) -> IO[bytes]:
+    """body of an s3 object as stream, decompressed while it is read"""
+    body = obj.get()["Body"]
+    if compression is None:
+        return body
+    return pa.input_stream(body, compression=compression)
+
+
+def _sets_to_lists(df: pd.DataFrame) -> pd.DataFrame:
+    """arrow has no set type, columns of (frozen)sets like the itemsets are stored as sorted lists"""
+    columns = [
+        column
+        for column in df.columns[df.dtypes == object]
+        if len(df) > 0 and isinstance(df[column].iloc[0], (set, frozenset))
+    ]
+    if not columns:
+        return df
+    return df.assign(**{column: df[column].map(sorted) for column in columns})
+
+
+def upload_data_s3(
+    data: Union[dict, pd.DataFrame, str, bytes], bucket: str, data_key: str, chunksize: int = UPLOAD_CHUNKSIZE
+):
+    """
+    uploads data to s3 depending on the extension of data_key. Tables are encoded in chunks of chunksize rows
+    straight into a multipart upload, so the serialized file is never held in memory as a whole. CSV files are
+    compressed for the extensions .csv.gz and .csv.zst.
+    """
+    extension, compression = _split_extension(data_key)
+    if extension == ".csv":
+        with S3MultipartWriter(bucket, data_key) as file:
+            sink = pa.CompressedOutputStream(file, compression) if compression else file
+            for start in range(0, max(len(data), 1), chunksize):
+                chunk = data.iloc[start : start + chunksize]
+                sink.write(chunk.to_csv(index=False, header=start == 0, sep=",").encode("UTF-8"))
+            sink.close()
+    elif extension == ".parquet":
+        data = _sets_to_lists(data)
+        schema = pa.Schema.from_pandas(data, preserve_index=False)
+        with S3MultipartWriter(bucket, data_key) as file:
+            # each chunk becomes a row group of the parquet file
+            with pq.ParquetWriter(file, schema, compression="zstd") as writer:
+                for start in range(0, len(data), chunksize):
+                    chunk = data.iloc[start : start + chunksize]
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    elif extension in (".arrow", ".feather"):
+        with S3MultipartWriter(bucket, data_key) as file:
+            feather.write_feather(_sets_to_lists(data).reset_index(drop=True), file, compression="zstd")
     elif extension == ".json":
-        s3.Object(bucket, data_key).put(Body=(json.dumps(data).encode("UTF-8")))
+        get_s3_resource().Object(bucket, data_key).put(Body=(json.dumps(data).encode("UTF-8")))
     else:
-        s3.Object(bucket, data_key).put(Body=data)
+        get_s3_resource().Object(bucket, data_key).put(Body=data)
 
 
 def check_columns(s3df: pd.DataFrame, newdf: pd.DataFrame):
@@ -65,22 +166,123 @@ def check_columns(s3df: pd.DataFrame, newdf: pd.DataFrame):
     ), f"dataframe is missing the following columns: {set(s3df.columns) - set(newdf.columns)}"
 
 
-def get_files_in_s3_directory(s3, bucket: str, *subdirs: str, recursive=False, debug=False):
+def get_files_in_s3_directory(
+    s3, bucket: str, *subdirs: str, recursive=False, debug=False, n_workers: int = 1
+) -> List[Any]:
+    """
+    gets all files (not folders!) matching the subdirs prefix, see iter_files_in_s3_directory.
     """
-    gets all files (not folders!) matching the subdirs prefix.
+    return list(
+        iter_files_in_s3_directory(s3, bucket, *subdirs, recursive=recursive, debug=debug, n_workers=n_workers)
+    )
+
+
+def iter_files_in_s3_directory(
+    s3, bucket: str, *subdirs: str, recursive=False, debug=False, n_workers: int = 1
+) -> Iterator[Any]:
+    """
+    lazily yields all files (not folders!) in the subdirs directory, page by page of the listing. Without
+    recursive only the files directly in the directory are listed (delimiter listing) instead of every object below
+    it. With recursive and n_workers > 1 the sub directories of the directory are listed in parallel. The subdirs
+    are a folder in every mode, 'out/a' does not match 'out/ab/'.
     """
-    bucket_s3 = s3.Bucket(bucket)
     p = PurePosixPath()
     for s in subdirs:
         p = p / s.lstrip("/")
-    path = str(p)
-    files = list(filter(lambda f: not f.key.endswith("/"), bucket_s3.objects.filter(Prefix=path)))
-    if debug:
-        print(f"found {len(files)} files in {path}")
-    if recursive:
-        return files
+    path = "" if str(p) == "." else str(p)
+    folder = path + "/" if path else ""
+    client = s3.meta.client
+
+    nb_files = 0
+    if not recursive:
+        listing = (obj for contents, _ in _list_s3_pages(client, bucket, folder, "/") for obj in contents)
+    elif n_workers > 1:
+        listing = _list_s3_prefixes_parallel(client, bucket, folder, n_workers)
     else:
-        return list(filter(lambda f: str(PurePosixPath(f.key).parent) == path, files))
+        listing = (obj for contents, _ in _list_s3_pages(client, bucket, folder) for obj in contents)
+
+    # the resource class is built once, building it for each object costs more than the listing itself
+    object_summary_cls = type(s3.ObjectSummary(bucket, path))
+    for obj in listing:
+        if obj["Key"].endswith("/"):
+            continue
+        nb_files += 1
+        object_summary = object_summary_cls(bucket, obj["Key"], client=client)
+        object_summary.meta.data = obj
+        yield object_summary
+
+    if debug:
+        print(f"found {nb_files} files in {path}")
+
+
+def _list_s3_pages(client, bucket: str, prefix: str, delimiter: Optional[str] = None) -> Iterator[Tuple[list, list]]:
+    """objects and common prefixes of each page of the listing"""
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    if delimiter is not None:
+        kwargs["Delimiter"] = delimiter
+    for page in client.get_paginator("list_objects_v2").paginate(**kwargs):
+        yield page.get("Contents", []), [common_prefix["Prefix"] for common_prefix in page.get("CommonPrefixes", [])]
+
+
+def _list_s3_prefixes_parallel(client, bucket: str, folder: str, n_workers: int) -> Iterator[dict]:
+    """recursive listing, where the top level of the folder is listed once and each sub directory in a thread"""
+    prefixes = []
+    for contents, common_prefixes in _list_s3_pages(client, bucket, folder, "/"):
+        yield from contents
+        prefixes += common_prefixes
+
+    def list_prefix(sub_prefix: str) -> list:
+        return [obj for contents, _ in _list_s3_pages(client, bucket, sub_prefix) for obj in contents]
+
+    with ThreadPoolExecutor(n_workers) as executor:
+        for contents in executor.map(list_prefix, prefixes):
+            yield from contents
+
+
+def delete_s3_prefixes(bucket: str, prefixes: List[str], n_workers: int = 4) -> int:
+    """
+    deletes all objects below the prefixes (folders), e.g. the temporary data of a pipeline run. Each prefix is
+    listed once and every page of the listing is deleted with one delete_objects request of up to 1000 keys, the
+    requests are sent by a small thread pool while the listing continues. Nothing is deleted in debug mode.
+
+    :return: number of deleted objects
+    """
+    if is_debug_mode():
+        logger.info(f"debug mode, keeping {prefixes}")
+        return 0
+
+    # folders only, so that e.g. 'tmp' does not delete 'tmp_out', and nested folders are listed with their parent
+    folders = []
+    for folder in sorted({prefix if prefix == "" or prefix.endswith("/") else prefix + "/" for prefix in prefixes}):
+        if not any(folder.startswith(parent) for parent in folders):
+            folders.append(folder)
+
+    client = get_s3_client()
+
+    def delete_batch(keys: List[str]) -> int:
+        response = client.delete_objects(
+            Bucket=bucket, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        )
+        for error in response.get("Errors", []):
+            logger.error(f"could not delete {error['Key']}: {error.get('Code')} {error.get('Message')}")
+        return len(keys) - len(response.get("Errors", []))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_workers) as executor:
+        futures = [
+            executor.submit(delete_batch, [obj["Key"] for obj in contents[i : i + DELETE_BATCH_SIZE]])
+            for folder in folders
+            for contents, _ in _list_s3_pages(client, bucket, folder)
+            for i in range(0, len(contents), DELETE_BATCH_SIZE)
+        ]
+        nb_deleted = sum(future.result() for future in futures)
+
+    runtime = time.perf_counter() - start
+    logger.info(
+        f"deleted {nb_deleted} objects below {folders} with {len(futures)} requests in {runtime:.2f} seconds"
+        f" ({nb_deleted / max(runtime, 1e-6):.0f} objects/s)"
+    )
+    return nb_deleted
 
 
 def logging_setup(config: Dict):
@@ -198,25 +400,3 @@ def write_spark_df_to_s3(sql_df, bucket, *subdirs: str, mode="overwrite", header
         p = p / s.lstrip("/")
     path = f"s3://{bucket / p}/"
     return sql_df.write.csv(path, mode=mode, header=header)
-
-
-def upload_result_files(location: CloudPath):
-    """utility function to upload data/result_files to a specified s3 location. Can only be called locally"""
-    result_files_folder = Path(__file__).parent.parent.parent / "data/result_files"
-    assert result_files_folder.exists(), "can't upload output files: data/result_files/ not found"
-
-    # print(f"uploading files to {location}")
-    for file in result_files_folder.iterdir():
-        # print(f"uploading {file.name}")
-        (location / file.name).upload_from(file, force_overwrite_to_cloud=True)
-
-
-def copy_result_files(location: CloudPath, origin: CloudPath):
-    """utility function to copy template data/result_files to another s3 location"""
-    for file in origin.iterdir():
-        file.copy(location / file.name, force_overwrite_to_cloud=True)
-
-
-def read_s3_csv(file: CloudPath):
-    assert file.exists(), f"{file} not found!"
-    return pd.read_csv(StringIO(file.read_text()))
@@ -6,6 +6,7 @@ import os
 from pathlib import Path
 import boto3
 import collections
+from moto import mock_s3
 from typing import NamedTuple, List, Any
 
 
@@ -16,13 +17,14 @@ from config.config import (
     SetMiningConfig,
     account,
 )
-from ml_pipeline.components.exit_handler.steps import gather_results
+from ml_pipeline.components.exit_handler.steps import compact_output_tables, gather_results
 from ml_pipeline.components.setup_extraction.setup_extraction import ExtractionOutput
 from ml_pipeline.components.setup_pipeline.setup_pipeline import SetupOutput, setup_pipeline
 from ml_pipeline.components.preprocessing.preprocessing import PreprocessingOutput, preprocessing
 from ml_pipeline.components.feature_engineering.feature_engineering import feature_engineering
 from ml_pipeline.components.set_mining.set_mining import set_mining
 from config.util import config_to_dict, load_config
+from ml_pipeline.util.s3util import reset_s3_clients
 from ml_pipeline.util.data_class import (
     EventHistory,
     KnownPattern,
@@ -65,9 +67,100 @@ def event_history_after_trigger_test():
     )
 
 
+# Fixtures for Feature Engineering Unit tests
+@pytest.fixture
+def event_history_clustering_test():
+    """Fixture to provide a EventHistory instance with the events of two object_a for testing the rolling window."""
+    sample_data = {
+        "object_a": ["A", "A", "A", "A", "B", "B", "B"],
+        "readout_id": [1, 1, 1, 2, 3, 3, 3],
+        "event_id": [10, 11, 12, 10, 11, 12, 13],
+        "id": [10, 11, 12, 10, 11, 12, 13],
+        "snapshot_timestamp_calc": [
+            "2022-01-07T21:30:00.000Z",
+            "2022-01-07T21:30:30.000Z",
+            "2022-01-07T21:31:20.000Z",
+            "2022-01-08T21:31:30.000Z",
+            "2022-01-07T10:00:00.000Z",
+            "2022-01-07T10:00:40.000Z",
+            "2022-01-07T10:00:50.000Z",
+        ],
+        "message_timestamp": [
+            "2022-01-07T21:30:00.000Z",
+            "2022-01-07T21:30:30.000Z",
+            "2022-01-07T21:31:20.000Z",
+            "2022-01-08T21:31:30.000Z",
+            "2022-01-07T10:00:00.000Z",
+            "2022-01-07T10:00:40.000Z",
+            "2022-01-07T10:00:50.000Z",
+        ],
+        "snapshot_systemtime_seconds": [100, 130, 180, 86590, 10, 50, 60],
+        "snapshot_mileage_km": [1.0, 1.01, 1.02, 1.5, 7.0, 7.3, 7.31],
+    }
+    return EventHistory(
+        data=pd.DataFrame(sample_data),
+        kpis=collections.defaultdict(list),
+        occurrence_each_event=None,
+        sequences=None,
+    )
+
+
+# Fixtures for Set Mining Unit tests
+@pytest.fixture
+def event_history_set_mining_test():
+    """Fixture to provide a EventHistory instance with event sequences for testing the set mining."""
+    sample_data = {
+        "object_a": ["A", "A", "A", "B", "B", "C", "C", "D"],
+        "cluster": [0, 1, 2, 0, 1, 0, 1, 0],
+        "event_sequence": [
+            [10, 11, 12],
+            [10, 11],
+            [10, 11, 12, 13],
+            [11, 12],
+            [10, 13],
+            [10, 11],
+            [12, 13],
+            [10, 11, 12],
+        ],
+    }
+    return EventHistory(
+        data=None,
+        kpis=collections.defaultdict(list),
+        occurrence_each_event=None,
+        sequences=pd.DataFrame(sample_data),
+    )
+
+
+@pytest.fixture
+def config_set_mining():
+    """Configuration of the set mining with the default parameters of SetMiningConfig, the tests override only the
+    parameters they are about"""
+    s3_info = {"bucket": "test-bucket", "dir_pipeline_input": "", "dir_pipeline_tmp": "", "dir_pipeline_output": ""}
+    return {"params": SetMiningConfig(s3_info).params}
+
+
+# Fixtures for util Unit tests
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    """Mocked S3 bucket, the name of the bucket is returned. The fake credentials and the shared clients are
+    removed afterwards, so that they do not leak into later tests"""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    # moto does not decode the aws-chunked bodies of the default checksums of newer botocore versions
+    monkeypatch.setenv("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+    reset_s3_clients()
+    with mock_s3():
+        boto3.resource("s3", region_name="eu-west-1").create_bucket(
+            Bucket="test-bucket", CreateBucketConfiguration={"LocationConstraint": "eu-west-1"}
+        )
+        yield "test-bucket"
+    reset_s3_clients()
+
+
 @pytest.fixture(scope="module")
 def run_pipeline():
     run_id = "integration_test"
+    kf_run_id = "integration_test"
     # metadata
     pipeline_metadata = {
         "run_type": 0,
@@ -100,7 +193,7 @@ def run_pipeline():
         config = load_config(
             dir_pipeline,
             data_scope_dir_prefix + str(data_scope_dir),
-            common={"run_id": run_id},
+            common={"kf_run_id": kf_run_id, "run_id": run_id},
         )
 
         setup_pipeline_step: SetupOutput = setup_pipeline(
@@ -123,7 +216,10 @@ def run_pipeline():
         feature_engineering(run_id, approaches, config_feature_eng)
         set_mining(run_id, approaches, 300, config_set_mining)
 
-    gather_results_step = gather_results(bucket, base_tmp, base_tmp_out, pipeline_out)
-    return NamedTuple("RunPipeline", [("s3", Any), ("bucket", str), ("dir_pipeline_output", str)])(
-        s3, bucket, pipeline_out
-    )
+    # gather and compact the results the way the exit handler does
+    gather_results_step = gather_results(bucket, base_tmp, base_tmp_out, pipeline_out, kf_run_id)
+    compact_output_tables(bucket, pipeline_out, kf_run_id)
+    return NamedTuple(
+        "RunPipeline",
+        [("s3", Any), ("bucket", str), ("dir_pipeline_output", str), ("run_id", str), ("kf_run_id", str)],
+    )(s3, bucket, pipeline_out, run_id, kf_run_id)
@@ -1,10 +1,20 @@
 from itertools import zip_longest
 
 import pandas as pd
-import boto3
 
-from ml_pipeline.util.util import load_data_s3, get_files_in_s3_directory
-from config.config import account
+from ml_pipeline.util.tables import output_tables, read_result_table, read_table, result_partitions
+from ml_pipeline.util.util import get_files_in_s3_directory
+
+
+def read_output_table(run_pipeline, filename: str, this_run_only: bool = True) -> pd.DataFrame:
+    """Reads an output table with the parts and partitions written since the last compaction. The shared tables are
+    filtered by the run_id and the result tables by the kf_run_id of the integration test"""
+    table_key = run_pipeline.dir_pipeline_output + filename
+    if filename in output_tables:
+        df = read_table(run_pipeline.s3, run_pipeline.bucket, table_key, output_tables[filename])
+        return df[df["run_id"].astype(str) == run_pipeline.run_id] if this_run_only else df
+    kf_run_ids = [run_pipeline.kf_run_id] if this_run_only else None
+    return read_result_table(run_pipeline.s3, run_pipeline.bucket, table_key, kf_run_ids=kf_run_ids)
 
 
 def test_output_pipeline_run(run_pipeline):
@@ -34,9 +44,11 @@ def test_output_files_present(run_pipeline, result_file_names):
 
 
 def test_output_files_have_correct_columns(run_pipeline, result_file_columns):
-    s3 = boto3.resource("s3")
     for filename, columns in result_file_columns.items():
-        s3_cols = load_data_s3(s3, account.data_bucket_name, run_pipeline.dir_pipeline_output + filename).columns
+        df = read_output_table(run_pipeline, filename)
+        assert len(df), f"no results of the run {run_pipeline.kf_run_id} in {filename}"
+        # the partition values are added as columns by read_result_table
+        s3_cols = [column for column in df.columns if column in columns or column not in result_partitions]
         assert all(
             x == y for x, y in zip_longest(columns, s3_cols)
         ), f"in file {filename} expected the following columns:\n{columns}\nInstead found in s3:\n{s3_cols}"
@@ -44,9 +56,10 @@ def test_output_files_have_correct_columns(run_pipeline, result_file_columns):
 
 def test_data_correctly_stored(run_pipeline, result_file_columns, test_output_data):
     """tests whether the old entries were not overwritten and the new entries are present."""
-    s3 = boto3.resource("s3")
     for filename, df in test_output_data.items():
-        s3df = load_data_s3(s3, account.data_bucket_name, run_pipeline.dir_pipeline_output + filename)
+        s3df = read_output_table(run_pipeline, filename, this_run_only=False)
         # test that all old test data is present
         mrg = pd.merge(df, s3df, how="left", on=list(result_file_columns[filename]), indicator=True)
         assert all(mrg["_merge"] == "both"), f"some test data was lost in {filename}!"
+        # test that the entries of this run are present
+        assert len(read_output_table(run_pipeline, filename)), f"no results of the run in {filename}!"
@@ -0,0 +1,91 @@
+import boto3
+import pandas as pd
+
+from ml_pipeline.components.exit_handler.steps import compact_output_tables, gather_results
+from ml_pipeline.components.set_mining.steps import upload_output_data_set_mining
+from ml_pipeline.util.data_class import SetMiningResults
+from ml_pipeline.util.tables import append_to_table, read_result_table, read_table
+from ml_pipeline.util.util import upload_data_s3
+
+
+def test_gather_results(s3_bucket):
+    """Verify that the results of all data scopes are added to the output tables, the results as partitions of the
+    run, and the temporary folders are deleted"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    upload_data_s3(pd.DataFrame({"run_id": ["old"], "support": [0.5]}), s3_bucket, "out/association_rules.csv")
+    upload_data_s3(pd.DataFrame({"run_id": [], "date": []}), s3_bucket, "out/run_info.csv")
+    data_scopes = ["p1/a/2022-01-01_2022-02-01", "p1/b/2022-01-01_2022-02-01", "p2/a/2022-01-01_2022-02-01"]
+    for i, data_scope in enumerate(data_scopes):
+        df_rules = pd.DataFrame({"run_id": [str(i)] * 2, "support": [0.1, 0.2]})
+        upload_data_s3(df_rules, s3_bucket, f"tmp_out/{data_scope}/association_rules.csv")
+        df_run_info = pd.DataFrame({"run_id": [str(i)], "date": ["2022_01_01-00_00"]})
+        append_to_table(df_run_info, s3_bucket, f"tmp_out/{data_scope}/run_info.csv", f"run_id={i}")
+    s3.Object(s3_bucket, "tmp/p1/a/events.csv").put(Body=b"")
+
+    # Act
+    gather_results(s3_bucket, "tmp/", "tmp_out/", "out/", "kf", n_workers=2, date="2022-02-01")
+
+    # Assert
+    df_rules = read_result_table(s3, s3_bucket, "out/association_rules.csv")
+    assert df_rules["run_id"].astype(str).tolist() == ["old", "0", "0", "1", "1", "2", "2"]
+    assert df_rules["support"].tolist() == [0.5, 0.1, 0.2, 0.1, 0.2, 0.1, 0.2]
+    assert df_rules["data_scope"].tolist()[1::2] == data_scopes
+    assert sorted(read_table(s3, s3_bucket, "out/run_info.csv", ["run_id"])["run_id"].astype(str)) == ["0", "1", "2"]
+    assert sorted(file.key for file in s3.Bucket(s3_bucket).objects.all()) == ["out/association_rules.csv"] + [
+        f"out/association_rules/date=2022-02-01/kf_run_id=kf/data_scope={data_scope.replace('/', '%2F')}/association_rules.csv"
+        for data_scope in data_scopes
+    ] + [
+        "out/run_info.csv",
+        "out/run_info/kf_run_id=kf.csv",
+    ]
+
+
+def test_gather_results_association_rules_of_set_mining(s3_bucket):
+    """Verify that the association rules written by the set mining are gathered without a template in the pipeline
+    output"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    upload_data_s3(pd.DataFrame({"run_id": [], "date": []}), s3_bucket, "out/run_info.csv")
+    data_scopes = ["p1/a/2022-01-01_2022-02-01", "p2/a/2022-01-01_2022-02-01"]
+    for i, data_scope in enumerate(data_scopes):
+        dc_most_frequent_sets = SetMiningResults(fpgrowth=pd.DataFrame(), kpis={"nb_itemsets": [2]})
+        dc_most_frequent_sets.rules = pd.DataFrame({"antecedents": [[1]], "consequents": [[2]], "lift": [1.5 + i]})
+        config = {
+            "bucket": s3_bucket,
+            "dir_pipeline_output": f"tmp_out/{data_scope}/",
+            "output_data": {"association_rules": "association_rules.csv"},
+        }
+        upload_output_data_set_mining(str(i), dc_most_frequent_sets, config)
+
+    # Act
+    gather_results(s3_bucket, "tmp/", "tmp_out/", "out/", "kf", n_workers=2)
+
+    # Assert
+    df_rules = read_result_table(s3, s3_bucket, "out/association_rules.csv")
+    assert df_rules["lift"].tolist() == [1.5, 2.5]
+    assert df_rules["data_scope"].tolist() == data_scopes
+    assert df_rules["kf_run_id"].tolist() == ["kf", "kf"]
+
+
+def test_compact_output_tables_merges_the_association_rules(s3_bucket):
+    """Verify that the partitions of the association rules of the run are merged, although the pipeline output has
+    no template for them"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    upload_data_s3(pd.DataFrame({"run_id": [], "date": []}), s3_bucket, "out/run_info.csv")
+    data_scopes = ["p1/a/2022-01-01_2022-02-01", "p2/a/2022-01-01_2022-02-01"]
+    for i, data_scope in enumerate(data_scopes):
+        df_rules = pd.DataFrame({"antecedents": [[1]], "consequents": [[2]], "lift": [1.5 + i]})
+        upload_data_s3(df_rules, s3_bucket, f"tmp_out/{data_scope}/association_rules.csv")
+    gather_results(s3_bucket, "tmp/", "tmp_out/", "out/", "kf", n_workers=2, date="2022-02-01")
+
+    # Act
+    compact_output_tables(s3_bucket, "out/", "kf")
+
+    # Assert
+    parts = [file.key for file in s3.Bucket(s3_bucket).objects.filter(Prefix="out/association_rules/")]
+    assert parts == ["out/association_rules/date=2022-02-01/kf_run_id=kf/part.parquet"]
+    df_rules = read_result_table(s3, s3_bucket, "out/association_rules.csv")
+    assert df_rules["lift"].tolist() == [1.5, 2.5]
+    assert df_rules["data_scope"].tolist() == data_scopes
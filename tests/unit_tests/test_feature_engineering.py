@@ -0,0 +1,266 @@
+import boto3
+import pytest
+import pandas as pd
+
+from ml_pipeline.components.set_mining.steps import load_window_configurations_set_mining
+from ml_pipeline.components.feature_engineering.steps import (
+    check_params_feature_engineering,
+    clustering,
+    create_list_of_sequences,
+    sharded_clustering_and_sequences,
+    streaming_clustering_and_sequences,
+    sweep_clustering_and_sequences,
+    upload_output_data_feature_engineering,
+    upload_sequence_stream_feature_engineering,
+    upload_sweep_output_data_feature_engineering,
+)
+from ml_pipeline.util.util import load_data_s3
+
+
+@pytest.mark.parametrize("clustering_approach, window_length", [("time", 60), ("km", 0)])
+def test_clustering_engines_are_identical(event_history_clustering_test, clustering_approach, window_length):
+    """Verify that the segmented scan assigns the same clusters as the iterrows implementation"""
+    # Given
+    data = event_history_clustering_test.data
+    config_iterrows = {
+        "params": {
+            "clustering_approach": clustering_approach,
+            "window_length": window_length,
+            "clustering_engine": "iterrows",
+        }
+    }
+    config_scan = {"params": {**config_iterrows["params"], "clustering_engine": "segmented_scan"}}
+
+    # Act
+    event_history_iterrows = clustering(event_history_clustering_test, config_iterrows)
+    event_history_clustering_test.data = data
+    event_history_scan = clustering(event_history_clustering_test, config_scan)
+
+    # Assert
+    pd.testing.assert_frame_equal(event_history_iterrows.data, event_history_scan.data)
+
+
+def test_clustering_time_diff_contains_whole_days(event_history_clustering_test):
+    """Verify that an event one day and ten seconds after its predecessor opens a new cluster"""
+    # Given
+    config = {"params": {"clustering_approach": "time", "window_length": 60, "clustering_engine": "segmented_scan"}}
+
+    # Act
+    event_history = clustering(event_history_clustering_test, config)
+
+    # Assert
+    assert event_history.data["cluster"].tolist() == [0, 0, 1, 2, 0, 0, 0]
+
+
+def test_sharded_clustering_matches_single_process(event_history_clustering_test):
+    """Verify that the sharded execution returns the same events and sequences as the single process execution"""
+    # Given
+    config = {
+        "params": {
+            "clustering_approach": "time",
+            "window_length": 60,
+            "clustering_engine": "segmented_scan",
+            "process_seq_containing_only_one_event": True,
+            "sequence_format": "string",
+            "n_workers": 2,
+        }
+    }
+    data = event_history_clustering_test.data.copy()
+
+    # Act
+    event_history_single = create_list_of_sequences(clustering(event_history_clustering_test, config), config)
+    single_data, single_sequences = event_history_single.data, event_history_single.sequences
+    event_history_clustering_test.data = data
+    event_history_clustering_test.kpis.clear()
+    event_history_sharded = sharded_clustering_and_sequences(event_history_clustering_test, config)
+
+    # Assert
+    pd.testing.assert_frame_equal(single_data, event_history_sharded.data)
+    pd.testing.assert_frame_equal(single_sequences.reset_index(drop=True), event_history_sharded.sequences)
+    assert event_history_sharded.kpis["nr_sequences"] == [4]
+
+
+def test_streaming_clustering_carries_window_over_chunks(event_history_clustering_test):
+    """Verify that the streaming mode creates the same sequences as the in-memory mode, even though clusters are
+    split by the chunk boundaries"""
+    # Given
+    config = {
+        "params": {
+            "clustering_approach": "time",
+            "window_length": 60,
+            "clustering_engine": "segmented_scan",
+            "process_seq_containing_only_one_event": True,
+            "sequence_format": "string",
+        }
+    }
+    data = event_history_clustering_test.data.sort_values(by=["object_a", "snapshot_systemtime_seconds"])
+    chunks = (data.iloc[i : i + 2].copy() for i in range(0, len(data), 2))
+
+    # Act
+    sequences_streamed = pd.concat(
+        [sequences for sequences, _ in streaming_clustering_and_sequences(chunks, config)], ignore_index=True
+    )
+    event_history = create_list_of_sequences(clustering(event_history_clustering_test, config), config)
+
+    # Assert
+    pd.testing.assert_frame_equal(event_history.sequences.reset_index(drop=True), sequences_streamed)
+    assert sequences_streamed["sequence"].tolist() == ["10,11", "12", "10", "11,12,13"]
+
+
+def test_create_list_of_sequences_csr(event_history_clustering_test):
+    """Verify that the integer coded sequences contain the events of each cluster and that the sequence strings are
+    not created for the csr format"""
+    # Given
+    config = {
+        "params": {
+            "clustering_approach": "time",
+            "window_length": 60,
+            "clustering_engine": "segmented_scan",
+            "process_seq_containing_only_one_event": False,
+            "sequence_format": "csr",
+        }
+    }
+
+    # Act
+    event_history = create_list_of_sequences(clustering(event_history_clustering_test, config), config)
+
+    # Assert
+    assert "sequence" not in event_history.sequences.columns
+    assert event_history.sequences_csr.vocabulary.tolist() == [10, 11, 12, 13]
+    assert event_history.sequences_csr.offsets.tolist() == [0, 2, 5]
+    assert event_history.sequences_csr.values.dtype == "int32"
+    assert event_history.sequences_csr.to_strings() == ["10,11", "11,12,13"]
+    assert event_history.sequences_csr.to_onehot().sum().to_dict() == {10: 1, 11: 2, 12: 1, 13: 1}
+
+
+def test_sweep_clustering_creates_sequences_per_window_configuration(event_history_clustering_test):
+    """Verify that the sweep mode creates the sequences of each window configuration under its own key"""
+    # Given
+    config = {
+        "params": {
+            "clustering_engine": "segmented_scan",
+            "process_seq_containing_only_one_event": True,
+            "sequence_format": "string",
+            "window_configurations": [
+                {"clustering_approach": "time", "window_length": 60},
+                {"clustering_approach": "time", "window_length": 100},
+                {"clustering_approach": "km", "window_length": 1},
+            ],
+        }
+    }
+
+    # Act
+    dc_by_configuration = sweep_clustering_and_sequences(event_history_clustering_test, config)
+
+    # Assert
+    assert list(dc_by_configuration) == ["time_60", "time_100", "km_1"]
+    assert dc_by_configuration["time_60"].sequences["sequence"].tolist() == ["10,11", "12", "10", "11,12,13"]
+    assert dc_by_configuration["time_100"].sequences["sequence"].tolist() == ["10,11,12", "10", "11,12,13"]
+    assert dc_by_configuration["km_1"].sequences["sequence"].tolist() == ["10,11,12,10", "11,12,13"]
+
+
+@pytest.mark.parametrize("sequence_format", ["string", "csr"])
+def test_streaming_and_in_memory_mode_upload_the_same_artifacts(
+    s3_bucket, event_history_clustering_test, sequence_format
+):
+    """Verify that the streaming mode writes the same sequences table and integer coded sequences as the in-memory
+    mode"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    config = {
+        "bucket": s3_bucket,
+        "output_data": {"sequences": "sequences.parquet", "sequences_csr": "sequences.npz"},
+        "params": {
+            "clustering_approach": "time",
+            "window_length": 60,
+            "clustering_engine": "segmented_scan",
+            "process_seq_containing_only_one_event": True,
+            "sequence_format": sequence_format,
+        },
+    }
+    data = event_history_clustering_test.data.sort_values(by=["object_a", "snapshot_systemtime_seconds"])
+    chunks = (data.iloc[i : i + 2].copy() for i in range(0, len(data), 2))
+
+    # Act
+    config_streaming = {**config, "dir_pipeline_tmp": "streaming/"}
+    upload_sequence_stream_feature_engineering(
+        "1", streaming_clustering_and_sequences(chunks, config_streaming), config_streaming
+    )
+    config_in_memory = {**config, "dir_pipeline_tmp": "in_memory/"}
+    event_history = create_list_of_sequences(clustering(event_history_clustering_test, config), config)
+    upload_output_data_feature_engineering("1", event_history, config_in_memory)
+
+    # Assert
+    keys = {
+        mode: sorted(obj.key.split("/")[1] for obj in s3.Bucket(s3_bucket).objects.filter(Prefix=mode + "/"))
+        for mode in ["streaming", "in_memory"]
+    }
+    expected_keys = ["sequences.npz", "sequences.parquet"] if sequence_format == "csr" else ["sequences.parquet"]
+    assert keys == {"streaming": expected_keys, "in_memory": expected_keys}
+    for file_name in expected_keys:
+        streamed = load_data_s3(s3, s3_bucket, "streaming/" + file_name)
+        in_memory = load_data_s3(s3, s3_bucket, "in_memory/" + file_name)
+        if file_name.endswith(".npz"):
+            assert {key: value.tolist() for key, value in streamed.items()} == {
+                key: value.tolist() for key, value in in_memory.items()
+            }
+        else:
+            pd.testing.assert_frame_equal(streamed, in_memory)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"chunksize": 1000, "window_configurations": [{"clustering_approach": "time", "window_length": 60}]},
+        {"chunksize": 1000, "n_workers": 4},
+        {"window_configurations": [{"clustering_approach": "time", "window_length": 60}], "n_workers": 4},
+    ],
+)
+def test_check_params_rejects_conflicting_modes(params):
+    """Verify that modes which would silently disable each other are rejected"""
+    # Given
+    config = {"params": {"chunksize": None, "window_configurations": [], "n_workers": 1, **params}}
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        check_params_feature_engineering(config)
+
+
+@pytest.mark.parametrize("sequence_format", ["string", "csr"])
+def test_window_configuration_sweep_is_loaded_by_set_mining(s3_bucket, event_history_clustering_test, sequence_format):
+    """Verify that the set mining loads the sequences of every window configuration of the sweep"""
+    # Given
+    config = {
+        "bucket": s3_bucket,
+        "dir_pipeline_tmp": "tmp/",
+        "input_data": {
+            "sequences": "sequences.parquet",
+            "sequences_csr": "sequences.npz",
+            "window_configurations": "window_configurations.json",
+        },
+        "output_data": {
+            "sequences": "sequences.parquet",
+            "sequences_csr": "sequences.npz",
+            "window_configurations": "window_configurations.json",
+        },
+        "params": {
+            "clustering_engine": "segmented_scan",
+            "process_seq_containing_only_one_event": True,
+            "sequence_format": sequence_format,
+            "window_configurations": [
+                {"clustering_approach": "time", "window_length": 60},
+                {"clustering_approach": "km", "window_length": 1},
+            ],
+        },
+    }
+    dc_by_configuration = sweep_clustering_and_sequences(event_history_clustering_test, config)
+
+    # Act
+    upload_sweep_output_data_feature_engineering("1", dc_by_configuration, config)
+    dc_loaded = load_window_configurations_set_mining(config)
+
+    # Assert
+    assert list(dc_loaded) == ["time_60", "km_1"]
+    for key, dc_sequences in dc_loaded.items():
+        assert dc_sequences.sequences_csr.to_lists() == dc_by_configuration[key].sequences_csr.to_lists()
+    assert load_window_configurations_set_mining({**config, "dir_pipeline_tmp": "other/"}) == {}
@@ -0,0 +1,534 @@
+import collections
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from mlxtend.frequent_patterns import association_rules
+
+from ml_pipeline.components.set_mining import miners
+from ml_pipeline.components.set_mining.miners import (
+    deduplicate_sequences,
+    estimate_min_support,
+    hoeffding_sample_size,
+    mine_frequent_itemsets,
+    mine_frequent_itemsets_partitioned,
+    mine_top_k_itemsets,
+    miner_backends,
+)
+from ml_pipeline.components.set_mining.steps import (
+    apply_fpgrowth_set_mining,
+    check_params_set_mining,
+    classify_known_patterns,
+    get_names_for_set,
+    incremental_set_mining,
+    sweep_min_support_set_mining,
+)
+from ml_pipeline.util.data_class import EventHistory, EventSequences, KnownPattern, MetaData, SetMiningResults
+
+
+def test_eclat_backend_matches_fpgrowth(event_history_set_mining_test):
+    """Verify that the bitset backend returns the same supports and itemsets as mlxtend's fpgrowth"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+
+    # Act
+    frequent_itemsets_fpgrowth = mine_frequent_itemsets(sequences, 0.25, "fpgrowth")
+    frequent_itemsets_eclat = mine_frequent_itemsets(sequences, 0.25, "eclat")
+
+    # Assert
+    pd.testing.assert_frame_equal(frequent_itemsets_fpgrowth, frequent_itemsets_eclat)
+    assert frequent_itemsets_eclat.iloc[0].to_dict() == {"support": 0.75, "itemsets": frozenset({10})}
+    assert len(frequent_itemsets_eclat) == 10
+
+
+def test_apply_set_mining_with_eclat_backend(event_history_set_mining_test, config_set_mining):
+    """Verify that the backend is selected by the configuration and the pattern length is calculated"""
+    # Given
+    config_set_mining["params"].update({"min_support": 0.5, "miner_backend": "eclat"})
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config_set_mining)
+
+    # Assert
+    assert dc_most_frequent_sets.fpgrowth["itemsets"].tolist() == [[10], [11], [12], [10, 11], [11, 12]]
+    assert dc_most_frequent_sets.fpgrowth["pattern_length"].tolist() == [1, 1, 1, 2, 2]
+    assert dc_most_frequent_sets.kpis["nb_freq_sets"] == [5]
+
+
+def test_partitioned_mining_matches_single_process(event_history_set_mining_test):
+    """Verify that the two-phase mining of partitions returns exactly the itemsets and supports of one process"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+
+    # Act
+    frequent_itemsets = mine_frequent_itemsets(sequences, 0.25, "fpgrowth")
+    frequent_itemsets_partitioned = mine_frequent_itemsets_partitioned(sequences, 0.25, 3, "eclat")
+
+    # Assert
+    pd.testing.assert_frame_equal(frequent_itemsets, frequent_itemsets_partitioned)
+
+
+@pytest.mark.parametrize("miner_backend", ["fpgrowth", "eclat"])
+def test_partitioned_mining_keeps_itemsets_split_by_the_partitions(miner_backend):
+    """Verify that an itemset with exactly min_support, split evenly by the partition boundaries, is found although
+    min_support * partition size carries a float error (0.28 * 25 = 7.000000000000001)"""
+    # Given
+    sequences = EventSequences.from_lists(([[1, 2]] * 7 + [[3]] * 18) * 5)
+
+    # Act
+    frequent_itemsets = mine_frequent_itemsets(sequences, 0.28, miner_backend)
+    frequent_itemsets_partitioned = mine_frequent_itemsets_partitioned(sequences, 0.28, 5, miner_backend)
+
+    # Assert
+    assert frozenset([1, 2]) in frequent_itemsets["itemsets"].tolist()
+    pd.testing.assert_frame_equal(frequent_itemsets, frequent_itemsets_partitioned)
+
+
+def test_apply_set_mining_closed_and_maximal_output(event_history_set_mining_test, config_set_mining):
+    """Verify that subsumed itemsets are pruned in the closed and maximal output modes and counted in the kpis"""
+    # Given
+    params = {**config_set_mining["params"], "min_support": 0.25}
+
+    # Act
+    dc_closed = apply_fpgrowth_set_mining(
+        event_history_set_mining_test, 4, {"params": {**params, "output_mode": "closed"}}
+    )
+    dc_maximal = apply_fpgrowth_set_mining(
+        event_history_set_mining_test, 4, {"params": {**params, "output_mode": "maximal"}}
+    )
+
+    # Assert
+    # {10, 12} has the same support as {10, 11, 12}
+    assert [10, 12] not in dc_closed.fpgrowth["itemsets"].tolist()
+    assert dc_closed.kpis["nb_pruned_itemsets"] == [1]
+    assert dc_maximal.fpgrowth["itemsets"].tolist() == [[10, 11, 12], [10, 13], [12, 13]]
+    assert dc_maximal.kpis["nb_pruned_itemsets"] == [7]
+
+
+def test_top_k_mining_matches_truncated_result(event_history_set_mining_test):
+    """Verify that the top k mining returns the first k itemsets of the complete result"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+    frequent_itemsets = mine_frequent_itemsets(sequences, 0.1, "eclat")
+
+    # Act
+    top_k_itemsets = mine_top_k_itemsets(sequences, 6, 0.1)
+
+    # Assert
+    pd.testing.assert_frame_equal(frequent_itemsets.iloc[:6], top_k_itemsets)
+
+
+def test_apply_set_mining_top_k_keeps_min_support(event_history_set_mining_test, config_set_mining):
+    """Verify that the top k mode does not override the min_support for many unique events"""
+    # Given
+    config_set_mining["params"].update({"min_support": 0.1, "mining_mode": "top_k", "top_k": 3})
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 500, config_set_mining)
+
+    # Assert
+    assert config_set_mining["params"]["min_support"] == 0.1
+    assert dc_most_frequent_sets.fpgrowth["itemsets"].tolist() == [[10], [11], [12]]
+
+
+@pytest.mark.parametrize("miner_backend", ["fpgrowth", "eclat"])
+def test_apply_set_mining_on_deduplicated_sequences(event_history_set_mining_test, config_set_mining, miner_backend):
+    """Verify that mining the weighted unique sequences returns the same supports and records the dedup ratio"""
+    # Given
+    params = {**config_set_mining["params"], "min_support": 0.25, "miner_backend": miner_backend}
+    config = {"params": {**params, "deduplicate_sequences": False}}
+    config_dedup = {"params": {**params, "deduplicate_sequences": True}}
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config)
+    dc_most_frequent_sets_dedup = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config_dedup)
+
+    # Assert
+    pd.testing.assert_frame_equal(dc_most_frequent_sets.fpgrowth, dc_most_frequent_sets_dedup.fpgrowth)
+    assert dc_most_frequent_sets_dedup.kpis["nb_unique_sequences"] == [6]
+    assert dc_most_frequent_sets_dedup.kpis["dedup_ratio"] == [0.25]
+
+
+def test_weighted_support_counts_in_blocks(monkeypatch):
+    """Verify that the weighted support counts unpacked in blocks of bytes equal the counts of the full bitsets"""
+    # Given
+    rng = np.random.default_rng(0)
+    bits = rng.integers(0, 256, size=(3, 5, 13), dtype="uint8")
+    weights = rng.integers(1, 10, size=100)
+    counts_expected = np.unpackbits(bits, axis=-1, count=len(weights)) @ weights
+    monkeypatch.setattr(miners, "_UNPACK_BLOCK_BITS", 8 * 15 * 4)
+
+    # Act
+    counts = miners.support_counts(bits, weights)
+
+    # Assert
+    np.testing.assert_array_equal(counts, counts_expected)
+    np.testing.assert_array_equal(miners.support_counts(bits[0, 0], weights), counts_expected[0, 0])
+
+
+def test_weighted_sequences_are_not_expanded_for_fpgrowth(event_history_set_mining_test):
+    """Verify that weighted sequences are mined by the weight-aware backend instead of repeating them for fpgrowth"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+    sequences_unique, weights = deduplicate_sequences(sequences)
+
+    # Act
+    frequent_itemsets = mine_frequent_itemsets(sequences, 0.25, "fpgrowth")
+    frequent_itemsets_weighted = mine_frequent_itemsets(sequences_unique, 0.25, "fpgrowth", weights)
+
+    # Assert
+    pd.testing.assert_frame_equal(frequent_itemsets, frequent_itemsets_weighted)
+    with pytest.raises(ValueError):
+        miner_backends["fpgrowth"](sequences_unique, 0.25, weights)
+
+
+def test_approximate_mining_bounds(event_history_set_mining_test, config_set_mining):
+    """Verify the sample size and that the sequences are mined exactly if the sample would contain all of them"""
+    # Given
+    params = {**config_set_mining["params"], "min_support": 0.25}
+    params["approximate"] = {"epsilon": 0.5, "confidence": 0.99, "random_state": 0}
+    config = {"params": {**params, "mining_mode": "approximate"}}
+    config_exact = {"params": params}
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config)
+    dc_most_frequent_sets_exact = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config_exact)
+
+    # Assert
+    assert hoeffding_sample_size(0.05, 0.95) == 738
+    assert hoeffding_sample_size(0.5, 0.99) == 11
+    pd.testing.assert_frame_equal(
+        dc_most_frequent_sets.fpgrowth[["support", "itemsets", "pattern_length"]], dc_most_frequent_sets_exact.fpgrowth
+    )
+    assert (dc_most_frequent_sets.fpgrowth["support_upper"] == dc_most_frequent_sets.fpgrowth["support"]).all()
+    assert dc_most_frequent_sets.kpis["sample_size"] == [8]
+    assert dc_most_frequent_sets.kpis["nb_near_threshold"] == [0]
+
+
+def test_approximate_mining_of_a_sample(config_set_mining):
+    """Verify that a sample sized by the error bound is mined at min_support - epsilon, the supports get intervals of
+    +-epsilon and itemsets whose interval contains min_support are flagged as near the threshold"""
+    # Given
+    sequences = [[10, 11]] * 200 + [[10]] * 100 + [[12]] * 60 + [[13]] * 40
+    dc_event_history = EventHistory(
+        data=None,
+        occurrence_each_event=None,
+        sequences=pd.DataFrame({"event_sequence": sequences}),
+        kpis=collections.defaultdict(list),
+    )
+    config_set_mining["params"].update({"min_support": 0.2, "mining_mode": "approximate"})
+    config_set_mining["params"]["approximate"] = {"epsilon": 0.1, "confidence": 0.9, "random_state": 0}
+    supports_exact = {(10,): 0.75, (11,): 0.5, (10, 11): 0.5, (12,): 0.15, (13,): 0.1}
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(dc_event_history, 4, config_set_mining)
+
+    # Assert
+    frequent_sets = dc_most_frequent_sets.fpgrowth
+    assert dc_most_frequent_sets.kpis["sample_size"] == [hoeffding_sample_size(0.1, 0.9)] == [150]
+    assert sorted(frequent_sets["itemsets"].apply(tuple)) == sorted(supports_exact)
+    assert (frequent_sets["support"] >= 0.2 - 0.1).all()
+    np.testing.assert_allclose(frequent_sets["support_lower"], frequent_sets["support"] - 0.1)
+    np.testing.assert_allclose(frequent_sets["support_upper"], frequent_sets["support"] + 0.1)
+    for itemset, support in zip(frequent_sets["itemsets"], frequent_sets["support"]):
+        assert abs(support - supports_exact[tuple(itemset)]) <= 0.1
+    # {12} and {13} are estimated below min_support, they are kept and flagged
+    near_threshold = dict(zip(frequent_sets["itemsets"].apply(tuple), frequent_sets["near_threshold"]))
+    assert near_threshold == {(10,): False, (11,): False, (10, 11): False, (12,): True, (13,): True}
+    assert dc_most_frequent_sets.kpis["nb_near_threshold"] == [2]
+
+
+def test_estimate_min_support_respects_budget(event_history_set_mining_test):
+    """Verify that the lowest candidate is chosen for a large budget and the highest one if nothing fits"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+    candidates = [0.5, 0.25, 0.1]
+
+    # Act
+    min_support_large_budget, estimate = estimate_min_support(sequences, candidates, 1024, 60)
+    min_support_no_budget, _ = estimate_min_support(sequences, candidates, 0, 0)
+
+    # Assert
+    assert min_support_large_budget == 0.1
+    assert estimate["estimated_nb_itemsets"] == len(mine_frequent_itemsets(sequences, 0.1, "eclat"))
+    assert min_support_no_budget == 0.5
+
+
+def test_estimate_min_support_on_deduplicated_sequences(event_history_set_mining_test):
+    """Verify that the memory estimate of weighted sequences is based on the unique sequences that are mined"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist() * 50)
+    sequences_unique, weights = deduplicate_sequences(sequences)
+
+    # Act
+    _, estimate = estimate_min_support(sequences, [0.25], 1024, 60, backend="eclat")
+    _, estimate_weighted = estimate_min_support(sequences_unique, [0.25], 1024, 60, "fpgrowth", weights)
+    _, estimate_unique = estimate_min_support(sequences_unique, [0.25], 1024, 60, backend="eclat")
+
+    # Assert
+    assert estimate_weighted["estimated_peak_memory_mb"] == estimate_unique["estimated_peak_memory_mb"]
+    assert estimate_weighted["estimated_peak_memory_mb"] < estimate["estimated_peak_memory_mb"]
+
+
+def test_estimate_min_support_times_the_backend(event_history_set_mining_test, monkeypatch):
+    """Verify that the runtime is measured with the configured backend, so a slow backend gets a higher min_support"""
+    # Given
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+    candidates = [0.5, 0.25, 0.1]
+    mine_eclat = miners.miner_backends["eclat"]
+
+    def mine_slowly(sequences, min_support, weights=None):
+        time.sleep(0.2)
+        return mine_eclat(sequences, min_support, weights)
+
+    monkeypatch.setitem(miners.miner_backends, "fpgrowth", mine_slowly)
+
+    # Act
+    min_support_eclat, _ = estimate_min_support(sequences, candidates, 1024, 0.1, backend="eclat")
+    min_support_slow, estimate_slow = estimate_min_support(sequences, candidates, 1024, 0.1, backend="fpgrowth")
+
+    # Assert
+    assert min_support_eclat == 0.1
+    assert min_support_slow == 0.5
+    assert estimate_slow["estimated_runtime_s"] >= 0.2
+
+
+def test_apply_set_mining_adaptive_min_support(event_history_set_mining_test, config_set_mining):
+    """Verify that the adaptive mode replaces the min_support and records the estimate in the kpis"""
+    # Given
+    config = config_set_mining
+    config["params"]["min_support_mode"] = "adaptive"
+    config["params"]["adaptive_min_support"] = {
+        "candidates": [0.5, 0.25],
+        "memory_budget_mb": 1024,
+        "time_budget_s": 60,
+        "sample_size": 100,
+        "random_state": 0,
+    }
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 500, config)
+
+    # Assert
+    assert config["params"]["min_support"] == 0.25
+    assert dc_most_frequent_sets.kpis["min_support"] == [0.25]
+    assert dc_most_frequent_sets.kpis["estimated_nb_itemsets"] == [10.0]
+    assert len(dc_most_frequent_sets.fpgrowth) == 10
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"mining_mode": "approximate"},
+        {"mining_mode": "top_k"},
+        {"min_support_sweep": [0.1, 0.2]},
+        {"incremental_mining": True},
+    ],
+)
+def test_check_params_rejects_adaptive_min_support(config_set_mining, params):
+    """Verify that the adaptive min_support is rejected for the modes that do not estimate it"""
+    # Given
+    config_set_mining["params"]["min_support_mode"] = "adaptive"
+    check_params_set_mining(config_set_mining)
+    config_set_mining["params"].update(params)
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        check_params_set_mining(config_set_mining)
+
+
+def test_min_support_sweep_matches_single_runs(event_history_set_mining_test, config_set_mining):
+    """Verify that the results derived from one mining pass equal mining each min_support on its own"""
+    # Given
+    params = {**config_set_mining["params"], "min_support": 0.1, "top_k": 4}
+    config = {"params": {**params, "min_support_sweep": [0.5, 0.125, 0.25]}}
+
+    # Act
+    dc_by_min_support = sweep_min_support_set_mining(event_history_set_mining_test, config)
+
+    # Assert
+    assert list(dc_by_min_support) == ["min_support_0.125", "min_support_0.25", "min_support_0.5"]
+    for min_support in [0.125, 0.25, 0.5]:
+        dc_most_frequent_sets = apply_fpgrowth_set_mining(
+            event_history_set_mining_test, 4, {"params": {**params, "min_support": min_support}}
+        )
+        dc_most_frequent_sets_sweep = dc_by_min_support[f"min_support_{min_support}"]
+        pd.testing.assert_frame_equal(dc_most_frequent_sets.fpgrowth, dc_most_frequent_sets_sweep.fpgrowth)
+        assert dc_most_frequent_sets_sweep.kpis["min_support"] == [min_support]
+
+
+def test_incremental_set_mining_matches_full_mining(event_history_set_mining_test, config_set_mining):
+    """Verify that updating the state with added and expired sequences returns the result of mining all sequences"""
+    # Given
+    config = config_set_mining
+    config["params"]["min_support"] = 0.25
+    sequences = event_history_set_mining_test.sequences
+    sequences_next_runs = [
+        pd.concat([sequences.iloc[2:], pd.DataFrame({"event_sequence": [[10, 11], [11, 14]]})]),
+        pd.concat([sequences.iloc[3:], pd.DataFrame({"event_sequence": [[10, 11], [11, 14], [11, 14]]})]),
+    ]
+
+    # Act
+    _, itemset_state = incremental_set_mining(event_history_set_mining_test, None, config)
+    results = []
+    for sequences_next_run in sequences_next_runs:
+        dc_event_history = EventHistory(
+            data=None, occurrence_each_event=None, sequences=sequences_next_run, kpis=collections.defaultdict(list)
+        )
+        dc_most_frequent_sets, itemset_state = incremental_set_mining(dc_event_history, itemset_state, config)
+        results.append((dc_event_history, dc_most_frequent_sets))
+
+    # Assert
+    for dc_event_history, dc_most_frequent_sets in results:
+        dc_most_frequent_sets_full = apply_fpgrowth_set_mining(dc_event_history, 5, config)
+        pd.testing.assert_frame_equal(dc_most_frequent_sets.fpgrowth, dc_most_frequent_sets_full.fpgrowth)
+    # [10, 11] is expired and added again, so only [11, 14] is added and [10, 11, 12] is expired
+    assert results[0][1].kpis["nb_added_sequences"] == [1]
+    assert results[0][1].kpis["nb_expired_sequences"] == [1]
+    assert [dc_most_frequent_sets.kpis["full_remining"] for _, dc_most_frequent_sets in results] == [[False], [True]]
+
+
+def test_association_rules_metrics(event_history_set_mining_test, config_set_mining):
+    """Verify the rule metrics and that the rules are filtered by the configured thresholds"""
+    # Given
+    config_set_mining["params"]["min_support"] = 0.25
+    config_set_mining["params"]["association_rules"] = {
+        "enabled": True,
+        "min_confidence": 0.6,
+        "min_lift": 1.0,
+        "min_leverage": 0.0,
+    }
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config_set_mining)
+
+    # Assert
+    rule = dc_most_frequent_sets.rules.iloc[0]
+    assert (rule.antecedents, rule.consequents) == ([10, 12], [11])
+    assert (rule.support, rule.confidence) == (0.375, 1.0)
+    assert rule.lift == 1 / 0.75
+    assert rule.leverage == 0.375 - 0.375 * 0.75
+    assert (dc_most_frequent_sets.rules["confidence"] >= 0.6).all()
+    assert (dc_most_frequent_sets.rules["lift"] >= 1.0).all()
+    assert dc_most_frequent_sets.kpis["nb_rules"] == [len(dc_most_frequent_sets.rules)]
+
+
+@pytest.mark.parametrize("output_mode", ["all", "closed", "maximal"])
+def test_association_rules_of_all_frequent_itemsets(event_history_set_mining_test, config_set_mining, output_mode):
+    """Verify that the rules are derived from all frequent itemsets, not only from the pruned and cut output"""
+    # Given
+    config_set_mining["params"].update({"min_support": 0.25, "top_k": 2, "output_mode": output_mode})
+    config_set_mining["params"]["association_rules"] = {
+        "enabled": True,
+        "min_confidence": 0.0,
+        "min_lift": 0.0,
+        "min_leverage": -1.0,
+    }
+    sequences = EventSequences.from_lists(event_history_set_mining_test.sequences["event_sequence"].tolist())
+    rules_expected = association_rules(mine_frequent_itemsets(sequences, 0.25), min_threshold=0.0)
+
+    # Act
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config_set_mining)
+
+    # Assert
+    assert len(dc_most_frequent_sets.fpgrowth) == 2
+    assert len(dc_most_frequent_sets.rules) == len(rules_expected) > 0
+    assert dc_most_frequent_sets.kpis["nb_rules"] == [len(rules_expected)]
+
+
+@pytest.mark.parametrize(
+    "params", [{"min_support_sweep": [0.1, 0.2]}, {"incremental_mining": True}, {"min_support_mode": "adaptive"}]
+)
+def test_check_params_rejects_modes_of_window_configurations(config_set_mining, params):
+    """Verify that the modes that are not supported for several window configurations are rejected"""
+    # Given
+    check_params_set_mining(config_set_mining, window_configurations=True)
+    config_set_mining["params"].update(params)
+    check_params_set_mining(config_set_mining)
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        check_params_set_mining(config_set_mining, window_configurations=True)
+
+
+def test_check_params_rejects_association_rules_of_top_k_mining(config_set_mining):
+    """Verify that the association rules are rejected for the top k mining, which does not mine all subsets"""
+    # Given
+    config_set_mining["params"]["mining_mode"] = "top_k"
+    check_params_set_mining(config_set_mining)
+    config_set_mining["params"]["association_rules"]["enabled"] = True
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        check_params_set_mining(config_set_mining)
+
+
+@pytest.mark.parametrize("output_mode", ["closed", "maximal"])
+def test_check_params_rejects_closed_and_maximal_output_of_top_k_mining(config_set_mining, output_mode):
+    """Verify that the closed and maximal output modes are rejected for the top k mining, where a subset can be cut
+    in while its superset with the same support is cut off"""
+    # Given
+    config_set_mining["params"]["mining_mode"] = "top_k"
+    check_params_set_mining(config_set_mining)
+    config_set_mining["params"]["output_mode"] = output_mode
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        check_params_set_mining(config_set_mining)
+
+
+def test_classify_known_patterns(event_history_set_mining_test, config_set_mining):
+    """Verify that frequent sets are classified as known, superset of a known pattern or novel"""
+    # Given
+    config_set_mining["params"]["min_support"] = 0.25
+    config_set_mining["params"]["known_patterns"]["enabled"] = True
+    dc_most_frequent_sets = apply_fpgrowth_set_mining(event_history_set_mining_test, 4, config_set_mining)
+    df_known_patterns = pd.DataFrame(
+        {"event_pattern": ["10,11", "12", "10"], "trigger": ["", "13", ""], "and_not_events": ["", "", "13"]}
+    )
+    dc_known_patterns = KnownPattern(data=df_known_patterns, kpis=collections.defaultdict(list))
+
+    # Act
+    dc_most_frequent_sets = classify_known_patterns(dc_most_frequent_sets, dc_known_patterns, config_set_mining)
+
+    # Assert
+    classes = dict(
+        zip(
+            dc_most_frequent_sets.fpgrowth["itemsets"].apply(tuple),
+            dc_most_frequent_sets.fpgrowth["known_pattern_match"],
+        )
+    )
+    assert classes[(10,)] == classes[(10, 11)] == classes[(12, 13)] == "known"
+    assert classes[(10, 12)] == classes[(10, 11, 12)] == "superset_of_known"
+    # {10, 13} contains the pattern 10, but 13 excludes it
+    assert classes[(10, 13)] == classes[(11,)] == "novel"
+    assert dc_most_frequent_sets.kpis["nb_known"] == [3]
+    assert dc_most_frequent_sets.kpis["nb_superset_of_known"] == [2]
+    assert dc_most_frequent_sets.kpis["nb_novel"] == [5]
+
+
+def test_get_names_for_set_multiple_languages():
+    """Verify that the names are resolved for several description columns and unknown events are None"""
+    # Given
+    dc_most_frequent_sets = SetMiningResults(
+        fpgrowth=pd.DataFrame({"support": [0.5, 0.25], "itemsets": [[10, 11], [12, 99]]}),
+        kpis=collections.defaultdict(list),
+    )
+    dc_meta_data = MetaData(
+        data=pd.DataFrame(
+            {
+                "event_id": [10, 11, 12],
+                "event_description_de": ["Fehler A", "Fehler B", "Fehler C"],
+                "event_description_en": ["Error A", "Error B", "Error C"],
+            }
+        )
+    )
+    description_columns = {"itemsets_desc": "event_description_de", "itemsets_desc_en": "event_description_en"}
+
+    # Act
+    dc_most_frequent_sets = get_names_for_set(dc_most_frequent_sets, dc_meta_data, description_columns)
+
+    # Assert
+    assert dc_most_frequent_sets.fpgrowth["itemsets_desc"].tolist() == [["Fehler A", "Fehler B"], ["Fehler C", None]]
+    assert dc_most_frequent_sets.fpgrowth["itemsets_desc_en"].tolist() == [["Error A", "Error B"], ["Error C", None]]
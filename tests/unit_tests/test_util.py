@@ -0,0 +1,358 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+import pandas as pd
+
+from ml_pipeline.util import tables, util
+from ml_pipeline.util.s3util import (
+    S3MultipartWriter,
+    S3RangeReader,
+    get_s3_client,
+    get_s3_resource,
+    reset_s3_clients,
+)
+from ml_pipeline.util.tables import (
+    append_to_table,
+    compact_result_table,
+    compact_table,
+    get_result_partition_key,
+    load_table_part,
+    read_result_table,
+    read_table,
+)
+from ml_pipeline.util.util import (
+    delete_s3_prefixes,
+    get_files_in_s3_directory,
+    iter_files_in_s3_directory,
+    load_data_s3,
+    load_data_s3_chunked,
+    set_debug_mode,
+    upload_data_s3,
+)
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".arrow"])
+def test_upload_and_load_data_s3_with_column_projection(s3_bucket, extension):
+    """Verify that a table survives the round trip to S3 and that only the requested columns are loaded"""
+    # Given
+    df = pd.DataFrame({"event_id": [10, 11, 12], "event_name": ["a", "b", "c"], "nb_items": [1, 2, 3]})
+    data_key = "tmp/events" + extension
+
+    # Act
+    upload_data_s3(df, s3_bucket, data_key)
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    df_loaded = load_data_s3(s3, s3_bucket, data_key)
+    df_projected = load_data_s3(s3, s3_bucket, data_key, columns=["event_id", "nb_items"])
+
+    # Assert
+    pd.testing.assert_frame_equal(df_loaded, df)
+    pd.testing.assert_frame_equal(df_projected, df[["event_id", "nb_items"]])
+
+
+def test_upload_data_s3_parquet_stores_itemsets_as_lists(s3_bucket):
+    """Verify that columns of frozensets like the itemsets are written to parquet as sorted lists"""
+    # Given
+    df = pd.DataFrame({"support": [0.5, 0.25], "itemsets": [frozenset([12, 10]), frozenset([11])]})
+
+    # Act
+    upload_data_s3(df, s3_bucket, "tmp/frequent_sets.parquet")
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    df_loaded = load_data_s3(s3, s3_bucket, "tmp/frequent_sets.parquet")
+
+    # Assert
+    assert [list(itemset) for itemset in df_loaded["itemsets"]] == [[10, 12], [11]]
+
+
+def test_load_data_s3_chunked_parquet(s3_bucket):
+    """Verify that a parquet file is streamed in chunks of at most chunksize rows"""
+    # Given
+    df = pd.DataFrame({"event_id": range(10), "nb_items": range(10, 20)})
+    upload_data_s3(df, s3_bucket, "tmp/sequences.parquet")
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+
+    # Act
+    chunks = list(load_data_s3_chunked(s3, s3_bucket, "tmp/sequences.parquet", chunksize=4))
+
+    # Assert
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+
+
+def test_append_to_table_and_read_table(s3_bucket):
+    """Verify that the parts and the compacted table are assembled to the logical table, where a replaced part
+    overrides the rows with the same key"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    upload_data_s3(pd.DataFrame({"run_id": ["1"], "min_support": [0.3]}), s3_bucket, "out/hyperparam_info.csv")
+
+    # Act
+    append_to_table(pd.DataFrame({"run_id": ["2"], "min_support": [0.3]}), s3_bucket, "out/hyperparam_info.csv", "2")
+    append_to_table(pd.DataFrame({"run_id": ["3"], "min_support": [0.3]}), s3_bucket, "out/hyperparam_info.csv", "3")
+    append_to_table(pd.DataFrame({"run_id": ["2"], "min_support": [0.1]}), s3_bucket, "out/hyperparam_info.csv", "2")
+    df = read_table(s3, s3_bucket, "out/hyperparam_info.csv", ["run_id"])
+
+    # Assert
+    assert sorted(zip(df["run_id"].astype(str), df["min_support"])) == [("1", 0.3), ("2", 0.1), ("3", 0.3)]
+    assert load_table_part(s3, s3_bucket, "out/hyperparam_info.csv", "2")["min_support"].tolist() == [0.1]
+    assert load_table_part(s3, s3_bucket, "out/hyperparam_info.csv", "4") is None
+
+
+def test_compact_table(s3_bucket):
+    """Verify that the compaction merges all parts into the table without changing the logical table"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    for i in range(5):
+        df = pd.DataFrame({"kf_run_id": ["kf"], "run_id": [str(i)], "error_msg": ["no data"]})
+        append_to_table(df, s3_bucket, "out/error_logs.csv", f"kf_run_id=kf/run_id={i}/preprocessing")
+    df_before = read_table(s3, s3_bucket, "out/error_logs.csv")
+
+    # Act
+    nb_merged = compact_table(s3, s3_bucket, "out/error_logs.csv")
+    df_after = read_table(s3, s3_bucket, "out/error_logs.csv")
+
+    # Assert
+    assert nb_merged == 5
+    keys = [file.key for file in s3.Bucket(s3_bucket).objects.all()]
+    assert len(keys) == 1 and keys[0].startswith("out/error_logs/_snapshots/")
+    pd.testing.assert_frame_equal(df_after, df_before)
+    assert compact_table(s3, s3_bucket, "out/error_logs.csv") == 0
+
+
+def test_compact_table_interleaved_compactions_keep_all_rows(s3_bucket, monkeypatch):
+    """Verify that no row is lost or duplicated if a second compaction lists, merges and deletes more parts while
+    the first compaction is uploading its snapshot"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    table_key = "out/error_logs.csv"
+    upload_data_s3(pd.DataFrame({"run_id": ["old"], "error_msg": ["no data"]}), s3_bucket, table_key)
+    append_to_table(pd.DataFrame({"run_id": ["a"], "error_msg": ["no data"]}), s3_bucket, table_key, "a")
+    upload = tables.upload_data_s3
+
+    def upload_after_second_compaction(df, bucket, data_key):
+        # the first compaction has listed part a only, the second one merges a and b and deletes both
+        monkeypatch.setattr(tables, "upload_data_s3", upload)
+        append_to_table(pd.DataFrame({"run_id": ["b"], "error_msg": ["no data"]}), bucket, table_key, "b")
+        assert compact_table(s3, bucket, table_key) == 2
+        upload(df, bucket, data_key)
+
+    monkeypatch.setattr(tables, "upload_data_s3", upload_after_second_compaction)
+
+    # Act
+    nb_merged = compact_table(s3, s3_bucket, table_key)
+    df_interleaved = read_table(s3, s3_bucket, table_key)
+    compact_table(s3, s3_bucket, table_key)
+    df_merged = read_table(s3, s3_bucket, table_key)
+
+    # Assert
+    assert nb_merged == 0
+    assert df_interleaved["run_id"].tolist() == ["old", "a", "b"]
+    pd.testing.assert_frame_equal(df_merged, df_interleaved)
+    keys = [file.key for file in s3.Bucket(s3_bucket).objects.all()]
+    assert len(keys) == 2 and keys[0] == table_key and keys[1].startswith("out/error_logs/_snapshots/")
+
+
+def _upload_result_partitions(bucket: str):
+    """two runs on different dates with two data scopes each"""
+    for date, kf_run_id in [("2023-01-01", "kf1"), ("2023-02-01", "kf2")]:
+        for data_scope in ["p1/a/2022-01-01_2022-02-01", "p1/b/2022-01-01_2022-02-01"]:
+            df = pd.DataFrame({"run_id": [kf_run_id] * 2, "support": [0.1, 0.2]})
+            partitions = {"date": date, "kf_run_id": kf_run_id, "data_scope": data_scope}
+            upload_data_s3(df, bucket, get_result_partition_key("out/rules.csv", partitions, "rules.csv"))
+
+
+@pytest.mark.parametrize("compacted", [False, True])
+def test_read_result_table_prunes_partitions(s3_bucket, compacted):
+    """Verify that the result table is filtered by run, date range and data scope, before and after the compaction"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    _upload_result_partitions(s3_bucket)
+    if compacted:
+        compact_result_table(s3, s3_bucket, "out/rules.csv")
+
+    # Act
+    df_all = read_result_table(s3, s3_bucket, "out/rules.csv")
+    df_run = read_result_table(s3, s3_bucket, "out/rules.csv", kf_run_ids=["kf2"])
+    df_dates = read_result_table(s3, s3_bucket, "out/rules.csv", start_date="2023-01-15", end_date="2023-02-01")
+    df_scope = read_result_table(
+        s3, s3_bucket, "out/rules.csv", data_scopes=["p1/b/2022-01-01_2022-02-01"], columns=["support", "kf_run_id"]
+    )
+
+    # Assert
+    assert len(df_all) == 8
+    assert set(df_all.columns) == {"run_id", "support", "date", "kf_run_id", "data_scope"}
+    assert set(df_run["run_id"]) == {"kf2"} and len(df_run) == 4
+    assert set(df_dates["date"]) == {"2023-02-01"} and len(df_dates) == 4
+    assert sorted(df_scope.columns) == ["kf_run_id", "support"]
+    assert sorted(df_scope["kf_run_id"]) == ["kf1", "kf1", "kf2", "kf2"]
+
+
+def test_compact_result_table(s3_bucket):
+    """Verify that the compaction merges the data scopes of the selected run into one parquet file"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    _upload_result_partitions(s3_bucket)
+    df_before = read_result_table(s3, s3_bucket, "out/rules.csv", kf_run_ids=["kf1"])
+
+    # Act
+    nb_merged = compact_result_table(s3, s3_bucket, "out/rules.csv", kf_run_ids=["kf1"])
+    df_after = read_result_table(s3, s3_bucket, "out/rules.csv", kf_run_ids=["kf1"])
+
+    # Assert
+    assert nb_merged == 2
+    keys = [file.key for file in s3.Bucket(s3_bucket).objects.filter(Prefix="out/rules/date=2023-01-01/")]
+    assert keys == ["out/rules/date=2023-01-01/kf_run_id=kf1/part.parquet"]
+    assert len(list(s3.Bucket(s3_bucket).objects.filter(Prefix="out/rules/date=2023-02-01/"))) == 2
+    columns = ["run_id", "support", "data_scope"]
+    pd.testing.assert_frame_equal(df_after[columns], df_before[columns])
+    assert compact_result_table(s3, s3_bucket, "out/rules.csv", kf_run_ids=["kf1"]) == 0
+
+
+def test_s3_client_and_resource_are_shared(s3_bucket):
+    """Verify that the client is shared by the process and the resource by the calls of one thread"""
+    # Act
+    with ThreadPoolExecutor(2) as executor:
+        resources_other_thread = list(executor.map(lambda _: get_s3_resource(), range(2)))
+    client, resource = get_s3_client(), get_s3_resource()
+
+    # Assert
+    assert get_s3_client() is client
+    assert get_s3_resource() is resource
+    assert all(resource_other_thread is not resource for resource_other_thread in resources_other_thread)
+    assert client.meta.config.max_pool_connections == 32
+    assert client.meta.config.retries["mode"] == "adaptive"
+    reset_s3_clients()
+    assert get_s3_client() is not client
+
+
+def test_s3_multipart_writer(s3_bucket):
+    """Verify that the written bytes are uploaded in parts and that nothing is uploaded after an exception"""
+    # Given
+    data = bytes(range(256)) * (11 * 2**12)
+
+    # Act
+    with S3MultipartWriter(s3_bucket, "tmp/large.bin", part_size=5 * 2**20) as file:
+        for start in range(0, len(data), 2**20):
+            file.write(data[start : start + 2**20])
+        nb_parts_before_close = len(file._parts)
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(s3_bucket, "tmp/failed.bin", part_size=5 * 2**20) as file:
+            file.write(data)
+            raise RuntimeError()
+
+    # Assert
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    assert nb_parts_before_close == 2
+    assert s3.Object(s3_bucket, "tmp/large.bin").get()["Body"].read() == data
+    assert [file.key for file in s3.Bucket(s3_bucket).objects.all()] == ["tmp/large.bin"]
+    assert get_s3_client().list_multipart_uploads(Bucket=s3_bucket).get("Uploads", []) == []
+
+
+def test_s3_range_reader(s3_bucket):
+    """Verify that seek and read return the requested byte ranges of the object"""
+    # Given
+    upload_data_s3(bytes(range(100)), s3_bucket, "tmp/range.bin")
+    reader = S3RangeReader(s3_bucket, "tmp/range.bin")
+
+    # Act
+    reader.seek(-10, 2)
+    tail = reader.read()
+    reader.seek(5)
+
+    # Assert
+    assert reader.size == 100
+    assert tail == bytes(range(90, 100))
+    assert reader.read(3) == bytes([5, 6, 7])
+    assert reader.tell() == 8
+
+
+@pytest.mark.parametrize("data_key", ["tmp/events.csv.gz", "tmp/events.csv.zst", "tmp/events.parquet"])
+def test_upload_data_s3_in_chunks(s3_bucket, data_key):
+    """Verify that a table uploaded in chunks and with compression is loaded unchanged, at once and chunked"""
+    # Given
+    df = pd.DataFrame({"event_id": range(25), "event_name": [f"event {i}" for i in range(25)]})
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+
+    # Act
+    upload_data_s3(df, s3_bucket, data_key, chunksize=10)
+    df_loaded = load_data_s3(s3, s3_bucket, data_key)
+    chunks = list(load_data_s3_chunked(s3, s3_bucket, data_key, chunksize=10))
+
+    # Assert
+    pd.testing.assert_frame_equal(df_loaded, df)
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+
+
+@pytest.mark.parametrize("n_workers", [1, 4])
+def test_get_files_in_s3_directory(s3_bucket, n_workers):
+    """Verify that only the files directly in the directory are listed without recursive and all files below the
+    directory with recursive, also when the sub directories are listed in parallel, but not the files of a sibling
+    directory sharing the name as prefix"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    keys = ["out/run_info.csv", "out/a/1.csv", "out/a/b/2.csv", "out/ab/x.csv", "out/c/3.csv", "out/d/", "out_other/4.csv"]
+    for key in keys:
+        s3.Object(s3_bucket, key).put(Body=b"")
+
+    # Act
+    files = [file.key for file in get_files_in_s3_directory(s3, s3_bucket, "out", n_workers=n_workers)]
+    files_recursive = get_files_in_s3_directory(s3, s3_bucket, "/out", "a", recursive=True, n_workers=n_workers)
+
+    # Assert
+    assert files == ["out/run_info.csv"]
+    assert isinstance(files_recursive, list)
+    assert sorted(file.key for file in files_recursive) == ["out/a/1.csv", "out/a/b/2.csv"]
+    assert sorted(file.key for file in get_files_in_s3_directory(s3, s3_bucket, recursive=True)) == sorted(
+        key for key in keys if not key.endswith("/")
+    )
+
+
+def test_get_files_in_s3_directory_lists_sub_directories_in_parallel(s3_bucket, monkeypatch):
+    """Verify that the sub directories of the prefix are listed concurrently with n_workers > 1"""
+    # Given
+    s3 = boto3.resource("s3", region_name="eu-west-1")
+    keys = ["out/run_info.csv", "out/a/1.csv", "out/b/2.csv", "out/c/d/3.csv"]
+    for key in keys:
+        s3.Object(s3_bucket, key).put(Body=b"")
+    # the listings of the three sub directories can only pass the barrier if they run at the same time
+    barrier = threading.Barrier(3, timeout=10)
+    listed_prefixes = []
+
+    def list_s3_pages(client, bucket, prefix, delimiter=None):
+        listed_prefixes.append(prefix)
+        if delimiter is None:
+            barrier.wait()
+        yield from list_s3_pages_original(client, bucket, prefix, delimiter)
+
+    list_s3_pages_original = util._list_s3_pages
+    monkeypatch.setattr(util, "_list_s3_pages", list_s3_pages)
+
+    # Act
+    files = sorted(file.key for file in iter_files_in_s3_directory(s3, s3_bucket, "out", recursive=True, n_workers=4))
+
+    # Assert
+    assert files == sorted(keys)
+    assert sorted(listed_prefixes) == ["out/", "out/a/", "out/b/", "out/c/"]
+
+
+def test_delete_s3_prefixes(s3_bucket):
+    """Verify that all objects below the folders are deleted in batches, other objects and debug mode are respected"""
+    # Given
+    client = get_s3_client()
+    for i in range(1203):
+        client.put_object(Bucket=s3_bucket, Key=f"tmp/scope_{i % 3}/{i}.csv", Body=b"")
+    for key in ["tmp_out/p1/result.csv", "tmp_out/p1/a/result.csv", "out/result.csv"]:
+        client.put_object(Bucket=s3_bucket, Key=key, Body=b"")
+
+    # Act
+    set_debug_mode(True)
+    nb_deleted_debug = delete_s3_prefixes(s3_bucket, ["tmp", "tmp_out/"])
+    set_debug_mode(False)
+    nb_deleted = delete_s3_prefixes(s3_bucket, ["tmp", "tmp_out/", "tmp_out/p1/"], n_workers=2)
+
+    # Assert
+    assert nb_deleted_debug == 0
+    assert nb_deleted == 1205
+    assert [obj["Key"] for obj in client.list_objects_v2(Bucket=s3_bucket)["Contents"]] == ["out/result.csv"]